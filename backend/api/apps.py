@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+
+from utils.constants import THROTTLE_LOCAL_CACHE_MESSAGE
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        if settings.THROTTLE_STORE == 'cache' and isinstance(
+            caches['default'], LocMemCache
+        ):
+            raise ImproperlyConfigured(THROTTLE_LOCAL_CACHE_MESSAGE)
+        if settings.SLOW_QUERY_LOG_ENABLED:
+            from utils.querylog import install_slow_query_logger
+            connection_created.connect(install_slow_query_logger)
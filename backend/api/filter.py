@@ -1,8 +1,10 @@
+from django.db.models import Count, Exists, OuterRef
 from django_filters import MultipleChoiceFilter, rest_framework as filter
 from django_filters.fields import MultipleChoiceField
 from rest_framework import filters
 
-from recipes.models import Recipe
+from recipes.models import Recipe, RecipeTags
+from utils.constants import TAGS_MATCH_ALL, TAGS_MATCH_CHOICES
 from utils.functions import filter_queryset
 
 
@@ -32,11 +34,17 @@ class RecipeFilter(filter.FilterSet):
 
     is_favorited = filter.BooleanFilter(method='favorite_value')
     is_in_shopping_cart = filter.BooleanFilter(method='shopping_cart_value')
-    tags = MultipleCharFilter(field_name='tags__slug', lookup_expr='contains')
+    tags = MultipleCharFilter(method='tags_value')
+    tags_match = filter.ChoiceFilter(
+        choices=TAGS_MATCH_CHOICES, method='tags_match_value'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'tags', 'author')
+        fields = (
+            'is_favorited', 'is_in_shopping_cart', 'tags', 'tags_match',
+            'author'
+        )
 
     def favorite_value(self, queryset, name, value):
         """Метод для получения избранных рецептов."""
@@ -50,6 +58,32 @@ class RecipeFilter(filter.FilterSet):
             self, queryset, 'shopping_carts__user_id', value
         )
 
+    def tags_value(self, queryset, name, value):
+        """
+        Метод для получения рецептов по слагам тегов.
+
+        По умолчанию возвращает рецепты хотя бы с одним из тегов,
+        при tags_match=all - рецепты со всеми переданными тегами.
+        Фильтрация выполняется подзапросом, поэтому рецепты не дублируются.
+        """
+        slugs = set(value)
+        recipe_tags = RecipeTags.objects.filter(tags__slug__in=slugs)
+        if self.form.cleaned_data.get('tags_match') == TAGS_MATCH_ALL:
+            return queryset.filter(
+                id__in=recipe_tags.values('recipe_id').annotate(
+                    tags_count=Count('tags_id')
+                ).filter(
+                    tags_count=len(slugs)
+                ).values('recipe_id')
+            )
+        return queryset.filter(
+            Exists(recipe_tags.filter(recipe_id=OuterRef('pk')))
+        )
+
+    def tags_match_value(self, queryset, name, value):
+        """Режим совпадения тегов учитывается в методе tags_value."""
+        return queryset
+
 
 class NameSearchFilter(filters.SearchFilter):
     """Фильтр для поиска ингредиента по названию."""
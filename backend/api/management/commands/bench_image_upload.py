@@ -0,0 +1,104 @@
+import base64
+import io
+import math
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import FoodgramUserViewSet
+from recipes.models import User
+from utils.constants import IMAGE_MAX_SIZE
+from utils.storage import delete_unreferenced
+
+BENCH_USERNAME = 'bench-image-upload'
+
+
+class Command(BaseCommand):
+    """
+    Замеряет память и время загрузки аватара.
+
+    Сравнивает передачу изображения строкой base64 в JSON и файлом
+    в multipart-запросе. Изображение из случайных пикселей почти
+    не сжимается, поэтому размер PNG близок к заданному. Пиковая
+    память считается через tracemalloc только на время обработки
+    запроса, тело которого подготовлено заранее.
+    """
+
+    help = 'Бенчмарк памяти при загрузке изображений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=IMAGE_MAX_SIZE,
+            help='Размер изображения в байтах.'
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def make_image(self, size):
+        side = int(math.sqrt(size * 0.98 / 3))
+        buffer = io.BytesIO()
+        Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(
+            buffer, 'PNG', compress_level=0
+        )
+        return buffer.getvalue()
+
+    def make_requests(self, image):
+        factory = APIRequestFactory()
+
+        def make_file():
+            file = io.BytesIO(image)
+            file.name = 'avatar.png'
+            return file
+
+        encoded = 'data:image/png;base64,' + base64.b64encode(image).decode()
+        return {
+            'base64 json': lambda: factory.put(
+                '/api/users/me/avatar/', {'avatar': encoded}, format='json'
+            ),
+            'multipart': lambda: factory.put(
+                '/api/users/me/avatar/',
+                {'avatar': make_file()},
+                format='multipart'
+            ),
+        }
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={
+                'email': f'{BENCH_USERNAME}@example.com',
+                'first_name': BENCH_USERNAME,
+                'last_name': BENCH_USERNAME,
+            }
+        )
+        image = self.make_image(options['size'])
+        self.stdout.write('Размер изображения: {:.1f} МБ'.format(
+            len(image) / 2 ** 20
+        ))
+        view = FoodgramUserViewSet.as_view({'put': 'avatar'})
+        for mode, make_request in self.make_requests(image).items():
+            peaks, durations, status_code = [], [], None
+            for _ in range(options['repeat']):
+                request = make_request()
+                force_authenticate(request, user=user)
+                tracemalloc.start()
+                started = time.perf_counter()
+                response = view(request)
+                durations.append(time.perf_counter() - started)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                status_code = response.status_code
+                if status_code != 200:
+                    self.stderr.write(str(response.data))
+            self.stdout.write(
+                '{}: статус {}, пик памяти {:.1f} МБ, {:.1f} мс'.format(
+                    mode, status_code, max(peaks) / 2 ** 20,
+                    min(durations) * 1000
+                )
+            )
+        name = User.objects.get(pk=user.pk).avatar.name
+        User.objects.filter(pk=user.pk).update(avatar=None)
+        delete_unreferenced((name,))
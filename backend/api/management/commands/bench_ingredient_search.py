@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.ingredient_search import ingredient_index
+
+QUERIES = (
+    'мука пшенная',
+    'молако',
+    'сахр',
+    'помидоры черри',
+    'сливочное масло',
+    'vjkjrj',
+    'ckbdjxyjt vfckj',
+)
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время поиска ингредиентов по мере ввода.
+
+    Каждый запрос вводится посимвольно, поиск выполняется после
+    каждого символа. Кеш совпадений слов сбрасывается перед
+    каждым повтором.
+    """
+
+    help = 'Бенчмарк поиска ингредиентов с учётом опечаток.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        ingredient_index.build()
+        self.stdout.write(
+            'Ингредиентов: {}, слов: {}, построение индекса: {:.1f} мс'.format(
+                len(ingredient_index.records), len(ingredient_index.words),
+                (time.perf_counter() - started) * 1000
+            )
+        )
+        durations = []
+        for query in options['queries'] or QUERIES:
+            for _ in range(options['repeat']):
+                ingredient_index.matches = {}
+                for length in range(1, len(query) + 1):
+                    started = time.perf_counter()
+                    ingredient_index.search(query[:length], options['limit'])
+                    durations.append(time.perf_counter() - started)
+            found = ingredient_index.search(query, options['limit'])
+            self.stdout.write('{}: {}'.format(
+                query, ', '.join(record['name'] for record in found[:5])
+            ))
+        quantiles = statistics.quantiles(
+            durations, n=100, method='inclusive'
+        )
+        self.stdout.write(
+            'Нажатий: {}, среднее: {:.3f} мс, p50: {:.3f} мс, '
+            'p99: {:.3f} мс, max: {:.3f} мс'.format(
+                len(durations), statistics.mean(durations) * 1000,
+                quantiles[49] * 1000, quantiles[98] * 1000,
+                max(durations) * 1000
+            )
+        )
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.middleware import compress_content, get_supported_encodings
+from api.renderers import ORJSONRenderer
+from api.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время рендеринга и размер ответа списка рецептов.
+
+    Сравнивает JSON-рендереры и кодировки сжатия
+    для запроса /api/recipes/?limit=<limit>.
+    """
+
+    help = 'Бенчмарк рендеринга JSON и сжатия списка рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        request = APIRequestFactory().get(
+            '/api/recipes/', {'limit': options['limit']}
+        )
+        response = RecipeViewSet.as_view({'get': 'list'})(request)
+        data = response.data
+        self.stdout.write(
+            'Рецептов на странице: {}'.format(len(data['results']))
+        )
+        content = b''
+        for renderer_class in (JSONRenderer, ORJSONRenderer):
+            renderer = renderer_class()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                content = renderer.render(data, 'application/json')
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                '{}: {:.3f} мс, {} байт'.format(
+                    renderer_class.__name__, elapsed * 1000, len(content)
+                )
+            )
+        for encoding in get_supported_encodings():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                compressed_content = compress_content(content, encoding)
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                '{}: {:.3f} мс, {} байт ({:.1%} от исходного)'.format(
+                    encoding,
+                    elapsed * 1000,
+                    len(compressed_content),
+                    len(compressed_content) / len(content)
+                )
+            )
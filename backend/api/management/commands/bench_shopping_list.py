@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import Ingredient, Recipe, ShoppingCart, User
+from utils.shopping_list import get_shopping_list
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время построения списка покупок.
+
+    Временно добавляет в корзину пользователя заданное количество
+    рецептов и сравнивает агрегацию в SQL со сводным списком.
+    Изменения откатываются после замера.
+    """
+
+    help = 'Бенчмарк построения списка покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, function, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = function()
+        return result, (time.perf_counter() - started) / repeat * 1000
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        user = User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError('Нет пользователей для замера.')
+        with transaction.atomic():
+            ShoppingCart.objects.filter(user=user).delete()
+            ShoppingCart.objects.bulk_create(
+                ShoppingCart(user=user, recipe_id=recipe_id)
+                for recipe_id in Recipe.objects.values_list(
+                    'id', flat=True
+                )[:options['recipes']]
+            )
+            sql_rows, sql_time = self.measure(
+                lambda: list(
+                    Ingredient.objects.filter(
+                        recipes__shopping_carts__user=user
+                    ).annotate(total_amount=Sum('recipe_ingredients__amount'))
+                ),
+                repeat
+            )
+            shopping_list, list_time = self.measure(
+                lambda: get_shopping_list(user), repeat
+            )
+            transaction.set_rollback(True)
+        self.stdout.write(
+            'Рецептов в корзине: {}'.format(
+                min(options['recipes'], Recipe.objects.count())
+            )
+        )
+        self.stdout.write(
+            'SQL-агрегация: {} позиций, {:.2f} мс'.format(
+                len(sql_rows), sql_time
+            )
+        )
+        self.stdout.write(
+            'Сводный список: {} позиций, {:.2f} мс'.format(
+                len(shopping_list), list_time
+            )
+        )
@@ -0,0 +1,130 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+
+def read_memory(pid):
+    """Возвращает RSS и PSS процесса в килобайтах."""
+    memory = {}
+    for name, key in (('status', 'VmRSS:'), ('smaps_rollup', 'Pss:')):
+        try:
+            with open(f'/proc/{pid}/{name}') as file:
+                for line in file:
+                    if line.startswith(key):
+                        memory[key.rstrip(':')] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return memory.get('VmRSS', 0), memory.get('Pss', 0)
+
+
+def get_children(pid):
+    """Возвращает идентификаторы дочерних процессов."""
+    children = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            children.append(int(entry.name))
+    return children
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время запуска gunicorn и память обработчиков.
+
+    Запускает сервер с настройками gunicorn.conf.py с предзагрузкой
+    приложения и без неё, ждёт готовности всех обработчиков
+    и выводит RSS и PSS каждого процесса.
+    """
+
+    help = 'Бенчмарк запуска сервера gunicorn.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--port', type=int, default=9180)
+        parser.add_argument('--timeout', type=float, default=60)
+
+    def wait_ready(self, url, process, timeout):
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise CommandError('Сервер завершился при запуске.')
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.05)
+        raise CommandError('Сервер не стал готов за отведённое время.')
+
+    def measure(self, preload, options):
+        environment = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{options["port"]}',
+            GUNICORN_WORKERS=str(options['workers']),
+            GUNICORN_PRELOAD=str(preload),
+            GUNICORN_ACCESSLOG='',
+            GUNICORN_MAX_REQUESTS='0'
+        )
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            (
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                'foodgram_backend.wsgi'
+            ),
+            cwd=settings.BASE_DIR,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            url = 'http://127.0.0.1:{}{}'.format(
+                options['port'], reverse('readiness')
+            )
+            self.wait_ready(url, process, options['timeout'])
+            while len(get_children(process.pid)) < options['workers']:
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - started
+            workers = [
+                read_memory(pid) for pid in get_children(process.pid)
+            ]
+            master = read_memory(process.pid)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+        self.stdout.write(
+            'Предзагрузка: {}. Готов через {:.2f} с'.format(
+                'да' if preload else 'нет', elapsed
+            )
+        )
+        self.stdout.write(
+            '  главный процесс: RSS {} КБ, PSS {} КБ'.format(*master)
+        )
+        for rss, pss in workers:
+            self.stdout.write(
+                '  обработчик: RSS {} КБ, PSS {} КБ'.format(rss, pss)
+            )
+        self.stdout.write(
+            '  всего PSS: {} КБ'.format(
+                master[1] + sum(pss for _, pss in workers)
+            )
+        )
+
+    def handle(self, *args, **options):
+        for preload in (True, False):
+            self.measure(preload, options)
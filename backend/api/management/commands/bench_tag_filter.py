@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+
+from api.filter import RecipeFilter
+from recipes.models import Recipe, Tag
+from utils.constants import TAGS_MATCH_ALL, TAGS_MATCH_ANY
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время фильтрации рецептов по тегам.
+
+    Для каждого количества тегов и режима совпадения выполняет
+    запрос первой страницы и подсчёт рецептов.
+    """
+
+    help = 'Бенчмарк фильтрации рецептов по тегам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        self.stdout.write(
+            'Рецептов: {}, тегов: {}'.format(
+                Recipe.objects.count(), len(slugs)
+            )
+        )
+        for tags_count in range(1, len(slugs) + 1):
+            for tags_match in (TAGS_MATCH_ANY, TAGS_MATCH_ALL):
+                data = QueryDict(mutable=True)
+                data.setlist('tags', slugs[:tags_count])
+                data['tags_match'] = tags_match
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    queryset = RecipeFilter(
+                        data, queryset=Recipe.objects.all()
+                    ).qs
+                    total = queryset.count()
+                    page = list(queryset[:options['limit']])
+                elapsed = (time.perf_counter() - started) / options['repeat']
+                self.stdout.write(
+                    'тегов: {}, режим: {}, найдено: {}, на странице: {}, '
+                    '{:.2f} мс'.format(
+                        tags_count, tags_match, total, len(page),
+                        elapsed * 1000
+                    )
+                )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from utils.constants import LSH_BATCH_SIZE
+from utils.similarity import update_recipe_signatures
+
+
+class Command(BaseCommand):
+    """Строит MinHash/LSH-индекс для поиска похожих рецептов."""
+
+    help = 'Строит индекс похожих рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=LSH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        )
+        batch = []
+        total = 0
+        for recipe_id in recipe_ids.iterator(chunk_size=batch_size):
+            batch.append(recipe_id)
+            if len(batch) == batch_size:
+                update_recipe_signatures(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            update_recipe_signatures(batch)
+            total += len(batch)
+        self.stdout.write('Проиндексировано рецептов: {}'.format(total))
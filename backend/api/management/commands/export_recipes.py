@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from utils.constants import EXPORT_CHUNK_SIZE
+from utils.export import gzip_stream, iter_recipes_ndjson, parse_updated_since
+
+
+class Command(BaseCommand):
+    """
+    Выгружает каталог рецептов в формате NDJSON.
+
+    Рецепты читаются пачками, поэтому команда подходит
+    для выгрузки каталога любого размера.
+    """
+
+    help = 'Выгрузка рецептов в формате NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-')
+        parser.add_argument('--updated-since')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE
+        )
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            updated_since = parse_updated_since(options['updated_since'])
+        except ValidationError as error:
+            raise CommandError(error.detail[0])
+        chunks = iter_recipes_ndjson(updated_since, options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_stream(chunks)
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+            for chunk in chunks:
+                output.write(chunk)
+            output.flush()
+            return
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
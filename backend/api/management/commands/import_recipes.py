@@ -0,0 +1,62 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import User
+from utils.constants import RECIPE_IMPORT_BATCH_SIZE
+from utils.recipe_import import import_recipes
+
+
+class Command(BaseCommand):
+    """
+    Импортирует рецепты из файла в формате NDJSON.
+
+    Каждая строка файла содержит один рецепт в формате API.
+    Рецепты проверяются и сохраняются пачками.
+    """
+
+    help = 'Импорт рецептов из файла в формате NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--author', required=True)
+        parser.add_argument(
+            '--batch-size', type=int, default=RECIPE_IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(
+                'Пользователь {} не найден.'.format(options['author'])
+            )
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+        created_count = errors_count = line_number = 0
+        with open(options['path'], encoding='utf-8') as file:
+            while True:
+                items = []
+                for line in file:
+                    line_number += 1
+                    if line.strip():
+                        items.append((line_number, json.loads(line)))
+                    if len(items) == batch_size:
+                        break
+                if not items:
+                    break
+                created, errors = import_recipes(
+                    author, [item for _, item in items], batch_size
+                )
+                created_count += len(created)
+                errors_count += len(errors)
+                for index, item_errors in sorted(errors.items()):
+                    self.stderr.write(
+                        'Строка {}: {}'.format(items[index][0], item_errors)
+                    )
+        self.stdout.write(
+            'Создано рецептов: {}, ошибок: {}, {:.1f} с'.format(
+                created_count, errors_count, time.perf_counter() - started
+            )
+        )
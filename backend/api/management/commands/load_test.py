@@ -0,0 +1,132 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Recipe, Tag, User
+from utils.constants import LOAD_TEST_PASSWORD, LOAD_TEST_USERNAME
+from utils.loadtest import SCENARIOS, load_collection, run_load_test
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочное тестирование запущенного сервера.
+
+    Сценарии собираются из запросов Postman-коллекции и выбираются
+    случайно по весам. Каждый виртуальный пользователь работает под
+    своей учётной записью, которая создаётся в базе перед запуском.
+    Ограничения частоты запросов сервера нужно увеличить через
+    переменные окружения THROTTLE_RATE_*, иначе ответы 429 попадут
+    в ошибки.
+    """
+
+    help = 'Нагрузочный тест API по сценариям из Postman-коллекции.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--collection',
+            default=str(
+                settings.BASE_DIR.parent / 'postman_collection'
+                / 'foodgram.postman_collection.json'
+            )
+        )
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=60)
+        parser.add_argument('--iterations', type=int, default=0)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--weights',
+            help='Веса сценариев, например browse=5,favorite=1.'
+        )
+        parser.add_argument('--output', help='Файл для итогов в JSON.')
+
+    def get_scenarios(self, weights):
+        scenarios = dict(SCENARIOS)
+        if not weights:
+            return scenarios
+        for item in weights.split(','):
+            name, _, weight = item.partition('=')
+            if name not in scenarios or not weight.isdigit():
+                raise CommandError(f'Некорректный вес сценария: {item}.')
+            scenarios[name] = (int(weight), scenarios[name][1])
+        return {
+            name: scenario
+            for name, scenario in scenarios.items() if scenario[0]
+        }
+
+    def get_users(self, count):
+        users = []
+        for index in range(count):
+            username = LOAD_TEST_USERNAME.format(index)
+            user, created = User.objects.get_or_create(
+                username=username,
+                defaults={
+                    'email': f'{username}@example.com',
+                    'first_name': username,
+                    'last_name': username,
+                }
+            )
+            if created:
+                user.set_password(LOAD_TEST_PASSWORD)
+                user.save(update_fields=('password',))
+            token, _ = Token.objects.get_or_create(user=user)
+            users.append({'userId': user.id, 'userToken': token.key})
+        return users
+
+    def handle(self, *args, **options):
+        try:
+            requests = load_collection(options['collection'])
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать коллекцию: {error}')
+        scenarios = self.get_scenarios(options['weights'])
+        users = self.get_users(options['concurrency'])
+        recipes = list(
+            Recipe.objects.exclude(
+                author_id__in=[user['userId'] for user in users]
+            ).order_by('?').values_list('id', 'author_id')[
+                :options['recipes']
+            ]
+        )
+        tags = list(Tag.objects.values_list('slug', flat=True))
+        if not recipes or not tags:
+            raise CommandError('В базе данных нет рецептов или тегов.')
+        try:
+            rows = run_load_test(
+                options['url'], requests, scenarios, users, recipes, tags,
+                options['concurrency'], options['duration'],
+                options['iterations'], options['seed']
+            )
+        except KeyError as error:
+            raise CommandError(f'В коллекции нет запросов: {error}')
+        self.stdout.write(
+            '{:<56} {:>7} {:>8} {:>7} {:>8} {:>8} {:>8} {:>8}'.format(
+                'запрос', 'всего', 'в сек', 'ошибок', 'p50, мс', 'p95, мс',
+                'p99, мс', 'max, мс'
+            )
+        )
+        for row in rows:
+            self.stdout.write(
+                '{name:<56} {count:>7} {rps:>8.1f} {error_rate:>7.1%} '
+                '{p50_ms:>8.1f} {p95_ms:>8.1f} {p99_ms:>8.1f} '
+                '{max_ms:>8.1f}'.format(**row)
+            )
+        errors = {
+            row['name']: row['statuses']
+            for row in rows if row['error_rate'] and row['statuses']
+        }
+        for name, statuses in errors.items():
+            self.stdout.write(self.style.WARNING(f'{name}: {statuses}'))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump({
+                    'url': options['url'],
+                    'concurrency': options['concurrency'],
+                    'duration': options['duration'],
+                    'scenarios': {
+                        name: weight for name, (weight, _) in scenarios.items()
+                    },
+                    'results': rows,
+                }, output, ensure_ascii=False, indent=2)
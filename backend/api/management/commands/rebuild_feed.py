@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Follow, TimelineEntry, User
+from utils.feed import backfill_timelines
+
+
+class Command(BaseCommand):
+    """
+    Перестраивает ленты пользователей.
+
+    Пересчитывает счётчики подписчиков и заполняет ленты
+    по существующим подпискам, например после первого
+    развёртывания ленты.
+    """
+
+    help = 'Перестраивает ленты пользователей по подпискам.'
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.select_related('following')
+        with transaction.atomic():
+            User.objects.update(followers_count=Coalesce(
+                Subquery(
+                    Follow.objects.filter(
+                        following_id=OuterRef('id')
+                    ).order_by().values('following_id').annotate(
+                        total=Count('id')
+                    ).values('total')
+                ),
+                0
+            ))
+            TimelineEntry.objects.all().delete()
+            for follow in follows.iterator():
+                backfill_timelines(follow.following, (follow.user_id,))
+        self.stdout.write(
+            'Записей в лентах: {}'.format(TimelineEntry.objects.count())
+        )
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import Recipe, RecipeChange
+from utils.changes import record_recipe_changes
+from utils.storage import (
+    MEDIA_FIELDS,
+    HashedMediaStorage,
+    delete_unreferenced,
+    is_hashed_name
+)
+
+
+class Command(BaseCommand):
+    """
+    Переименовывает медиафайлы по хешу содержимого.
+
+    Файлы картинок рецептов и аватаров, сохранённые до перехода
+    на HashedMediaStorage, копируются под именем по содержимому,
+    ссылки в базе данных обновляются. Одинаковые файлы сливаются
+    в один. Старые файлы удаляются, если на них больше никто
+    не ссылается. Изменённые рецепты попадают в журнал изменений.
+    """
+
+    help = 'Переименовывает медиафайлы по хешу содержимого.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--keep-old', action='store_true')
+
+    def rehash(self, model, field, options):
+        names = model.objects.exclude(
+            **{f'{field}__isnull': True}
+        ).exclude(**{field: ''}).order_by().values_list(
+            field, flat=True
+        ).distinct()
+        renamed = missing = 0
+        storage = HashedMediaStorage()
+        for name in list(names):
+            if is_hashed_name(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Файл не найден: {name}')
+                continue
+            if options['dry_run']:
+                renamed += 1
+                continue
+            with storage.open(name) as content:
+                new_name = storage.save(name, content)
+            with transaction.atomic():
+                objects = model.objects.filter(**{field: name})
+                if model is Recipe:
+                    recipe_ids = list(objects.values_list('id', flat=True))
+                    objects.update(
+                        **{field: new_name}, updated_at=timezone.now()
+                    )
+                    record_recipe_changes(recipe_ids, RecipeChange.UPDATED)
+                else:
+                    objects.update(**{field: new_name})
+            if not options['keep_old']:
+                delete_unreferenced((name,))
+            renamed += 1
+        return renamed, missing
+
+    def handle(self, *args, **options):
+        for model, field in MEDIA_FIELDS:
+            renamed, missing = self.rehash(model, field, options)
+            self.stdout.write(
+                '{}.{}: переименовано файлов: {}, не найдено: {}'.format(
+                    model._meta.model_name, field, renamed, missing
+                )
+            )
@@ -0,0 +1,62 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from utils.constants import TASK_POLL_INTERVAL, TASK_SCHEDULER_INTERVAL
+from utils.tasks import (
+    claim_task,
+    requeue_stale_tasks,
+    run_scheduler,
+    run_task,
+    sync_schedule
+)
+
+
+class Command(BaseCommand):
+    """
+    Запускает обработчик фоновых задач.
+
+    Выполняет задачи из очереди по приоритету и ставит в очередь
+    периодические задачи по расписанию. Можно запускать несколько
+    обработчиков одновременно.
+    """
+
+    help = 'Обработчик фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sleep', type=float, default=TASK_POLL_INTERVAL
+        )
+        parser.add_argument('--once', action='store_true')
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        sync_schedule()
+        processed = 0
+        next_maintenance = 0
+        while not self.stopping:
+            if time.monotonic() >= next_maintenance:
+                requeue_stale_tasks()
+                run_scheduler()
+                next_maintenance = time.monotonic() + TASK_SCHEDULER_INTERVAL
+            task = claim_task(worker)
+            if task is None:
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['sleep'])
+                continue
+            run_task(task)
+            processed += 1
+            close_old_connections()
+        self.stdout.write('Выполнено задач: {}'.format(processed))
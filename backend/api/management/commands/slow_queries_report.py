@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from utils.constants import SLOW_QUERY_REPORT_TOP
+from utils.querylog import aggregate_records, read_records
+
+
+class Command(BaseCommand):
+    """
+    Выводит самые затратные запросы из журнала медленных запросов.
+
+    Запросы группируются по отпечаткам и сортируются по суммарной,
+    средней или максимальной длительности либо по количеству.
+    """
+
+    help = 'Отчёт по журналу медленных SQL-запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=SLOW_QUERY_REPORT_TOP)
+        parser.add_argument(
+            '--sort', choices=('total', 'avg', 'max', 'count'),
+            default='total'
+        )
+        parser.add_argument('--hours', type=float)
+        parser.add_argument('--explain', action='store_true')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['hours']:
+            since = timezone.now() - timedelta(hours=options['hours'])
+        key = options['sort'] if options['sort'] == 'count' else (
+            options['sort'] + '_ms'
+        )
+        groups = sorted(
+            aggregate_records(read_records(since)),
+            key=lambda group: group[key],
+            reverse=True
+        )[:options['top']]
+        if not groups:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        for position, group in enumerate(groups, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{position}. {group["fingerprint"]}: '
+                f'{group["count"]} раз, всего {group["total_ms"]:.0f} мс, '
+                f'в среднем {group["avg_ms"]:.1f} мс, '
+                f'максимум {group["max_ms"]:.1f} мс'
+            ))
+            self.stdout.write(
+                'Источники: ' + ', '.join(sorted(group['sources']))
+            )
+            self.stdout.write(group['sql'])
+            if options['explain'] and group['explain']:
+                self.stdout.write(group['explain'])
+            self.stdout.write('')
@@ -0,0 +1,153 @@
+import gzip
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from utils.constants import COMPRESSIBLE_CONTENT_TYPES
+from utils.profiling import get_profile_trigger, profile_call, save_profile
+from utils.querylog import query_source
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def get_supported_encodings():
+    """Возвращает поддерживаемые кодировки в порядке предпочтения."""
+    if brotli is None:
+        return ('gzip',)
+    return ('br', 'gzip')
+
+
+def select_content_encoding(accept_encoding, encodings=None):
+    """
+    Выбирает кодировку сжатия по заголовку Accept-Encoding.
+
+    Учитывает q-значения; при равных весах предпочитает кодировку,
+    идущую раньше в encodings, по умолчанию - brotli.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.strip().split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding.strip().lower()] = quality
+    best_encoding, best_quality = None, 0.0
+    for encoding in encodings or get_supported_encodings():
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def compress_content(content, encoding):
+    """Сжимает содержимое ответа указанной кодировкой."""
+    if encoding == 'br':
+        return brotli.compress(
+            content,
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return gzip.compress(
+        content,
+        compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+        mtime=0
+    )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы API с помощью brotli или gzip.
+
+    Сжимаются только ответы с подходящим типом содержимого,
+    размер которых превышает COMPRESSION_MIN_LENGTH. HTML-страницы
+    Админ-зоны и браузерного API содержат CSRF-токен рядом с данными
+    из запроса и не сжимаются, чтобы исключить атаку BREACH.
+    """
+
+    def process_response(self, request, response):
+        """Сжимает ответ, если клиент поддерживает сжатие."""
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in COMPRESSIBLE_CONTENT_TYPES:
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = select_content_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        compressed_content = compress_content(response.content, encoding)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response['Content-Length'] = str(len(compressed_content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запросы по требованию сотрудников и выборочно.
+
+    Если PROFILING_ENABLED выключен, промежуточный слой исключается
+    из обработки запросов и не влияет на их время.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = get_profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        response, profiler, queries, duration = profile_call(
+            self.get_response, request
+        )
+        response['X-Profile-Id'] = save_profile(
+            request, response, profiler, queries, duration, trigger
+        )
+        return response
+
+
+class QuerySourceMiddleware:
+    """
+    Помечает SQL-запросы обрабатываемым представлением.
+
+    Метка попадает в журнал медленных запросов. Если журнал
+    выключен, промежуточный слой исключается из обработки запросов.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = query_source.set(f'{request.method} {request.path}')
+        try:
+            return self.get_response(request)
+        finally:
+            query_source.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Заменяет метку запроса именем представления."""
+        query_source.set(
+            f'{request.method} {request.resolver_match.view_name}'
+        )
@@ -1,7 +1,63 @@
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from utils.constants import MAX_PAGE_SIZE
+from utils.paginators import CachedCountPaginator, HasMorePaginator
 
 
 class PageLimitPagination(PageNumberPagination):
-    """Пагинатор для динамического определения размера страницы."""
+    """
+    Пагинатор для динамического определения размера страницы.
+
+    Количество объектов кешируется. С параметром count=0 оно
+    не считается вовсе: ответ содержит признак has_more.
+    """
 
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    django_paginator_class = CachedCountPaginator
+    count_query_param = 'count'
+
+    def is_count_disabled(self, request):
+        """Проверяет, отказался ли клиент от подсчёта объектов."""
+        return request.query_params.get(
+            self.count_query_param, ''
+        ).lower() in ('0', 'false')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает страницу, при необходимости без подсчёта объектов."""
+        if not self.is_count_disabled(request):
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page = HasMorePaginator(queryset, page_size).page(
+                page_number
+            )
+        except InvalidPage as error:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(error)
+            ))
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        """
+        Возвращает ответ со страницей.
+
+        Без подсчёта объектов вместо count передаётся has_more.
+        """
+        if not isinstance(self.page.paginator, HasMorePaginator):
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('has_more', self.page.has_next()),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
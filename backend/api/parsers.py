@@ -0,0 +1,55 @@
+import json
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from utils.constants import (
+    INVALID_MULTIPART_DATA_MESSAGE,
+    MULTIPART_DATA_FIELD,
+    UPLOAD_TOO_LARGE_MESSAGE
+)
+
+
+class UploadTooLarge(APIException):
+    """Тело запроса превышает допустимый размер."""
+
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = UPLOAD_TOO_LARGE_MESSAGE
+    default_code = 'upload_too_large'
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """
+    Парсер multipart-запросов с данными в формате JSON.
+
+    Файлы сохраняются обработчиками загрузки Django: крупные
+    записываются во временные файлы по частям, не попадая в память
+    целиком. Вложенные данные, например ингредиенты рецепта,
+    передаются JSON-строкой в поле 'data', файлы — отдельными
+    полями формы. Запрос без поля 'data' разбирается как обычная
+    форма.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Разбирает форму и объединяет данные JSON с файлами."""
+        request = parser_context['request']
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > settings.UPLOAD_MAX_SIZE:
+            raise UploadTooLarge()
+        data_and_files = super().parse(stream, media_type, parser_context)
+        raw_data = data_and_files.data.get(MULTIPART_DATA_FIELD)
+        if raw_data is None:
+            return data_and_files
+        try:
+            data = json.loads(raw_data)
+        except ValueError:
+            raise ParseError(INVALID_MULTIPART_DATA_MESSAGE)
+        if not isinstance(data, dict):
+            raise ParseError(INVALID_MULTIPART_DATA_MESSAGE)
+        data.update(data_and_files.files.dict())
+        return DataAndFiles(data, {})
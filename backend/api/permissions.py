@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -16,3 +19,21 @@ class UpdateDeletePermission(permissions.IsAuthenticatedOrReadOnly):
             or request.user.is_authenticated
             and obj.author == request.user
         )
+
+
+class MetricsPermission(permissions.BasePermission):
+    """
+    Класс для проверки доступа к метрикам.
+
+    Доступ есть у администраторов и у запросов с токеном METRICS_TOKEN
+    в заголовке Authorization.
+    """
+
+    def has_permission(self, request, view):
+        """Проверяет права пользователя или токен сборщика метрик."""
+        if request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        return bool(token) and hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
@@ -1,8 +1,10 @@
 import base64
+import binascii
 
 from django.core.files.base import ContentFile
-from django.db.models import Count
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from recipes.models import (
     Favorite,
@@ -16,39 +18,104 @@ from recipes.models import (
 )
 from utils.constants import (
     DEFAULT_AMOUNT_VALUE,
+    IMAGE_MAX_SIZE,
+    IMAGE_TOO_LARGE_MESSAGE,
+    INVALID_IMAGE_DATA_MESSAGE,
+    MAX_AMOUNT,
+    MAX_COOKING_TIME,
+    MIN_AMOUNT,
+    MIN_COOKING_TIME,
+    PANTRY_MAX_INGREDIENTS,
     RECIPE_ALREADY_IN_FAVORITE_MESSAGE,
     RECIPE_ALREADY_IN_SHOPPING_CART_MESSAGE,
+    RECIPE_NAME_MAX_LENGTH,
+    SHOPPING_LIST_AMOUNT_PRECISION,
     SUBSCRIBE_TO_YOURSELF_MESSAGE,
     USER_ALREADY_SUBSCRIBE_MESSAGE
 )
+from utils.feed import fan_out_recipe, subscribe_timeline
 from utils.functions import (
-    check_recipes_limit_param,
     create_or_update_recipe_tags_and_ingredients,
+    get_recipes_limit,
+    get_recipes_previews,
+    get_requested_fields,
+    insert_on_conflict,
     short_link_create
 )
+from utils.paginators import register_count_change
 
 
 class Base64ImageField(serializers.ImageField):
-    """Поле для кодирования изображений."""
+    """
+    Поле для кодирования изображений.
+
+    Принимает изображение строкой base64 или файлом из multipart-запроса.
+    Размер проверяется до декодирования base64 и до разбора изображения.
+    """
 
     def to_internal_value(self, data):
         """Проверяет запрос на обновление изображения в сериализаторе."""
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            format, separator, imgstr = data.partition(';base64,')
+            if not separator:
+                raise serializers.ValidationError(INVALID_IMAGE_DATA_MESSAGE)
+            if len(imgstr) // 4 * 3 > IMAGE_MAX_SIZE:
+                raise serializers.ValidationError(IMAGE_TOO_LARGE_MESSAGE)
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            try:
+                content = base64.b64decode(imgstr)
+            except binascii.Error:
+                raise serializers.ValidationError(INVALID_IMAGE_DATA_MESSAGE)
+            data = ContentFile(content, name='temp.' + ext)
+        elif getattr(data, 'size', None) and data.size > IMAGE_MAX_SIZE:
+            raise serializers.ValidationError(IMAGE_TOO_LARGE_MESSAGE)
         return super().to_internal_value(data)
 
 
+class SparseFieldsetMixin:
+    """
+    Ограничивает набор полей параметрами запроса 'fields' и 'omit'.
+
+    Учитывается только сериализатором верхнего уровня, если в контексте
+    не передано 'sparse_fieldset': False. Исключённые
+    поля не создаются, поэтому вложенные сериализаторы и методы
+    для них не вызываются.
+    """
+
+    def get_fields(self):
+        """Возвращает поля, запрошенные клиентом."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if (
+            request is None
+            or parent is not None
+            or not self.context.get('sparse_fieldset', True)
+        ):
+            return fields
+        return {
+            name: fields[name]
+            for name in get_requested_fields(request, fields)
+        }
+
+
 class UserRecipeCartSerializer(serializers.ModelSerializer):
-    """Общий сериализатор для работы со списком покупок и избранным."""
+    """
+    Общий сериализатор для работы со списком покупок и избранным.
 
-    user = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all()
+    Повторное добавление рецепта отсекается ограничением
+    уникальности в базе данных.
+    """
+
+    user = serializers.HiddenField(
+        default=serializers.CurrentUserDefault()
     )
     recipe = serializers.PrimaryKeyRelatedField(
-        queryset=Recipe.objects.all()
+        queryset=Recipe.objects.only('id', 'name', 'image', 'cooking_time')
     )
+    already_exists_message = None
 
     class Meta:
         fields = (
@@ -56,10 +123,22 @@ class UserRecipeCartSerializer(serializers.ModelSerializer):
             'recipe'
         )
 
+    def create(self, validated_data):
+        """Добавляет рецепт одним запросом к базе данных."""
+        instance = insert_on_conflict(self.Meta.model, **validated_data)
+        if instance is None:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    self.already_exists_message
+                ]}
+            )
+        register_count_change(self.Meta.model)
+        return instance
+
     def to_representation(self, instance):
         """Возвращает данные в формате с вложенным сериализатором."""
         serializer = RecipeMiniSerializer(
-            Recipe.objects.filter(id=instance.recipe_id).first(),
+            instance.recipe,
             context={'request': self.context.get('request')}
         )
         return serializer.data
@@ -68,6 +147,8 @@ class UserRecipeCartSerializer(serializers.ModelSerializer):
 class FavoriteSerializer(UserRecipeCartSerializer):
     """Сериализатор для работы с избранными рецептами."""
 
+    already_exists_message = RECIPE_ALREADY_IN_FAVORITE_MESSAGE
+
     class Meta:
         fields = (
             'user',
@@ -75,22 +156,12 @@ class FavoriteSerializer(UserRecipeCartSerializer):
         )
         model = Favorite
 
-    def validate(self, data):
-        """Проверяет ингредиенты и теги на корректность заполнения."""
-        recipe = data.get('recipe')
-        user = data.get('user')
-        if Favorite.objects.filter(
-            user=user, recipe=recipe
-        ).exists():
-            raise serializers.ValidationError(
-                RECIPE_ALREADY_IN_FAVORITE_MESSAGE
-            )
-        return data
-
 
 class ShoppingCartSerializer(UserRecipeCartSerializer):
     """Сериализатор для работы со списком покупок."""
 
+    already_exists_message = RECIPE_ALREADY_IN_SHOPPING_CART_MESSAGE
+
     class Meta:
         fields = (
             'user',
@@ -98,18 +169,6 @@ class ShoppingCartSerializer(UserRecipeCartSerializer):
         )
         model = ShoppingCart
 
-    def validate(self, data):
-        """Проверяет ингредиенты и теги на корректность заполнения."""
-        recipe = data.get('recipe')
-        user = data.get('user')
-        if ShoppingCart.objects.filter(
-            user=user, recipe=recipe
-        ).exists():
-            raise serializers.ValidationError(
-                RECIPE_ALREADY_IN_SHOPPING_CART_MESSAGE
-            )
-        return data
-
 
 class IngredientCreateSerializer(serializers.ModelSerializer):
     """
@@ -169,6 +228,18 @@ class IngredientReadSerializer(serializers.ModelSerializer):
         model = Ingredient
 
 
+class ShoppingListItemSerializer(serializers.Serializer):
+    """Сериализатор для работы с позициями сводного списка покупок."""
+
+    name = serializers.CharField()
+    amount = serializers.DecimalField(
+        max_digits=None,
+        decimal_places=SHOPPING_LIST_AMOUNT_PRECISION,
+        coerce_to_string=False
+    )
+    measurement_unit = serializers.CharField()
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с тегами."""
 
@@ -248,7 +319,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для работы с учётными записями пользователей."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -266,7 +337,15 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
     def get_is_subscribed(self, obj):
-        """Проверяет текущую подписку на другого пользователя."""
+        """
+        Проверяет текущую подписку на другого пользователя.
+
+        Если подписки заранее загружены в контекст 'subscriptions',
+        проверка выполняется без запроса к базе.
+        """
+        subscriptions = self.context.get('subscriptions')
+        if subscriptions is not None:
+            return obj.id in subscriptions
         request = self.context.get('request')
         user = request.user
         if user.is_authenticated and Follow.objects.filter(
@@ -295,37 +374,82 @@ class RecipeMiniSerializer(serializers.ModelSerializer):
         model = Recipe
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для создания рецептов."""
+class SimilarRecipeSerializer(RecipeMiniSerializer):
+    """
+    Сериализатор для работы с похожими рецептами.
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True,
+    Дополняет сокращенную информацию о рецепте оценкой сходства.
+    """
+
+    jaccard = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeMiniSerializer.Meta):
+        fields = RecipeMiniSerializer.Meta.fields + ('jaccard',)
+
+
+class PantryRecipeSerializer(RecipeMiniSerializer):
+    """
+    Сериализатор для работы с результатами поиска по ингредиентам.
+
+    Дополняет сокращенную информацию о рецепте покрытием ингредиентов.
+    """
+
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeMiniSerializer.Meta):
+        fields = RecipeMiniSerializer.Meta.fields + (
+            'matched_count',
+            'missing_count',
+            'coverage',
+        )
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    """Сериализатор для проверки параметров поиска по ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=PANTRY_MAX_INGREDIENTS,
+        default=list
     )
-    ingredients = IngredientCreateSerializer(
-        many=True,
-        source='recipe_ingredients'
+    required = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=PANTRY_MAX_INGREDIENTS,
+        default=list
+    )
+    excluded = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=PANTRY_MAX_INGREDIENTS,
+        default=list
+    )
+    tags = serializers.ListField(
+        child=serializers.SlugField(),
+        default=list
+    )
+    min_cooking_time = serializers.IntegerField(
+        min_value=MIN_COOKING_TIME,
+        max_value=MAX_COOKING_TIME,
+        required=False
+    )
+    max_cooking_time = serializers.IntegerField(
+        min_value=MIN_COOKING_TIME,
+        max_value=MAX_COOKING_TIME,
+        required=False
     )
-    image = Base64ImageField()
 
-    class Meta:
-        fields = (
-            'ingredients',
-            'tags',
-            'image',
-            'name',
-            'text',
-            'cooking_time',
-        )
-        model = Recipe
+    def validate(self, data):
+        """Проверяет, что передан хотя бы один ингредиент."""
+        if not data['ingredients'] and not data['required']:
+            raise serializers.ValidationError(
+                'Должен быть хотя бы один ингредиент.'
+            )
+        return data
 
-    def to_representation(self, instance):
-        """Возвращает данные в формате с вложенными сериализаторами."""
-        serializer = RecipeReadSerializer(
-            instance,
-            context={'request': self.context.get('request')}
-        )
-        return serializer.data
+
+class RecipeValidationMixin:
+    """Проверка тегов и ингредиентов рецепта."""
 
     def validate(self, data):
         """Проверяет ингредиенты и теги на корректность заполнения."""
@@ -356,6 +480,82 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         return data
 
+
+class IngredientImportSerializer(serializers.Serializer):
+    """Сериализатор ингредиента при массовом импорте рецептов."""
+
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField(
+        min_value=MIN_AMOUNT,
+        max_value=MAX_AMOUNT
+    )
+
+
+class ImportIdField(serializers.IntegerField):
+    """Поле идентификатора, принимающее число или объект с полем id."""
+
+    def to_internal_value(self, data):
+        """Извлекает идентификатор из объекта."""
+        if isinstance(data, dict):
+            data = data.get('id')
+        return super().to_internal_value(data)
+
+
+class RecipeImportSerializer(RecipeValidationMixin, serializers.Serializer):
+    """
+    Сериализатор рецепта при массовом импорте.
+
+    Не обращается к базе данных: существование тегов и ингредиентов
+    проверяется сразу для всей пачки рецептов.
+    """
+
+    tags = serializers.ListField(child=ImportIdField())
+    ingredients = IngredientImportSerializer(
+        many=True,
+        source='recipe_ingredients'
+    )
+    image = Base64ImageField(required=False, allow_null=True)
+    name = serializers.CharField(max_length=RECIPE_NAME_MAX_LENGTH)
+    text = serializers.CharField()
+    cooking_time = serializers.IntegerField(
+        min_value=MIN_COOKING_TIME,
+        max_value=MAX_COOKING_TIME
+    )
+
+
+class RecipeSerializer(RecipeValidationMixin, serializers.ModelSerializer):
+    """Сериализатор для создания рецептов."""
+
+    tags = serializers.PrimaryKeyRelatedField(
+        queryset=Tag.objects.all(),
+        many=True,
+    )
+    ingredients = IngredientCreateSerializer(
+        many=True,
+        source='recipe_ingredients'
+    )
+    image = Base64ImageField()
+
+    class Meta:
+        fields = (
+            'ingredients',
+            'tags',
+            'image',
+            'name',
+            'text',
+            'cooking_time',
+        )
+        model = Recipe
+
+    def to_representation(self, instance):
+        """Возвращает данные в формате с вложенными сериализаторами."""
+        serializer = RecipeReadSerializer(
+            instance,
+            context={'request': self.context.get('request')}
+        )
+        return serializer.data
+
+    @transaction.atomic
     def create(self, validated_data):
         """Создаёт новый рецепт."""
         tags = validated_data.pop('tags')
@@ -364,8 +564,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         validated_data['author'] = self.context.get('request').user
         recipe = Recipe.objects.create(**validated_data)
         create_or_update_recipe_tags_and_ingredients(tags, ingredients, recipe)
+        fan_out_recipe.delay(recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Обновляет существующий рецепт."""
         tags = validated_data.pop('tags')
@@ -373,10 +575,13 @@ class RecipeSerializer(serializers.ModelSerializer):
         create_or_update_recipe_tags_and_ingredients(
             tags, ingredients, instance
         )
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+        return instance
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(
+    SparseFieldsetMixin, serializers.ModelSerializer
+):
     """
     Сериализатор для работы с рецептами.
 
@@ -410,7 +615,15 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         model = Recipe
 
     def get_is_favorited(self, obj):
-        """Проверяет нахождение рецепта в избранном."""
+        """
+        Проверяет нахождение рецепта в избранном.
+
+        Если избранное заранее загружено в контекст 'favorited',
+        проверка выполняется без запроса к базе.
+        """
+        favorited = self.context.get('favorited')
+        if favorited is not None:
+            return obj.id in favorited
         request = self.context.get('request')
         user = request.user
         if user.is_authenticated and Favorite.objects.filter(
@@ -420,7 +633,15 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         return False
 
     def get_is_in_shopping_cart(self, obj):
-        """Проверяет нахождение рецепта в списке покупок."""
+        """
+        Проверяет нахождение рецепта в списке покупок.
+
+        Если список покупок заранее загружен в контекст
+        'in_shopping_cart', проверка выполняется без запроса к базе.
+        """
+        in_shopping_cart = self.context.get('in_shopping_cart')
+        if in_shopping_cart is not None:
+            return obj.id in in_shopping_cart
         request = self.context.get('request')
         user = request.user
         if user.is_authenticated and ShoppingCart.objects.filter(
@@ -430,7 +651,20 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         return False
 
 
-class FollowReadSerializer(serializers.ModelSerializer):
+class RecipeCompactSerializer(RecipeReadSerializer):
+    """
+    Сериализатор для работы с рецептами в компактном формате.
+
+    Передаёт автора и теги идентификаторами.
+    """
+
+    tags = serializers.PrimaryKeyRelatedField(read_only=True, many=True)
+    author = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class FollowReadSerializer(
+    SparseFieldsetMixin, serializers.ModelSerializer
+):
     """
     Сериализатор для работы с подписками.
 
@@ -465,9 +699,15 @@ class FollowReadSerializer(serializers.ModelSerializer):
         model = Follow
 
     def get_is_subscribed(self, obj):
-        """Проверяет текущую подписку на другого пользователя."""
+        """
+        Проверяет текущую подписку на другого пользователя.
+
+        Подписки текущего пользователя проверяются без запроса к базе.
+        """
         request = self.context.get('request')
         user = request.user
+        if obj.user_id == user.id:
+            return True
         if user.is_authenticated and Follow.objects.filter(
             user=user, following=obj.following
         ).exists():
@@ -478,21 +718,27 @@ class FollowReadSerializer(serializers.ModelSerializer):
         """
         Возвращает список рецептов пользователей в подписках.
 
-        С помощью параметра 'recipes_limit' можно регулировать
-        количество выводимых рецептов.
+        Рецепты заранее загружаются для всех авторов страницы
+        и передаются в контексте 'recipes'.
         """
-        return check_recipes_limit_param(
-            self,
-            obj.following,
-            RecipeMiniSerializer
-        )
+        recipes = self.context.get('recipes')
+        if recipes is None:
+            recipes = get_recipes_previews(
+                [obj.following_id],
+                get_recipes_limit(self.context.get('request'))
+            )
+        return RecipeMiniSerializer(
+            recipes.get(obj.following_id, []),
+            read_only=True,
+            many=True
+        ).data
 
 
 class FollowSerializer(serializers.ModelSerializer):
     """Сериализатор для работы с подписками пользователя."""
 
-    user = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all()
+    user = serializers.HiddenField(
+        default=serializers.CurrentUserDefault()
     )
     following = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all()
@@ -506,12 +752,24 @@ class FollowSerializer(serializers.ModelSerializer):
         model = Follow
 
     def to_representation(self, instance):
-        """Возвращает данные в формате с вложенным сериализатором."""
+        """
+        Возвращает данные в формате с вложенным сериализатором.
+
+        Использует уже загруженного автора, поэтому количество
+        и превью рецептов получаются двумя запросами.
+        """
+        request = self.context.get('request')
+        instance.recipes_count = Recipe.objects.filter(
+            author_id=instance.following_id
+        ).count()
         serializer = FollowReadSerializer(
-            Follow.objects.filter(following_id=instance.following_id).annotate(
-                recipes_count=Count('following__recipes')
-            ).first(),
-            context={'request': self.context.get('request')}
+            instance,
+            context={
+                'request': request,
+                'recipes': get_recipes_previews(
+                    [instance.following_id], get_recipes_limit(request)
+                ),
+            }
         )
         return serializer.data
 
@@ -519,10 +777,25 @@ class FollowSerializer(serializers.ModelSerializer):
         """Проверяет подписки на корректность заполнения."""
         following = data.get('following')
         user = data.get('user')
-        if Follow.objects.filter(
-            user=user, following=following
-        ).exists():
-            raise serializers.ValidationError(USER_ALREADY_SUBSCRIBE_MESSAGE)
         if following.id == user.id:
             raise serializers.ValidationError(SUBSCRIBE_TO_YOURSELF_MESSAGE)
         return data
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Создаёт подписку и заполняет ленту подписчика.
+
+        Повторная подписка отсекается ограничением уникальности
+        в базе данных.
+        """
+        follow = insert_on_conflict(Follow, **validated_data)
+        if follow is None:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    USER_ALREADY_SUBSCRIBE_MESSAGE
+                ]}
+            )
+        subscribe_timeline(follow)
+        register_count_change(Follow)
+        return follow
@@ -0,0 +1,286 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.serializers import RecipeReadSerializer, ShoppingListItemSerializer
+from api.throttling import (
+    CacheBucketStore,
+    LocalBucketStore,
+    ScopedRateThrottle,
+    bucket_stores
+)
+from recipes.models import Follow, Recipe, User
+from utils.functions import short_link_create
+
+
+class SubscriptionQueriesTests(TestCase):
+    """Проверяет число запросов к базе данных в подписках."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='reader', last_name='reader'
+        )
+        cls.authors = [
+            User.objects.create(
+                username=f'author{index}',
+                email=f'author{index}@example.com',
+                first_name='author', last_name='author'
+            )
+            for index in range(5)
+        ]
+        for author in cls.authors:
+            for index in range(4):
+                Recipe.objects.create(
+                    author=author, name=f'recipe {index}', text='text',
+                    cooking_time=10, image='recipes/image.png',
+                    short_link=short_link_create()
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_subscribe_queries(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                f'/api/users/{self.authors[0].id}/subscribe/'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recipes_count'], 4)
+
+    def test_subscriptions_queries(self):
+        Follow.objects.bulk_create(
+            Follow(user=self.user, following=author)
+            for author in self.authors
+        )
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                '/api/users/subscriptions/', {'recipes_limit': 2}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], len(self.authors))
+        self.assertEqual(
+            [len(item['recipes']) for item in response.data['results']],
+            [2] * len(self.authors)
+        )
+        self.assertEqual(
+            {item['recipes_count'] for item in response.data['results']},
+            {4}
+        )
+
+
+class FakeClock:
+    """Часы, которые идут только по команде теста."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@override_settings(
+    THROTTLE_STORE='local',
+    REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_RATES': {'export': '2/min', 'feed': '60/min'},
+    }
+)
+class ThrottleTests(SimpleTestCase):
+    """Проверяет ограничение частоты запросов корзиной токенов."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = LocalBucketStore()
+        self.store.clock = self.clock
+        patcher = mock.patch.dict(bucket_stores, {'local': self.store})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = AnonymousUser()
+
+    def consume(self):
+        return self.store.consume('key', 2, 1)
+
+    def check(self, scope):
+        throttle = ScopedRateThrottle()
+        allowed = throttle.allow_request(
+            self.request, SimpleNamespace(throttle_scope=scope)
+        )
+        return allowed, throttle.wait()
+
+    def test_bucket_refills_up_to_capacity(self):
+        self.assertEqual(self.consume(), (True, None))
+        self.assertEqual(self.consume(), (True, None))
+        self.assertEqual(self.consume(), (False, 1))
+        self.clock.advance(0.5)
+        self.assertEqual(self.consume(), (False, 0.5))
+        self.clock.advance(0.5)
+        self.assertEqual(self.consume(), (True, None))
+        self.clock.advance(100)
+        self.assertEqual(self.consume(), (True, None))
+        self.assertEqual(self.consume(), (True, None))
+        self.assertEqual(self.consume(), (False, 1))
+
+    def test_cache_store_refills_up_to_capacity(self):
+        cache.clear()
+        store = CacheBucketStore()
+        store.clock = self.clock
+        self.assertEqual(store.consume('key', 1, 1), (True, None))
+        self.assertEqual(store.consume('key', 1, 1), (False, 1))
+        self.clock.advance(100)
+        self.assertEqual(store.consume('key', 1, 1), (True, None))
+        self.assertEqual(store.consume('key', 1, 1), (False, 1))
+
+    def test_wait_returns_time_to_next_token(self):
+        self.assertEqual(self.check('export'), (True, None))
+        self.assertEqual(self.check('export'), (True, None))
+        self.assertEqual(self.check('export'), (False, 30))
+        self.clock.advance(20)
+        allowed, wait = self.check('export')
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 10)
+        self.clock.advance(10)
+        self.assertEqual(self.check('export'), (True, None))
+
+    def test_scopes_have_separate_rates(self):
+        for _ in range(2):
+            self.check('export')
+        self.assertFalse(self.check('export')[0])
+        for _ in range(60):
+            self.assertEqual(self.check('feed'), (True, None))
+        self.assertEqual(self.check('feed'), (False, 1))
+
+    def test_view_without_rate_is_not_limited(self):
+        for scope in (None, 'unknown'):
+            for _ in range(10):
+                self.assertEqual(self.check(scope), (True, None))
+        self.assertEqual(self.store.buckets, {})
+
+
+class ApiConfigTests(SimpleTestCase):
+    """Проверяет настройку хранилища корзин при запуске."""
+
+    @override_settings(
+        THROTTLE_STORE='cache',
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+    )
+    def test_cache_store_rejects_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            apps.get_app_config('api').ready()
+
+    @override_settings(
+        THROTTLE_STORE='cache',
+        SLOW_QUERY_LOG_ENABLED=False,
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache',
+        }}
+    )
+    def test_cache_store_accepts_shared_cache(self):
+        apps.get_app_config('api').ready()
+
+    @override_settings(
+        THROTTLE_STORE='local',
+        SLOW_QUERY_LOG_ENABLED=False,
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+    )
+    def test_local_store_accepts_local_cache(self):
+        apps.get_app_config('api').ready()
+
+
+class RecipeConditionalRetrieveTests(TestCase):
+    """Проверяет ETag и ответ 304 при получении рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='reader', last_name='reader'
+        )
+        author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='author', last_name='author'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author, name='recipe', text='text', cooking_time=10,
+            image='recipes/image.png', short_link=short_link_create()
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def get_etag(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_etag_changes_with_favorite_and_cart(self):
+        etags = {self.get_etag()}
+        self.client.post(f'{self.url}favorite/')
+        etags.add(self.get_etag())
+        self.client.post(f'{self.url}shopping_cart/')
+        etags.add(self.get_etag())
+        self.assertEqual(len(etags), 3)
+
+    def test_etag_changes_with_fields(self):
+        self.assertNotEqual(
+            self.get_etag(), self.get_etag(fields='id,name')
+        )
+        self.assertEqual(
+            self.get_etag(fields='id,name'), self.get_etag(fields='name,id')
+        )
+
+    def test_matching_etag_skips_serializer(self):
+        etag = self.get_etag()
+        with mock.patch.object(
+            RecipeReadSerializer, 'to_representation'
+        ) as to_representation:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        to_representation.assert_not_called()
+
+    def test_etag_changes_after_update(self):
+        etag = self.get_etag()
+        self.recipe.name = 'new name'
+        self.recipe.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['name'], 'new name')
+
+
+class ShoppingListTests(TestCase):
+    """Проверяет вывод сводного списка покупок."""
+
+    def test_amount_is_rounded_to_display_precision(self):
+        data = ShoppingListItemSerializer(
+            {'name': 'мука', 'amount': 0.1 + 0.2, 'measurement_unit': 'кг'}
+        ).data
+        self.assertEqual(data['amount'], Decimal('0.30'))
+
+    def test_benchmark_requires_user(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_shopping_list')
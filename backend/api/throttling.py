@@ -0,0 +1,194 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from utils.constants import (
+    THROTTLE_CACHE_KEY,
+    THROTTLE_DURATIONS,
+    THROTTLE_PRUNE_INTERVAL,
+    THROTTLE_PRUNE_SIZE
+)
+from utils.metrics import increment
+
+
+def parse_rate(rate):
+    """
+    Возвращает ёмкость корзины и скорость её пополнения в секунду.
+
+    Скорость задаётся в формате DRF: '100/min', '10/hour'.
+    """
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / THROTTLE_DURATIONS[period[0]]
+
+
+class LocalBucketStore:
+    """
+    Хранилище корзин токенов в памяти процесса.
+
+    Когда корзин становится больше THROTTLE_PRUNE_SIZE, полностью
+    пополнившиеся корзины удаляются, но не чаще раза
+    в THROTTLE_PRUNE_INTERVAL секунд.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.pruned_at = self.clock()
+
+    def prune(self, now):
+        """Удаляет корзины, которые успели полностью пополниться."""
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items()
+            if now < bucket[2]
+        }
+        self.pruned_at = now
+
+    def consume(self, key, capacity, refill_rate):
+        """
+        Забирает токен из корзины.
+
+        Возвращает признак успеха и время ожидания следующего токена.
+        """
+        now = self.clock()
+        with self.lock:
+            if (
+                len(self.buckets) > THROTTLE_PRUNE_SIZE
+                and now - self.pruned_at >= THROTTLE_PRUNE_INTERVAL
+            ):
+                self.prune(now)
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (
+                tokens, now, now + (capacity - tokens) / refill_rate
+            )
+        if allowed:
+            return True, None
+        return False, (1 - tokens) / refill_rate
+
+
+class CacheBucketStore(LocalBucketStore):
+    """
+    Хранилище корзин токенов в общем кеше Django.
+
+    Используется при запуске нескольких серверов и требует общего
+    для них кеша, например memcached: с LocMemCache сервер
+    не запускается. Одновременные запросы одного клиента на разных
+    серверах могут изредка пройти сверх лимита: чтение и запись
+    корзины не атомарны.
+    """
+
+    clock = staticmethod(time.time)
+
+    def consume(self, key, capacity, refill_rate):
+        now = self.clock()
+        cache_key = THROTTLE_CACHE_KEY.format(key)
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(
+            cache_key,
+            (tokens, now),
+            int((capacity - tokens) / refill_rate) + 1
+        )
+        if allowed:
+            return True, None
+        return False, (1 - tokens) / refill_rate
+
+
+bucket_stores = {
+    'local': LocalBucketStore(),
+    'cache': CacheBucketStore(),
+}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Базовый ограничитель частоты запросов на основе корзины токенов.
+
+    Скорость для области scope берётся из DEFAULT_THROTTLE_RATES,
+    хранилище корзин выбирается настройкой THROTTLE_STORE.
+    """
+
+    scope = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_ident_key(self, request, view):
+        """
+        Возвращает ключ клиента или None, если ограничение не нужно.
+
+        По умолчанию лимит считается для пользователя, а для анонимных
+        запросов - для IP-адреса.
+        """
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        """Проверяет, не превышен ли лимит запросов клиента."""
+        self.wait_time = None
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        allowed, self.wait_time = bucket_stores[
+            settings.THROTTLE_STORE
+        ].consume(f'{scope}:{ident}', capacity, refill_rate)
+        increment(
+            'throttle_decisions_total',
+            scope=scope,
+            decision='allowed' if allowed else 'throttled'
+        )
+        return allowed
+
+    def wait(self):
+        """Возвращает время до появления следующего токена."""
+        return self.wait_time
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Ограничивает частоту запросов с одного IP-адреса."""
+
+    scope = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    """Ограничивает частоту запросов авторизованного пользователя."""
+
+    scope = 'user'
+
+    def get_ident_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return request.user.pk
+
+
+class ScopedRateThrottle(TokenBucketThrottle):
+    """
+    Отдельный лимит для ресурсоёмких запросов.
+
+    Область задаётся атрибутом throttle_scope представления.
+    """
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
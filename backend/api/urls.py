@@ -4,6 +4,8 @@ from rest_framework import routers
 from api.views import (
     FoodgramUserViewSet,
     IngredientViewSet,
+    MetricsView,
+    ReadinessView,
     RecipeViewSet,
     TagViewSet
 )
@@ -17,4 +19,6 @@ router.register('users', FoodgramUserViewSet, basename='users')
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('health/ready/', ReadinessView.as_view(), name='readiness'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,21 +1,42 @@
-from django.db.models import Count, Sum
-from django.http import HttpResponse
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import DatabaseError, connection, transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
+from django.shortcuts import render
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import permissions, status, viewsets
+from rest_framework import permissions, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
 from api.filter import NameSearchFilter, RecipeFilter
-from api.permissions import UpdateDeletePermission
+from api.middleware import select_content_encoding
+from api.permissions import MetricsPermission, UpdateDeletePermission
 from api.serializers import (
     FavoriteSerializer,
     FollowReadSerializer,
     FollowSerializer,
     IngredientReadSerializer,
+    PantryRecipeSerializer,
+    PantrySearchSerializer,
     RecipeReadSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
+    ShoppingListItemSerializer,
+    SimilarRecipeSerializer,
     TagSerializer,
     UserAvatarSerializer
 )
@@ -24,27 +45,59 @@ from recipes.models import (
     Follow,
     Ingredient,
     Recipe,
+    RecipeChange,
     ShoppingCart,
     Tag,
     User
 )
+from utils.changes import decode_sync_token, encode_sync_token, get_changes
+from utils.compact import is_compact, serialize_compact
 from utils.constants import (
     AVATAR_PATH,
+    CHANGES_PATH,
     DOWNLOAD_SHOPPING_CART_PATH,
+    EXPORT_PATH,
     FAVORITE_PATH,
+    FEED_PATH,
+    IMPORT_PATH,
+    INVALID_IMPORT_MESSAGE,
+    MAX_PAGE_SIZE,
+    PANTRY_PATH,
+    RECIPE_IMPORT_MAX_ITEMS,
     RECIPE_LINK_PATH,
     RECIPE_NOT_IN_FAVORITE_MESSAGE,
     RECIPE_NOT_IN_SHOPPING_CART_MESSAGE,
     SHOPPING_CART_PATH,
+    SHOPPING_LIST_PATH,
+    SIMILAR_PATH,
+    SIMILAR_RECIPES_LIMIT,
     SUBSCRIBE_PATH,
     SUBSCRIPTIONS_PATH,
     USER_NOT_SUBSCRIBE_MESSAGE
 )
+from utils.export import gzip_stream, iter_recipes_ndjson, parse_updated_since
+from utils.feed import get_feed_page, parse_feed_limit
 from utils.functions import (
     add_object,
+    get_recipe_version,
+    get_recipes_context,
+    get_recipes_counts,
+    get_recipes_limit,
+    get_recipes_previews,
+    get_requested_fields,
     remove_object,
     shopping_cart_file_create
 )
+from utils.ingredient_search import search_ingredients
+from utils.metrics import render_metrics
+from utils.paginators import register_count_change
+from utils.pantry import pantry_index
+from utils.profiling import get_profile_path, list_profiles
+from utils.recipe_import import import_recipes
+from utils.shopping_list import get_shopping_list
+from utils.similarity import get_similar_recipes
+from utils.storage import delete_unreferenced
+from utils.warmup import ensure_warmed_up
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -56,6 +109,22 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список ингредиентов.
+
+        С параметром fuzzy поиск по названию выполняется по индексу
+        в памяти с учётом опечаток и раскладки клавиатуры.
+        """
+        name = request.query_params.get(NameSearchFilter.search_param)
+        if not name or request.query_params.get(
+            'fuzzy', ''
+        ).lower() not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        return Response(
+            self.get_serializer(search_ingredients(name), many=True).data
+        )
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """Набор представлений для работы с тегами."""
@@ -71,9 +140,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (UpdateDeletePermission,)
+    throttle_scope = None
     http_method_names = ['get', 'post', 'patch', 'delete']
     ordering_fields = ('-pub_date',)
 
+    def initial(self, request, *args, **kwargs):
+        """
+        Проверяет параметры 'fields' и 'omit' до изменения рецепта.
+
+        Иначе ошибка в них обнаружилась бы только при сериализации
+        ответа, когда изменения уже сохранены.
+        """
+        super().initial(request, *args, **kwargs)
+        if self.action in ('create', 'update', 'partial_update'):
+            get_requested_fields(request, RecipeReadSerializer.Meta.fields)
+
     def get_queryset(self):
         """
         Возвращает список рецептов.
@@ -81,18 +162,102 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Осуществляет предзагрузку связанных объектов из моделей User,
         Tag и Ingredient.
         """
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.get_read_queryset()
         return Recipe.objects.select_related(
             'author'
         ).prefetch_related(
             'tags', 'ingredients'
         )
 
+    def get_read_queryset(self):
+        """
+        Возвращает рецепты для чтения.
+
+        Связанные объекты загружаются только для полей, запрошенных
+        параметрами 'fields' и 'omit'.
+        """
+        fields = get_requested_fields(
+            self.request, RecipeReadSerializer.Meta.fields
+        )
+        recipes = Recipe.objects.all()
+        if 'author' in fields:
+            recipes = recipes.select_related('author')
+        if 'tags' in fields:
+            recipes = recipes.prefetch_related('tags')
+        if 'ingredients' in fields:
+            recipes = recipes.prefetch_related(
+                'recipe_ingredients__ingredients'
+            )
+        if 'text' not in fields:
+            recipes = recipes.defer('text')
+        return recipes
+
     def get_serializer_class(self):
         """Возвращает сериализатор в зависимости от метода запроса."""
         if self.request.method in permissions.SAFE_METHODS:
             return RecipeReadSerializer
         return RecipeSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список рецептов.
+
+        При параметре compact авторы и теги передаются
+        идентификаторами и выводятся один раз в разделе included.
+        """
+        recipes = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        if not is_compact(request):
+            serializer = RecipeReadSerializer(
+                recipes,
+                context=get_recipes_context(
+                    request, recipes,
+                    get_requested_fields(
+                        request, RecipeReadSerializer.Meta.fields
+                    )
+                ),
+                many=True
+            )
+            return self.get_paginated_response(serializer.data)
+        results, included = serialize_compact(recipes, request)
+        response = self.get_paginated_response(results)
+        response.data['included'] = included
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Возвращает рецепт с поддержкой условных запросов.
+
+        Если рецепт и его состояние для пользователя не изменились,
+        возвращает ответ 304 без сериализации рецепта. Last-Modified
+        передаётся только анонимным пользователям: для остальных
+        ответ зависит от избранного и списка покупок.
+        """
+        version = get_recipe_version(
+            kwargs[self.lookup_field], request.user,
+            get_requested_fields(request, RecipeReadSerializer.Meta.fields)
+        )
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag, updated_at = quote_etag(version[0]), version[1]
+        last_modified = (
+            None if request.user.is_authenticated
+            else int(updated_at.timestamp())
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
     @action(
         detail=True, methods=['post', 'delete'], url_path=SHOPPING_CART_PATH,
         permission_classes=(permissions.IsAuthenticated,)
@@ -111,16 +276,29 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(
         detail=False, methods=['get'], url_path=DOWNLOAD_SHOPPING_CART_PATH,
-        permission_classes=(permissions.IsAuthenticated,)
+        permission_classes=(permissions.IsAuthenticated,),
+        throttle_scope='shopping_list'
     )
     def download_shopping_cart(self, request):
         """Отвечает за выгрузку списка покупок."""
-        ingredients = Ingredient.objects.filter(
-            recipes__shopping_carts__user=self.request.user
-        ).annotate(total_amount=Sum('recipe_ingredients__amount'))
-        text_buffer = shopping_cart_file_create(ingredients)
+        text_buffer = shopping_cart_file_create(
+            get_shopping_list(request.user)
+        )
         return HttpResponse(text_buffer.getvalue(), content_type='text/plain')
 
+    @action(
+        detail=False, methods=['get'], url_path=SHOPPING_LIST_PATH,
+        permission_classes=(permissions.IsAuthenticated,),
+        throttle_scope='shopping_list'
+    )
+    def shopping_list(self, request):
+        """Возвращает сводный список покупок в формате JSON."""
+        serializer = ShoppingListItemSerializer(
+            get_shopping_list(request.user),
+            many=True
+        )
+        return Response(serializer.data)
+
     @action(
         detail=True, methods=['post', 'delete'], url_path=FAVORITE_PATH,
         permission_classes=(permissions.IsAuthenticated,)
@@ -151,18 +329,195 @@ class RecipeViewSet(viewsets.ModelViewSet):
             {'short-link': short_link}
         )
 
+    @action(
+        detail=False, methods=['get'], url_path=CHANGES_PATH,
+        permission_classes=(permissions.AllowAny,),
+        throttle_scope='changes'
+    )
+    def changes(self, request):
+        """
+        Возвращает рецепты, изменённые после выдачи токена синхронизации.
+
+        Изменения выдаются в порядке фиксации. Для удалённых рецептов
+        возвращается только идентификатор. Токен из ответа передаётся
+        в параметре since следующего запроса.
+        """
+        changes, position, has_more = get_changes(
+            decode_sync_token(request.query_params.get('since')),
+            parse_feed_limit(
+                request.query_params.get('limit', str(MAX_PAGE_SIZE))
+            )
+        )
+        recipes = self.get_read_queryset().in_bulk([
+            recipe_id for recipe_id, change in changes.items()
+            if change != RecipeChange.DELETED
+        ])
+        serializer = RecipeReadSerializer(
+            recipes.values(),
+            context={'request': request},
+            many=True
+        )
+        serialized = dict(zip(recipes, serializer.data))
+        results = []
+        for recipe_id, change in changes.items():
+            recipe = serialized.get(recipe_id)
+            results.append({
+                'id': recipe_id,
+                'action': RecipeChange.DELETED if recipe is None else change,
+                'recipe': recipe,
+            })
+        return Response({
+            'sync_token': encode_sync_token(position),
+            'has_more': has_more,
+            'results': results,
+        })
+
+    @action(
+        detail=False, methods=['get'], url_path=EXPORT_PATH,
+        permission_classes=(permissions.IsAuthenticated,),
+        throttle_scope='export'
+    )
+    def export(self, request):
+        """
+        Выгружает каталог рецептов потоком в формате NDJSON.
+
+        Параметр updated_since ограничивает выгрузку рецептами,
+        изменёнными начиная с указанного момента. Если клиент
+        поддерживает gzip, поток сжимается на лету.
+        """
+        lines = iter_recipes_ndjson(
+            parse_updated_since(request.query_params.get('updated_since'))
+        )
+        compress = select_content_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), ('gzip',)
+        ) == 'gzip'
+        response = StreamingHttpResponse(
+            gzip_stream(lines) if compress else lines,
+            content_type='application/x-ndjson'
+        )
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @action(
+        detail=False, methods=['post'], url_path=IMPORT_PATH,
+        permission_classes=(permissions.IsAuthenticated,),
+        throttle_scope='import'
+    )
+    def import_recipes(self, request):
+        """
+        Создаёт рецепты пользователя из переданного списка.
+
+        Корректные рецепты сохраняются, для остальных возвращаются
+        ошибки с номером рецепта в списке.
+        """
+        if (
+            not isinstance(request.data, list)
+            or len(request.data) > RECIPE_IMPORT_MAX_ITEMS
+        ):
+            raise serializers.ValidationError(
+                INVALID_IMPORT_MESSAGE.format(RECIPE_IMPORT_MAX_ITEMS)
+            )
+        created, errors = import_recipes(request.user, request.data)
+        return Response(
+            {
+                'created': [
+                    {'index': index, 'id': recipe_id}
+                    for index, recipe_id in sorted(created.items())
+                ],
+                'errors': [
+                    {'index': index, 'errors': item_errors}
+                    for index, item_errors in sorted(errors.items())
+                ],
+            },
+            status=(
+                status.HTTP_201_CREATED if created
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+    @action(
+        detail=False, methods=['get'], url_path=PANTRY_PATH,
+        permission_classes=(permissions.AllowAny,),
+        throttle_scope='search'
+    )
+    def pantry(self, request):
+        """
+        Возвращает рецепты, которые можно приготовить из ингредиентов.
+
+        Рецепты упорядочены по количеству недостающих ингредиентов.
+        """
+        params = PantrySearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        recipe_ids, matched, missing = pantry_index.search(
+            data['ingredients'],
+            required=data['required'],
+            excluded=data['excluded'],
+            tags=list(
+                Tag.objects.filter(slug__in=data['tags']).values_list(
+                    'id', flat=True
+                )
+            ) if data['tags'] else (),
+            min_cooking_time=data.get('min_cooking_time'),
+            max_cooking_time=data.get('max_cooking_time')
+        )
+        ranking = {
+            recipe_id: (matched_count, missing_count)
+            for recipe_id, matched_count, missing_count in zip(
+                recipe_ids.tolist(), matched.tolist(), missing.tolist()
+            )
+        }
+        page = self.paginate_queryset(list(ranking))
+        recipes = Recipe.objects.in_bulk(page)
+        results = []
+        for recipe_id in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_count, recipe.missing_count = ranking[recipe_id]
+            recipe.coverage = round(
+                recipe.matched_count
+                / (recipe.matched_count + recipe.missing_count), 3
+            )
+            results.append(recipe)
+        serializer = PantryRecipeSerializer(
+            results,
+            context={'request': request},
+            many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True, methods=['get'], url_path=SIMILAR_PATH,
+        permission_classes=(permissions.AllowAny,),
+        throttle_scope='search'
+    )
+    def similar(self, request, pk):
+        """Возвращает рецепты с похожим набором ингредиентов."""
+        recipe = self.get_object()
+        serializer = SimilarRecipeSerializer(
+            get_similar_recipes(recipe, SIMILAR_RECIPES_LIMIT),
+            context={'request': request},
+            many=True
+        )
+        return Response(serializer.data)
+
 
 class FoodgramUserViewSet(UserViewSet):
     """Представление для работы с учётными записями пользователей."""
 
     queryset = User.objects.all()
+    throttle_scope = None
     http_method_names = ['get', 'post', 'put', 'delete']
     filter_backends = (DjangoFilterBackend,)
 
     def get_permissions(self):
         """Возвращает разрешение в зависимости от action метода."""
         if self.action in [
-            'me', 'set_password', 'subscribe', 'subscriptions', 'avatar'
+            'me', 'set_password', 'subscribe', 'subscriptions', 'avatar',
+            'feed'
         ]:
             permission_classes = (permissions.IsAuthenticated,)
         else:
@@ -170,6 +525,12 @@ class FoodgramUserViewSet(UserViewSet):
 
         return [permission() for permission in permission_classes]
 
+    def initial(self, request, *args, **kwargs):
+        """Проверяет параметры 'fields' и 'omit' до создания подписки."""
+        super().initial(request, *args, **kwargs)
+        if self.action == 'subscribe' and request.method == 'POST':
+            get_requested_fields(request, FollowReadSerializer.Meta.fields)
+
     @action(
         detail=True, methods=['post', 'delete'], url_path=SUBSCRIBE_PATH
     )
@@ -180,7 +541,6 @@ class FoodgramUserViewSet(UserViewSet):
             serializer = FollowSerializer(
                 context={'request': request},
                 data={
-                    'user': user.id,
                     'following': id,
                 }
             )
@@ -190,34 +550,89 @@ class FoodgramUserViewSet(UserViewSet):
                 data=serializer.data,
                 status=status.HTTP_201_CREATED
             )
-        number_of_deleted_object, *deleted_object = Follow.objects.filter(
-            user=user, following_id=id
-        ).delete()
-        if number_of_deleted_object == 0:
-            return Response(
-                USER_NOT_SUBSCRIBE_MESSAGE,
-                status.HTTP_400_BAD_REQUEST
-            )
+        with transaction.atomic():
+            number_of_deleted_object, *deleted_object = Follow.objects.filter(
+                user=user, following_id=id
+            ).delete()
+            if number_of_deleted_object == 0:
+                return Response(
+                    USER_NOT_SUBSCRIBE_MESSAGE,
+                    status.HTTP_400_BAD_REQUEST
+                )
+            register_count_change(Follow)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
-        detail=False, methods=['get'], url_path=SUBSCRIPTIONS_PATH
+        detail=False, methods=['get'], url_path=SUBSCRIPTIONS_PATH,
+        throttle_scope='subscriptions'
     )
     def subscriptions(self, request):
         """
         Возвращает пользователей, на которых подписан текущий пользователь.
         """
-        followings = self.paginate_queryset(
-            Follow.objects.filter(
-                user=request.user
-            ).annotate(recipes_count=Count('following__recipes')))
+        fields = get_requested_fields(
+            request, FollowReadSerializer.Meta.fields
+        )
+        followings = Follow.objects.filter(
+            user=request.user
+        ).select_related('following').order_by('id')
+        followings = self.paginate_queryset(followings)
+        if 'recipes_count' in fields:
+            counts = get_recipes_counts(
+                [follow.following_id for follow in followings]
+            )
+            for follow in followings:
+                follow.recipes_count = counts[follow.following_id]
+        recipes = {}
+        if 'recipes' in fields:
+            recipes = get_recipes_previews(
+                [follow.following_id for follow in followings],
+                get_recipes_limit(request)
+            )
         serializer = FollowReadSerializer(
             followings,
-            context={'request': request},
+            context={'request': request, 'recipes': recipes},
             many=True
         )
         return self.get_paginated_response(data=serializer.data)
 
+    @action(
+        detail=False, methods=['get'], url_path=FEED_PATH,
+        throttle_scope='feed'
+    )
+    def feed(self, request):
+        """
+        Возвращает ленту рецептов авторов, на которых подписан пользователь.
+
+        Постраничный вывод осуществляется по курсору 'cursor'.
+        """
+        recipes, next_cursor = get_feed_page(
+            request.user,
+            request.query_params.get('cursor'),
+            parse_feed_limit(request.query_params.get('limit'))
+        )
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), 'cursor', next_cursor
+            )
+        if is_compact(request):
+            results, included = serialize_compact(recipes, request)
+            return Response({
+                'next': next_link, 'results': results, 'included': included
+            })
+        serializer = RecipeReadSerializer(
+            recipes,
+            context=get_recipes_context(
+                request, recipes,
+                get_requested_fields(
+                    request, RecipeReadSerializer.Meta.fields
+                )
+            ),
+            many=True
+        )
+        return Response({'next': next_link, 'results': serializer.data})
+
     @action(
         detail=False, methods=['put', 'delete'], url_path=AVATAR_PATH
     )
@@ -233,5 +648,67 @@ class FoodgramUserViewSet(UserViewSet):
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
-        user.avatar.delete()
+        name = user.avatar.name
+        user.avatar = None
+        user.save(update_fields=('avatar',))
+        delete_unreferenced((name,))
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ReadinessView(APIView):
+    """
+    Проверка готовности сервера к приёму запросов.
+
+    Сервер готов, если прогрев завершён и база данных доступна.
+    Если сервер не прогрел приложение заранее, прогрев выполняется
+    при первой проверке.
+    """
+
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = ()
+
+    def get(self, request):
+        """Возвращает состояние готовности."""
+        ensure_warmed_up()
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            return Response(
+                {'status': 'database_unavailable'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response({'status': 'ready'})
+
+
+class MetricsView(APIView):
+    """Метрики приложения в формате Prometheus."""
+
+    permission_classes = (MetricsPermission,)
+    throttle_classes = ()
+
+    def get(self, request):
+        """Возвращает значения счётчиков."""
+        return HttpResponse(
+            render_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+@staff_member_required
+def request_profiles(request):
+    """Выводит в Админ-зоне список сохранённых профилей запросов."""
+    return render(request, 'admin/request_profiles.html', {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'profiles': list_profiles(),
+    })
+
+
+@staff_member_required
+def request_profile_download(request, file_name):
+    """Отдаёт файл профиля запроса."""
+    path = get_profile_path(file_name)
+    if path is None:
+        raise Http404
+    return FileResponse(path.open('rb'), as_attachment=True)
@@ -1,7 +1,14 @@
 import os
 from pathlib import Path
 
-from utils.constants import PAGE_SIZE
+from utils.constants import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_LENGTH,
+    PAGE_SIZE,
+    UPLOAD_MAX_MEMORY_SIZE,
+    UPLOAD_MAX_SIZE
+)
 
 AUTH_USER_MODEL = 'users.FoodgramUser'
 
@@ -28,14 +35,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
+    'tasks.apps.TasksConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.QuerySourceMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,6 +83,22 @@ DATABASES = {
     }
 }
 
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,6 +133,13 @@ STATIC_ROOT = BASE_DIR / 'collected_static/static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+DEFAULT_FILE_STORAGE = 'utils.storage.HashedMediaStorage'
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(
+    os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', UPLOAD_MAX_MEMORY_SIZE)
+)
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', UPLOAD_MAX_SIZE))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -120,6 +154,80 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'api.parsers.MultiPartJSONParser',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.IPRateThrottle',
+        'api.throttling.UserRateThrottle',
+        'api.throttling.ScopedRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': os.getenv('THROTTLE_RATE_IP', '600/min'),
+        'user': os.getenv('THROTTLE_RATE_USER', '300/min'),
+        'changes': os.getenv('THROTTLE_RATE_CHANGES', '60/min'),
+        'export': os.getenv('THROTTLE_RATE_EXPORT', '5/hour'),
+        'feed': os.getenv('THROTTLE_RATE_FEED', '60/min'),
+        'import': os.getenv('THROTTLE_RATE_IMPORT', '20/hour'),
+        'search': os.getenv('THROTTLE_RATE_SEARCH', '60/min'),
+        'shopping_list': os.getenv('THROTTLE_RATE_SHOPPING_LIST', '10/min'),
+        'subscriptions': os.getenv('THROTTLE_RATE_SUBSCRIPTIONS', '60/min'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+}
+
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'local')
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+COMPRESSION_MIN_LENGTH = int(
+    os.getenv('COMPRESSION_MIN_LENGTH', COMPRESSION_MIN_LENGTH)
+)
+COMPRESSION_GZIP_LEVEL = int(
+    os.getenv('COMPRESSION_GZIP_LEVEL', COMPRESSION_GZIP_LEVEL)
+)
+COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv('COMPRESSION_BROTLI_QUALITY', COMPRESSION_BROTLI_QUALITY)
+)
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', False) == 'True'
+PROFILING_PROFILER = os.getenv('PROFILING_PROFILER', 'cprofile')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = Path(os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+PROFILING_RETENTION_DAYS = int(os.getenv('PROFILING_RETENTION_DAYS', 7))
+
+SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', False) == 'True'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0))
+SLOW_QUERY_LOG = Path(
+    os.getenv('SLOW_QUERY_LOG', BASE_DIR / 'logs' / 'slow_queries.jsonl')
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(
+    os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 50 * 1024 * 1024)
+)
+
+TASKS_EAGER = os.getenv('TASKS_EAGER', False) == 'True'
+
+TASKS_SCHEDULE = {
+    'purge_finished_tasks': (
+        '0 4 * * *', 'utils.tasks.purge_finished_tasks'
+    ),
+    'clear_expired_sessions': (
+        '30 4 * * *', 'utils.tasks.clear_expired_sessions'
+    ),
+    'compact_recipe_changes': (
+        '0 5 * * *', 'utils.changes.compact_recipe_changes'
+    ),
 }
 
 DJOSER = {
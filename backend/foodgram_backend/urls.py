@@ -1,9 +1,16 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from api.views import request_profile_download, request_profiles
 from utils.functions import redirection
 
 urlpatterns = [
+    path('admin/profiles/', request_profiles, name='request_profiles'),
+    path(
+        'admin/profiles/<str:file_name>',
+        request_profile_download,
+        name='request_profile_download'
+    ),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('s/<str:short_link>', redirection),
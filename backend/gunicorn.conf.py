@@ -0,0 +1,73 @@
+"""
+Настройки сервера gunicorn.
+
+Приложение загружается и прогревается в главном процессе до запуска
+обработчиков, которые получают его при fork без повторного импорта.
+"""
+
+import gc
+import multiprocessing
+import os
+import random
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:9080')
+workers = int(
+    os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR') or None
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-') or None
+
+
+def on_starting(server):
+    """
+    Предупреждает о кеше, не общем для обработчиков.
+
+    Без CACHE_LOCATION каждый процесс использует свой кеш в памяти:
+    версии индексов, подсчёты и ограничения частоты запросов
+    не согласуются между обработчиками.
+    """
+    if workers > 1 and not os.getenv('CACHE_LOCATION'):
+        server.log.warning(
+            'CACHE_LOCATION не задан: %s обработчиков используют '
+            'раздельные кеши в памяти', workers
+        )
+
+
+def when_ready(server):
+    """
+    Прогревает приложение в главном процессе.
+
+    Объекты, созданные до fork, переводятся в постоянное поколение
+    сборщика мусора, чтобы их страницы памяти оставались общими.
+    """
+    if not preload_app:
+        return
+    from utils.warmup import warm_up
+
+    warm_up()
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Сбрасывает состояние, унаследованное от главного процесса."""
+    random.seed()
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    """Прогревает приложение в обработчике, если оно не предзагружено."""
+    if preload_app:
+        return
+    from utils.warmup import warm_up
+
+    warm_up()
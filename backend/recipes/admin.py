@@ -1,18 +1,32 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from recipes.models import (
     Favorite,
     Follow,
     Ingredient,
     Recipe,
+    RecipeChange,
     RecipeIngredients,
     RecipeTags,
     ShoppingCart,
     Tag
 )
+from utils.paginators import EstimatedCountPaginator
 
 
-class UserRecipeAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Общий класс для представления больших таблиц в Админ-зоне.
+
+    Отключает точный подсчёт объектов в списке.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class UserRecipeAdmin(LargeTableAdmin):
     """
     Общий класс для представления в Админ-зоне.
 
@@ -21,6 +35,7 @@ class UserRecipeAdmin(admin.ModelAdmin):
 
     list_display = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(Ingredient)
@@ -35,16 +50,18 @@ class RecipeIngredientsInline(admin.TabularInline):
     """Выбор Ингредиентов для Рецептов."""
 
     model = RecipeIngredients
+    autocomplete_fields = ('ingredients',)
 
 
 class RecipeTagsInline(admin.TabularInline):
     """Выбор Тегов для Рецептов."""
 
     model = RecipeTags
+    autocomplete_fields = ('tags',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     """Класс для представления рецептов в Админ-зоне."""
 
     readonly_fields = ('in_favorite_count',)
@@ -53,24 +70,28 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     list_filter = ('tags',)
     search_fields = ('name', 'author__first_name', 'author__last_name')
+    autocomplete_fields = ('author',)
     inlines = (RecipeIngredientsInline, RecipeTagsInline)
 
-    @admin.display(description='Количество добавлений в избранное.')
+    @admin.display(
+        description='Количество добавлений в избранное.',
+        ordering='favorites_count'
+    )
     def in_favorite_count(self, obj):
         """Возвращает количество добавлений рецепта в избранное."""
-        return Favorite.objects.filter(recipe_id=obj.id).count()
+        return obj.favorites_count
 
     def get_queryset(self, request):
         """
         Возвращает список рецептов.
 
-        Осуществляет предзагрузку связанных объектов из моделей User,
-        Tag и Ingredient.
+        Осуществляет предзагрузку автора и подсчёт добавлений в избранное
+        одним запросом.
         """
         return super().get_queryset(request).select_related(
             'author'
-        ).prefetch_related(
-            'tags', 'ingredients'
+        ).annotate(
+            favorites_count=Count('favorites', distinct=True)
         )
 
 
@@ -98,11 +119,12 @@ class FavoriteAdmin(UserRecipeAdmin):
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     """Класс для представления подписок в Админ-зоне."""
 
     list_display = ('user', 'following')
     search_fields = ('user__first_name', 'following__first_name')
+    autocomplete_fields = ('user', 'following')
 
     def get_queryset(self, request):
         """
@@ -128,3 +150,12 @@ class ShoppingCartAdmin(UserRecipeAdmin):
         return super().get_queryset(request).select_related(
             'user', 'recipe'
         )
+
+
+@admin.register(RecipeChange)
+class RecipeChangeAdmin(LargeTableAdmin):
+    """Класс для представления журнала изменений рецептов в Админ-зоне."""
+
+    list_display = ('id', 'recipe_id', 'action', 'changed_at')
+    list_filter = ('action',)
+    search_fields = ('=recipe_id',)
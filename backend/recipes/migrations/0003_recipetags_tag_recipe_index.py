@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipetags',
+            index=models.Index(fields=['tags', 'recipe'], name='recipe_tags_tag_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-19 10:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_recipe_changes(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeChange = apps.get_model('recipes', 'RecipeChange')
+    RecipeChange.objects.bulk_create(
+        (
+            RecipeChange(
+                recipe_id=recipe_id, action='created', changed_at=updated_at
+            )
+            for recipe_id, updated_at in Recipe.objects.order_by(
+                'id'
+            ).values_list('id', 'updated_at').iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(verbose_name='Рецепт')),
+                ('action', models.CharField(choices=[('created', 'Создан'), ('updated', 'Изменён'), ('deleted', 'Удалён')], max_length=16, verbose_name='Действие')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата и время изменения')),
+            ],
+            options={
+                'verbose_name': 'изменение рецепта',
+                'verbose_name_plural': 'Журнал изменений рецептов',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipechange',
+            index=models.Index(fields=['recipe_id', '-id'], name='recipe_change_recipe_idx'),
+        ),
+        migrations.RunPython(fill_recipe_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.3 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipechange',
+            name='txid',
+            field=models.BigIntegerField(default=0, verbose_name='Номер транзакции'),
+        ),
+        migrations.AddIndex(
+            model_name='recipechange',
+            index=models.Index(fields=['txid', 'id'], name='recipe_change_txid_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils.timezone import now
 
 from utils.constants import (
     INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH,
@@ -11,6 +12,7 @@ from utils.constants import (
     MAX_COOKING_TIME,
     MIN_AMOUNT,
     MIN_COOKING_TIME,
+    RECIPE_CHANGE_ACTION_MAX_LENGTH,
     RECIPE_NAME_MAX_LENGTH,
     TAG_MAX_LENGTH
 )
@@ -33,6 +35,12 @@ class UserRecipeModel(models.Model):
 
     class Meta:
         abstract = True
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_%(class)s_user_recipe',
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
@@ -178,6 +186,12 @@ class RecipeTags(models.Model):
                 name='unique_tag_for_recipe',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('tags', 'recipe'),
+                name='recipe_tags_tag_recipe_idx',
+            ),
+        )
         verbose_name = 'тег рецепта'
         verbose_name_plural = 'Теги рецепта'
 
@@ -229,10 +243,24 @@ class Recipe(models.Model):
         'Дата и время публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата и время изменения',
+        auto_now=True
+    )
 
     class Meta:
         default_related_name = 'recipes'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('updated_at',),
+                name='recipe_updated_at_idx',
+            ),
+        )
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -252,3 +280,139 @@ class ShoppingCart(UserRecipeModel):
         default_related_name = 'shopping_carts'
         verbose_name = 'список покупок'
         verbose_name_plural = 'Списки покупок'
+
+
+class TimelineEntry(models.Model):
+    """
+    Класс для представления записи в ленте пользователя.
+
+    Запись создаётся для каждого подписчика автора при публикации рецепта.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        verbose_name='Пользователь', related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        verbose_name='Автор', related_name='+'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        verbose_name='Рецепт', related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_timeline_user_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
+
+
+class RecipeSignature(models.Model):
+    """
+    Класс для представления MinHash-сигнатуры рецепта.
+
+    Сигнатура строится по множеству ингредиентов рецепта.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE, primary_key=True,
+        verbose_name='Рецепт', related_name='signature'
+    )
+    signature = models.BinaryField('Сигнатура')
+
+    class Meta:
+        verbose_name = 'сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+
+    def __str__(self):
+        return str(self.recipe)
+
+
+class RecipeBand(models.Model):
+    """Класс для представления корзины LSH-индекса рецептов."""
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        verbose_name='Рецепт', related_name='bands'
+    )
+    band = models.PositiveSmallIntegerField('Номер полосы')
+    bucket = models.BigIntegerField('Хеш полосы')
+
+    class Meta:
+        verbose_name = 'полоса LSH-индекса'
+        verbose_name_plural = 'Полосы LSH-индекса'
+        indexes = (
+            models.Index(
+                fields=('band', 'bucket'),
+                name='recipe_band_bucket_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} - {self.band}'
+
+
+class RecipeChange(models.Model):
+    """
+    Класс для представления записи журнала изменений рецептов.
+
+    Порядок изменений для синхронизации клиентов задаётся номером
+    транзакции, записавшей изменение, и идентификатором записи.
+    Записи об удалении сохраняются после удаления рецепта.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = (
+        (CREATED, 'Создан'),
+        (UPDATED, 'Изменён'),
+        (DELETED, 'Удалён'),
+    )
+
+    recipe_id = models.BigIntegerField('Рецепт')
+    action = models.CharField(
+        'Действие',
+        max_length=RECIPE_CHANGE_ACTION_MAX_LENGTH,
+        choices=ACTION_CHOICES
+    )
+    changed_at = models.DateTimeField('Дата и время изменения', default=now)
+    txid = models.BigIntegerField('Номер транзакции', default=0)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('recipe_id', '-id'),
+                name='recipe_change_recipe_idx',
+            ),
+            models.Index(
+                fields=('txid', 'id'),
+                name='recipe_change_txid_idx',
+            ),
+        )
+        verbose_name = 'изменение рецепта'
+        verbose_name_plural = 'Журнал изменений рецептов'
+
+    def __str__(self):
+        return f'{self.recipe_id} - {self.get_action_display()}'
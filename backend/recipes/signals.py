@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from recipes.models import (
+    Follow,
+    Ingredient,
+    Recipe,
+    RecipeChange,
+    RecipeIngredients,
+    RecipeTags,
+    Tag,
+    User
+)
+from utils.changes import (
+    record_recipe_changes,
+    touch_catalog_recipes,
+    touch_recipes
+)
+from utils.feed import subscribe_timeline, unsubscribe_timeline
+from utils.ingredient_search import register_catalog_change
+from utils.paginators import register_count_change
+from utils.pantry import register_recipe_change
+from utils.similarity import schedule_signature_update
+
+CATALOG_RELATIONS = {Tag: 'tags', Ingredient: 'ingredients'}
+DISPLAYED_FIELDS = {
+    Tag: ('name', 'slug'),
+    Ingredient: ('name', 'measurement_unit'),
+}
+
+
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Ingredient)
+def check_catalog_changes(sender, instance, **kwargs):
+    """
+    Проверяет, изменились ли поля, выводимые в рецептах.
+
+    Новые объекты ещё не используются рецептами, поэтому
+    для них изменений нет.
+    """
+    fields = DISPLAYED_FIELDS[sender]
+    old = None
+    if instance.pk is not None:
+        old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance.displayed_fields_changed = old is not None and any(
+        old[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_catalog_recipes_on_save(sender, instance, **kwargs):
+    """
+    Ставит в очередь обновление рецептов при изменении тега или ингредиента.
+
+    Рецепты обновляются фоновой задачей пачками и только если
+    изменились поля, выводимые в рецептах.
+    """
+    if not getattr(instance, 'displayed_fields_changed', False):
+        return
+    relation, object_id = CATALOG_RELATIONS[sender], instance.id
+    transaction.on_commit(
+        lambda: touch_catalog_recipes.delay(relation, object_id)
+    )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_catalog_recipes_on_delete(sender, instance, **kwargs):
+    """
+    Ставит в очередь обновление рецептов при удалении тега или ингредиента.
+
+    Рецепты запоминаются до каскадного удаления связей, а обновляются
+    фоновой задачей после фиксации транзакции.
+    """
+    recipe_ids = list(Recipe.objects.filter(
+        **{CATALOG_RELATIONS[sender]: instance}
+    ).order_by('id').values_list('id', flat=True).distinct())
+    if recipe_ids:
+        transaction.on_commit(lambda: touch_recipes.delay(recipe_ids))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def refresh_ingredient_index(sender, instance, **kwargs):
+    """Сообщает индексу поиска ингредиентов об изменении каталога."""
+    register_catalog_change()
+
+
+@receiver(post_save, sender=Recipe)
+def record_recipe_save(sender, instance, created, **kwargs):
+    """Записывает в журнал создание или изменение рецепта."""
+    record_recipe_changes(
+        (instance.id,),
+        RecipeChange.CREATED if created else RecipeChange.UPDATED
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def record_recipe_delete(sender, instance, **kwargs):
+    """Записывает в журнал удаление рецепта."""
+    record_recipe_changes((instance.id,), RecipeChange.DELETED)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def refresh_recipe_indexes(sender, instance, **kwargs):
+    """
+    Сообщает индексам в памяти процессов об изменении рецепта.
+
+    Срабатывает и при изменениях из админки, и при каскадном
+    удалении рецептов вместе с автором.
+    """
+    register_recipe_change(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_signature(sender, instance, **kwargs):
+    """Ставит в очередь пересчёт сигнатуры сохранённого рецепта."""
+    schedule_signature_update(instance.id)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+def refresh_ingredients_signature(sender, instance, **kwargs):
+    """Ставит в очередь пересчёт сигнатуры при изменении ингредиентов."""
+    schedule_signature_update(instance.recipe_id)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+@receiver(post_save, sender=RecipeTags)
+@receiver(post_delete, sender=RecipeTags)
+def refresh_recipe_relation_indexes(sender, instance, **kwargs):
+    """
+    Сообщает индексам об изменении ингредиентов или тегов рецепта.
+
+    Срабатывает и для строк, удаляемых каскадно вместе
+    с ингредиентом или тегом каталога.
+    """
+    register_recipe_change(instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def reset_recipe_counts(sender, instance, **kwargs):
+    """Сбрасывает закешированные подсчёты рецептов."""
+    register_count_change(Recipe, RecipeTags)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_counts(sender, instance, **kwargs):
+    """Сбрасывает закешированные подсчёты пользователей."""
+    register_count_change(User)
+
+
+@receiver(post_save, sender=Follow)
+def follow_save(sender, instance, created, **kwargs):
+    """Обновляет счётчик подписчиков и ленту при создании подписки."""
+    if created:
+        subscribe_timeline(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_delete(sender, instance, **kwargs):
+    """Обновляет счётчик подписчиков и ленту при удалении подписки."""
+    unsubscribe_timeline(instance)
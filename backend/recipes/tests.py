@@ -0,0 +1,260 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeChange,
+    RecipeIngredients,
+    RecipeSignature,
+    User
+)
+from tasks.models import Task
+from utils.changes import decode_sync_token, encode_sync_token, get_changes
+from utils.functions import short_link_create
+from utils.pantry import PantryIndex
+from utils.similarity import get_similar_recipes, load_signatures
+
+
+class PantrySignalsTests(TestCase):
+    """Проверяет обновление индекса по имеющимся ингредиентам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='author', last_name='author'
+        )
+        cls.milk, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('молоко', 'мука')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.index = PantryIndex()
+
+    def create_recipe(self, author, ingredients):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=author, name='recipe', text='text', cooking_time=10,
+                image='recipes/image.png', short_link=short_link_create()
+            )
+            for ingredient in ingredients:
+                RecipeIngredients.objects.create(
+                    recipe=recipe, ingredients=ingredient, amount=100
+                )
+        return recipe
+
+    def search(self, ingredient):
+        return self.index.search([ingredient.id])[0].tolist()
+
+    def test_admin_style_save_updates_index(self):
+        recipe = self.create_recipe(self.author, (self.milk,))
+        self.index.build()
+        self.assertEqual(self.search(self.flour), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredients.objects.create(
+                recipe=recipe, ingredients=self.flour, amount=200
+            )
+            RecipeIngredients.objects.filter(
+                recipe=recipe, ingredients=self.milk
+            ).delete()
+        self.assertEqual(self.search(self.flour), [recipe.id])
+        self.assertEqual(self.search(self.milk), [])
+
+    def test_cascade_delete_updates_index(self):
+        author = User.objects.create(
+            username='removed', email='removed@example.com',
+            first_name='removed', last_name='removed'
+        )
+        recipe = self.create_recipe(author, (self.milk,))
+        kept = self.create_recipe(self.author, (self.milk, self.flour))
+        self.index.build()
+        self.assertEqual(sorted(self.search(self.milk)), [recipe.id, kept.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            author.delete()
+        self.assertEqual(self.search(self.milk), [kept.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour.delete()
+        self.assertEqual(self.search(self.flour), [])
+        self.assertEqual(
+            self.index.search([self.milk.id])[2].tolist(), [0]
+        )
+
+
+class SimilaritySignalsTests(TestCase):
+    """Проверяет пересчёт сигнатур похожих рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='author', last_name='author'
+        )
+        cls.milk, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('молоко', 'мука')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='recipe', text='text', cooking_time=10,
+            image='recipes/image.png', short_link=short_link_create()
+        )
+
+    @override_settings(TASKS_EAGER=True)
+    def test_admin_style_ingredient_change_rebuilds_signature(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredients.objects.create(
+                recipe=self.recipe, ingredients=self.milk, amount=100
+            )
+        _, before = load_signatures([self.recipe.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredients.objects.create(
+                recipe=self.recipe, ingredients=self.flour, amount=100
+            )
+        _, after = load_signatures([self.recipe.id])
+        self.assertEqual(len(before), 1)
+        self.assertFalse((before == after).all())
+
+    def test_missing_signature_is_queued_not_built(self):
+        RecipeSignature.objects.all().delete()
+        Task.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(get_similar_recipes(self.recipe, 5), [])
+        self.assertFalse(RecipeSignature.objects.exists())
+        self.assertEqual(
+            list(Task.objects.values_list('dedup_key', flat=True)),
+            [f'recipe_signatures:{self.recipe.id}']
+        )
+
+
+class CatalogChangesTests(TestCase):
+    """Проверяет обновление рецептов при изменении каталога."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='author', last_name='author'
+        )
+        cls.salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        cls.recipe = Recipe.objects.create(
+            author=author, name='recipe', text='text', cooking_time=10,
+            image='recipes/image.png', short_link=short_link_create()
+        )
+        RecipeIngredients.objects.create(
+            recipe=cls.recipe, ingredients=cls.salt, amount=5
+        )
+
+    def setUp(self):
+        RecipeChange.objects.all().delete()
+        Task.objects.all().delete()
+
+    def test_save_without_displayed_changes_is_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.save()
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(RecipeChange.objects.exists())
+
+    def test_rename_is_queued(self):
+        self.salt.name = 'соль морская'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.save()
+        self.assertEqual(
+            list(Task.objects.values_list('name', 'args')),
+            [('utils.changes.touch_catalog_recipes',
+              ['ingredients', self.salt.id])]
+        )
+        self.assertFalse(RecipeChange.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_rename_touches_recipes(self):
+        updated_at = self.recipe.updated_at
+        self.salt.measurement_unit = 'кг'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.save()
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.updated_at, updated_at)
+        self.assertEqual(
+            list(RecipeChange.objects.values_list('recipe_id', 'action')),
+            [(self.recipe.id, RecipeChange.UPDATED)]
+        )
+
+    @override_settings(TASKS_EAGER=True)
+    def test_delete_touches_recipes_after_cascade(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.delete()
+        self.assertFalse(self.recipe.recipe_ingredients.exists())
+        self.assertEqual(
+            list(RecipeChange.objects.values_list('recipe_id', 'action')),
+            [(self.recipe.id, RecipeChange.UPDATED)]
+        )
+
+
+class RecipeChangesFeedTests(TestCase):
+    """Проверяет выдачу журнала изменений рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='author', last_name='author'
+        )
+
+    def setUp(self):
+        RecipeChange.objects.all().delete()
+
+    def create_recipe(self):
+        return Recipe.objects.create(
+            author=self.author, name='recipe', text='text', cooking_time=10,
+            image='recipes/image.png', short_link=short_link_create()
+        )
+
+    def test_sync_token_round_trip(self):
+        self.assertEqual(decode_sync_token(''), (0, 0))
+        self.assertEqual(
+            decode_sync_token(encode_sync_token((12345, 67))), (12345, 67)
+        )
+
+    def test_deleted_recipe_is_returned_as_tombstone(self):
+        recipe = self.create_recipe()
+        recipe_id = recipe.id
+        recipe.delete()
+        changes, position, has_more = get_changes((0, 0), 10)
+        self.assertEqual(changes, {recipe_id: RecipeChange.DELETED})
+        self.assertFalse(has_more)
+        self.assertEqual(get_changes(position, 10), ({}, position, False))
+
+    def test_late_commit_is_not_skipped(self):
+        """
+        Запись незавершённой транзакции не выдаётся раньше времени.
+
+        Транзакция 10 получила идентификатор записи раньше транзакции 11,
+        но зафиксирована позже: клиент получает её после фиксации,
+        а не теряет за выданной позицией.
+        """
+        early, late = self.create_recipe(), self.create_recipe()
+        RecipeChange.objects.all().delete()
+        RecipeChange.objects.create(
+            recipe_id=early.id, action=RecipeChange.UPDATED, txid=10
+        )
+        RecipeChange.objects.create(
+            recipe_id=late.id, action=RecipeChange.UPDATED, txid=11
+        )
+        with mock.patch(
+            'utils.changes.get_visible_txid_limit', return_value=10
+        ):
+            self.assertEqual(get_changes((0, 0), 10), ({}, (0, 0), False))
+        with mock.patch(
+            'utils.changes.get_visible_txid_limit', return_value=11
+        ):
+            changes, position, _ = get_changes((0, 0), 10)
+        self.assertEqual(changes, {early.id: RecipeChange.UPDATED})
+        with mock.patch(
+            'utils.changes.get_visible_txid_limit', return_value=12
+        ):
+            changes, position, _ = get_changes(position, 10)
+        self.assertEqual(changes, {late.id: RecipeChange.UPDATED})
+        self.assertEqual(position[0], 11)
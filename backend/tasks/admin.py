@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from tasks.models import ScheduledJob, Task
+from utils.paginators import EstimatedCountPaginator
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Класс для представления фоновых задач в Админ-зоне."""
+
+    list_display = (
+        'name', 'status', 'priority', 'attempts', 'run_at', 'finished_at'
+    )
+    list_filter = ('status',)
+    search_fields = ('name', 'dedup_key')
+    readonly_fields = ('created_at', 'locked_at', 'locked_by', 'last_error')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ScheduledJob)
+class ScheduledJobAdmin(admin.ModelAdmin):
+    """Класс для представления периодических задач в Админ-зоне."""
+
+    list_display = ('name', 'task', 'cron', 'next_run_at', 'last_run_at')
+    readonly_fields = ('task', 'cron', 'last_run_at')
@@ -0,0 +1,113 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from utils.constants import (
+    CRON_EXPRESSION_MAX_LENGTH,
+    TASK_DEDUP_KEY_MAX_LENGTH,
+    TASK_MAX_ATTEMPTS,
+    TASK_NAME_MAX_LENGTH,
+    TASK_STATUS_MAX_LENGTH,
+    TASK_WORKER_MAX_LENGTH
+)
+
+
+class Task(models.Model):
+    """Класс для представления фоновой задачи в очереди."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=TASK_NAME_MAX_LENGTH)
+    args = models.JSONField('Аргументы', default=list, blank=True)
+    kwargs = models.JSONField(
+        'Именованные аргументы',
+        default=dict,
+        blank=True
+    )
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    dedup_key = models.CharField(
+        'Ключ дедупликации',
+        max_length=TASK_DEDUP_KEY_MAX_LENGTH,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=TASK_STATUS_MAX_LENGTH,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=TASK_MAX_ATTEMPTS
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    locked_by = models.CharField(
+        'Обработчик',
+        max_length=TASK_WORKER_MAX_LENGTH,
+        blank=True
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-priority', 'run_at', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', '-priority', 'run_at'),
+                name='task_status_priority_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('dedup_key',),
+                condition=Q(status='pending'),
+                name='unique_pending_task_dedup_key'
+            ),
+        )
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class ScheduledJob(models.Model):
+    """Класс для представления периодической задачи."""
+
+    name = models.CharField(
+        'Название',
+        max_length=TASK_NAME_MAX_LENGTH,
+        unique=True
+    )
+    task = models.CharField('Задача', max_length=TASK_NAME_MAX_LENGTH)
+    cron = models.CharField(
+        'Расписание',
+        max_length=CRON_EXPRESSION_MAX_LENGTH
+    )
+    next_run_at = models.DateTimeField('Следующий запуск')
+    last_run_at = models.DateTimeField(
+        'Последний запуск',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'периодическая задача'
+        verbose_name_plural = 'Периодические задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.cron})'
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from utils.constants import TASK_LOCK_TIMEOUT, TASK_SUPERSEDED_MESSAGE
+from utils.tasks import claim_task, requeue_stale_tasks, run_task, task
+
+calls = []
+
+
+@task(max_attempts=3, retry_delay=10)
+def record_call(value):
+    """Запоминает переданное значение."""
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=10)
+def fail(value):
+    """Всегда завершается ошибкой."""
+    raise ValueError(value)
+
+
+class TaskQueueTests(TestCase):
+    """Проверяет очередь фоновых задач."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_pending_task_is_deduplicated(self):
+        record_call.apply_async((1,), dedup_key='key')
+        record_call.apply_async((2,), dedup_key='key')
+        self.assertEqual(
+            list(Task.objects.values_list('args', flat=True)), [[1]]
+        )
+
+    def test_finished_task_does_not_block_new_one(self):
+        record_call.apply_async((1,), dedup_key='key')
+        run_task(claim_task('worker'))
+        record_call.apply_async((2,), dedup_key='key')
+        self.assertEqual(
+            list(Task.objects.filter(status=Task.PENDING).values_list(
+                'args', flat=True
+            )),
+            [[2]]
+        )
+        self.assertEqual(calls, [1])
+
+    def test_failed_task_is_retried_with_backoff(self):
+        fail.delay('error')
+        now = timezone.now() + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=now), \
+                self.assertLogs('utils.tasks', 'ERROR'):
+            run_task(claim_task('worker'))
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.run_at, now + timedelta(seconds=10))
+        self.assertIn('ValueError: error', failed.last_error)
+        self.assertIsNone(claim_task('worker'))
+        later = now + timedelta(seconds=10)
+        with mock.patch('django.utils.timezone.now', return_value=later), \
+                self.assertLogs('utils.tasks', 'ERROR'):
+            claimed = claim_task('worker')
+            self.assertEqual(claimed.attempts, 2)
+            run_task(claimed)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.finished_at, later)
+
+    def test_retry_delay_doubles_with_attempts(self):
+        record_call.delay(1)
+        pending = Task.objects.get()
+        pending.name = fail.name
+        pending.max_attempts = 5
+        pending.attempts = 2
+        pending.save()
+        now = timezone.now() + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=now), \
+                self.assertLogs('utils.tasks', 'ERROR'):
+            run_task(claim_task('worker'))
+        pending.refresh_from_db()
+        self.assertEqual(pending.attempts, 3)
+        self.assertEqual(pending.run_at, now + timedelta(seconds=40))
+
+    def test_stale_task_is_requeued(self):
+        record_call.delay(1)
+        claim_task('worker')
+        Task.objects.update(
+            locked_at=timezone.now() - timedelta(seconds=TASK_LOCK_TIMEOUT + 1)
+        )
+        self.assertEqual(requeue_stale_tasks(), 1)
+        requeued = Task.objects.get()
+        self.assertEqual(requeued.status, Task.PENDING)
+        self.assertEqual(requeued.locked_by, '')
+
+    def test_stale_task_superseded_by_pending_duplicate(self):
+        record_call.apply_async((1,), dedup_key='key')
+        claim_task('worker')
+        record_call.apply_async((2,), dedup_key='key')
+        Task.objects.filter(status=Task.RUNNING).update(
+            locked_at=timezone.now() - timedelta(seconds=TASK_LOCK_TIMEOUT + 1)
+        )
+        self.assertEqual(requeue_stale_tasks(), 0)
+        self.assertEqual(
+            dict(Task.objects.values_list('status', 'last_error')),
+            {Task.FAILED: TASK_SUPERSEDED_MESSAGE, Task.PENDING: ''}
+        )
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_runs_inline(self):
+        record_call.apply_async((1,), dedup_key='key')
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
 from users.models import FoodgramUser
+from utils.paginators import EstimatedCountPaginator
 
 
 @admin.register(FoodgramUser)
@@ -12,3 +13,5 @@ class FoodgramUserAdmin(UserAdmin):
     list_display = ('first_name', 'last_name', 'username', 'email')
     search_fields = ('first_name', 'last_name', 'username', 'email')
     list_display_links = ('first_name', 'username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
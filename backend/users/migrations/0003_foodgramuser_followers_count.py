@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_followers_count(apps, schema_editor):
+    FoodgramUser = apps.get_model('users', 'FoodgramUser')
+    Follow = apps.get_model('recipes', 'Follow')
+    FoodgramUser.objects.update(
+        followers_count=Coalesce(
+            Subquery(
+                Follow.objects.filter(
+                    following_id=OuterRef('pk')
+                ).values('following_id').annotate(
+                    total=Count('id')
+                ).values('total')
+            ),
+            0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20241129_1807'),
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(
+            fill_followers_count, migrations.RunPython.noop
+        ),
+    ]
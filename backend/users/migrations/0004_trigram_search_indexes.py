@@ -0,0 +1,42 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    ('users_username_trgm_idx', 'username'),
+    ('users_first_name_trgm_idx', 'first_name'),
+    ('users_last_name_trgm_idx', 'last_name'),
+    ('users_email_trgm_idx', 'email'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} '
+            f'ON users_foodgramuser '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_foodgramuser_followers_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
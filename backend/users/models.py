@@ -51,6 +51,11 @@ class FoodgramUser(AbstractUser):
         null=True,
         default=None
     )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'пользователь'
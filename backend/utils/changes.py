@@ -0,0 +1,159 @@
+"""Журнал изменений рецептов для синхронизации клиентов."""
+
+import base64
+import binascii
+
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from recipes.models import Recipe, RecipeChange
+from utils.constants import INVALID_SYNC_TOKEN_MESSAGE, RECIPE_TOUCH_BATCH_SIZE
+from utils.tasks import task
+
+
+def get_current_txid():
+    """
+    Возвращает номер текущей транзакции PostgreSQL.
+
+    В других базах данных транзакции записи выполняются по одной,
+    порядок записей журнала совпадает с порядком фиксации,
+    и возвращается 0.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_current()')
+        return cursor.fetchone()[0]
+
+
+def get_visible_txid_limit():
+    """
+    Возвращает номер, меньше которого все транзакции завершены.
+
+    Записи журнала с меньшим номером транзакции уже видны и новых
+    таких записей не появится. В других базах данных возвращает
+    None: ограничение не нужно.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def record_recipe_changes(recipe_ids, action):
+    """
+    Добавляет в журнал записи об изменении рецептов.
+
+    Записи помечаются номером транзакции, в которой сделаны.
+    """
+    with transaction.atomic():
+        txid = get_current_txid()
+        RecipeChange.objects.bulk_create(
+            RecipeChange(recipe_id=recipe_id, action=action, txid=txid)
+            for recipe_id in recipe_ids
+        )
+
+
+@task()
+def touch_recipes(recipe_ids):
+    """
+    Обновляет время изменения рецептов и записывает их в журнал.
+
+    Рецепты обрабатываются пачками по RECIPE_TOUCH_BATCH_SIZE,
+    каждая в своей короткой транзакции.
+    """
+    for start in range(0, len(recipe_ids), RECIPE_TOUCH_BATCH_SIZE):
+        batch = recipe_ids[start:start + RECIPE_TOUCH_BATCH_SIZE]
+        with transaction.atomic():
+            Recipe.objects.filter(id__in=batch).update(
+                updated_at=timezone.now()
+            )
+            record_recipe_changes(batch, RecipeChange.UPDATED)
+
+
+@task()
+def touch_catalog_recipes(relation, object_id):
+    """
+    Обновляет рецепты, использующие тег или ингредиент каталога.
+
+    relation - имя связи рецепта: 'tags' или 'ingredients'.
+    """
+    touch_recipes(list(
+        Recipe.objects.filter(
+            **{relation: object_id}
+        ).order_by('id').values_list('id', flat=True).distinct()
+    ))
+
+
+def encode_sync_token(position):
+    """Кодирует токен синхронизации из номера транзакции и записи."""
+    return base64.urlsafe_b64encode(
+        'tx:{}:{}'.format(*position).encode()
+    ).decode()
+
+
+def decode_sync_token(token):
+    """Декодирует токен синхронизации в номер транзакции и записи."""
+    if not token:
+        return 0, 0
+    try:
+        prefix, txid, change_id = base64.urlsafe_b64decode(
+            token.encode()
+        ).decode().split(':')
+        if prefix != 'tx':
+            raise ValueError(prefix)
+        return int(txid), int(change_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise serializers.ValidationError(INVALID_SYNC_TOKEN_MESSAGE)
+
+
+def get_changes(since, limit):
+    """
+    Возвращает изменения рецептов после позиции since.
+
+    Записи упорядочены по номеру транзакции и идентификатору.
+    Выдаются только записи транзакций с номером меньше
+    txid_snapshot_xmin: все такие транзакции завершены, поэтому
+    запись, зафиксированная позже, не окажется до уже выданной
+    позиции. Для каждого рецепта остаётся только последнее изменение
+    в пределах страницы. Возвращает словарь рецепт -> действие,
+    позицию последней выданной записи и признак наличия следующих
+    изменений.
+    """
+    txid, change_id = since
+    changes = RecipeChange.objects.filter(
+        Q(txid__gt=txid) | Q(txid=txid, id__gt=change_id)
+    )
+    txid_limit = get_visible_txid_limit()
+    if txid_limit is not None:
+        changes = changes.filter(txid__lt=txid_limit)
+    rows = list(
+        changes.order_by('txid', 'id').values_list(
+            'txid', 'id', 'recipe_id', 'action'
+        )[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    result = {}
+    for _, _, recipe_id, action in rows:
+        result.pop(recipe_id, None)
+        result[recipe_id] = action
+    return result, rows[-1][:2] if rows else since, has_more
+
+
+@task()
+def compact_recipe_changes():
+    """
+    Удаляет записи журнала, перекрытые более поздними изменениями.
+
+    Для каждого рецепта остаётся последняя запись, поэтому клиент
+    с любым токеном получает актуальное состояние рецепта.
+    """
+    RecipeChange.objects.exclude(
+        id__in=RecipeChange.objects.values('recipe_id').annotate(
+            last_id=Max('id')
+        ).values('last_id')
+    ).delete()
@@ -0,0 +1,52 @@
+"""Компактный формат списков рецептов с вынесенными авторами и тегами."""
+
+from api.serializers import (
+    RecipeCompactSerializer,
+    RecipeReadSerializer,
+    TagSerializer,
+    UserSerializer
+)
+from utils.functions import get_recipes_context, get_requested_fields
+
+
+def is_compact(request):
+    """Проверяет, запрошен ли компактный формат ответа."""
+    return request.query_params.get('compact', '').lower() in ('1', 'true')
+
+
+def serialize_compact(recipes, request):
+    """
+    Возвращает рецепты в компактном формате и связанные с ними объекты.
+
+    Рецепты ссылаются на авторов и теги по идентификаторам, а сами
+    авторы и теги сериализуются один раз на страницу. Подписки,
+    избранное и список покупок пользователя загружаются одним
+    запросом на страницу.
+    """
+    recipes = list(recipes)
+    fields = get_requested_fields(request, RecipeReadSerializer.Meta.fields)
+    context = get_recipes_context(request, recipes, fields)
+    results = RecipeCompactSerializer(
+        recipes, context=context, many=True
+    ).data
+    included = {}
+    if 'author' in fields:
+        authors = {recipe.author_id: recipe.author for recipe in recipes}
+        user_context = {'request': request, 'sparse_fieldset': False}
+        if 'subscriptions' in context:
+            user_context['subscriptions'] = context['subscriptions']
+        included['users'] = {
+            author['id']: author
+            for author in UserSerializer(
+                authors.values(), context=user_context, many=True
+            ).data
+        }
+    if 'tags' in fields:
+        tags = {
+            tag.id: tag for recipe in recipes for tag in recipe.tags.all()
+        }
+        included['tags'] = {
+            tag['id']: tag
+            for tag in TagSerializer(tags.values(), many=True).data
+        }
+    return results, included
@@ -1,35 +1,119 @@
 """Константы проекта."""
 
 AVATAR_PATH = 'me/avatar'
+CHANGES_PATH = 'changes'
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json',
+    'text/plain',
+)
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_MIN_LENGTH = 1024
+COUNT_CACHE_KEY = 'count:{}'
+COUNT_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_THRESHOLD = 100000
+COUNT_LIMIT = 10000
+COUNT_VERSION_KEY = 'count_version:{}'
+CRON_EXPRESSION_MAX_LENGTH = 64
+CRON_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
 DEFAULT_AMOUNT_VALUE = 1
 DEFAULT_RECIPES_LIMIT = '20'
 DOWNLOAD_SHOPPING_CART_PATH = 'download_shopping_cart'
 EMAIL_MAX_LENGTH = 254
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_PATH = 'export'
 FIRST_NAME_MAX_LENGTH = 150
 FAVORITE_PATH = 'favorite'
+FEED_BACKFILL_SIZE = 100
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_FANOUT_PRIORITY = 10
+FEED_PATH = 'feed'
+IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_TOO_LARGE_MESSAGE = (
+    f'Размер изображения не должен превышать {IMAGE_MAX_SIZE // 2 ** 20} МБ.'
+)
+IMPORT_PATH = 'import'
+INGREDIENT_INDEX_MAX_AGE = 60 * 60
+INGREDIENT_INDEX_VERSION_KEY = 'ingredient_index_version'
 INGREDIENT_MEASUREMENT_UNIT_MAX_LENGTH = 64
 INGREDIENT_NAME_MAX_LENGTH = 128
+INGREDIENT_SEARCH_CACHE_SIZE = 10000
+INGREDIENT_SEARCH_CANDIDATES = 30
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_SEARCH_VOWEL_CANDIDATES = 200
+INGREDIENT_SEARCH_VOWELS = 'аеиоуыэюя'
+INVALID_CRON_MESSAGE = 'Некорректное расписание: {}.'
+INVALID_FEED_CURSOR_MESSAGE = 'Некорректная позиция в ленте.'
+INVALID_FEED_LIMIT_MESSAGE = 'limit должен быть целым числом больше нуля.'
+INVALID_FIELDS_MESSAGE = 'Неизвестные поля: {}.'
+INVALID_IMPORT_MESSAGE = (
+    'Ожидается список рецептов длиной не более {}.'
+)
+INVALID_IMAGE_DATA_MESSAGE = 'Некорректные данные изображения.'
+INVALID_MULTIPART_DATA_MESSAGE = 'Поле data должно содержать объект JSON.'
 INVALID_SUBSCRIBE_MESSAGE = 'Пользователя с таким id не существует.'
+INVALID_SYNC_TOKEN_MESSAGE = 'Некорректный токен синхронизации.'
+INVALID_UPDATED_SINCE_MESSAGE = (
+    'updated_since должен быть датой и временем в формате ISO 8601.'
+)
+KEYBOARD_LAYOUT_CYRILLIC = 'ёйцукенгшщзхъфывапролджэячсмитьбю'
+KEYBOARD_LAYOUT_LATIN = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
 LAST_NAME_MAX_LENGTH = 150
 LEFT_POINT = 0
+LOAD_TEST_PASSWORD = 'load-test-password'
+LOAD_TEST_USERNAME = 'loadtest-{}'
+LSH_BANDS = 32
+LSH_BATCH_SIZE = 1000
+LSH_MAX_CANDIDATES = 5000
 MAX_AMOUNT = 20000
 MAX_COOKING_TIME = 180
+MAX_PAGE_SIZE = 100
+MEDIA_HASH_LENGTH = 32
 MIN_AMOUNT = 1
 MIN_COOKING_TIME = 1
+MINHASH_NUM_PERM = 128
+MINHASH_SEED = 2024
+MULTIPART_DATA_FIELD = 'data'
 INVALID_AMOUNT_MESSAGE = f'Введите значение от {MIN_AMOUNT} до {MAX_AMOUNT}.'
 INVALID_COOKING_TIME_MESSAGE = (
     f'Введите значение от {MIN_COOKING_TIME} до {MAX_COOKING_TIME}.'
 )
 PAGE_SIZE = 6
+PANTRY_BITMAP_RATIO = 32
+PANTRY_CHANGE_KEY = 'pantry_index_change:{}'
+PANTRY_CHANGE_TIMEOUT = 60 * 60
+PANTRY_INDEX_BATCH_SIZE = 10000
+PANTRY_INDEX_MAX_AGE = 24 * 60 * 60
+PANTRY_MAX_INGREDIENTS = 50
+PANTRY_MAX_REPLAY = 1000
+PANTRY_MAX_RESULTS = 1000
+PANTRY_PATH = 'pantry'
+PANTRY_VERSION_KEY = 'pantry_index_version'
 POINT = 1
+PROFILE_FILE_REGEX = r'^\d{8}-\d{6}-\d{6}-[0-9a-f]{8}\.(prof|html|json)\Z'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_MAX_QUERIES = 1000
+PROFILE_PARAM = 'profile'
+PROFILE_STATS_LIMIT = 60
 RECIPE_ALREADY_IN_FAVORITE_MESSAGE = 'Рецепт уже добавлен в избранное.'
 RECIPE_ALREADY_IN_SHOPPING_CART_MESSAGE = 'Рецепт уже в списке покупок.'
+RECIPE_CHANGE_ACTION_MAX_LENGTH = 16
+RECIPE_IMPORT_BATCH_SIZE = 500
+RECIPE_IMPORT_MAX_ITEMS = 1000
 RECIPE_LINK_PATH = 'get-link'
 RECIPE_NAME_MAX_LENGTH = 128
 RECIPE_NOT_IN_FAVORITE_MESSAGE = 'В избранном нет такого рецепта.'
 RECIPE_NOT_IN_SHOPPING_CART_MESSAGE = 'В списке покупок нет такого рецепта.'
+RECIPE_TOUCH_BATCH_SIZE = 1000
 SHOPPING_CART_PATH = 'shopping_cart'
+SHOPPING_LIST_AMOUNT_PRECISION = 2
+SHOPPING_LIST_PATH = 'shopping_list'
 SHORT_LINK_LENGTH = 3
+SIMILAR_PATH = 'similar'
+SIMILAR_RECIPES_LIMIT = 10
+SLOW_QUERY_REPORT_TOP = 20
+SLOW_QUERY_SQL_MAX_LENGTH = 10000
 SUBSCRIBE_PATH = 'subscribe'
 SUBSCRIBE_TO_YOURSELF_MESSAGE = 'Нельзя подписаться на себя.'
 SUBSCRIPTIONS_PATH = 'subscriptions'
@@ -37,6 +121,57 @@ SYMBOLS_FOR_LINK = (
     'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz1234567890'
 )
 TAG_MAX_LENGTH = 32
+TASK_DEDUP_KEY_MAX_LENGTH = 255
+TASK_LOCK_TIMEOUT = 30 * 60
+TASK_MAX_ATTEMPTS = 3
+TASK_NAME_MAX_LENGTH = 255
+TASK_POLL_INTERVAL = 1
+TASK_RETENTION_DAYS = 7
+TASK_RETRY_DELAY = 30
+TASK_SCHEDULER_INTERVAL = 30
+TASK_STATUS_MAX_LENGTH = 16
+TASK_SUPERSEDED_MESSAGE = (
+    'Задача не возвращена в очередь: там уже ожидает задача '
+    'с тем же ключом дедупликации.'
+)
+TASK_WORKER_MAX_LENGTH = 128
+TAGS_MATCH_ALL = 'all'
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_CHOICES = (
+    (TAGS_MATCH_ANY, 'Хотя бы один из тегов'),
+    (TAGS_MATCH_ALL, 'Все теги'),
+)
+THROTTLE_CACHE_KEY = 'throttle:{}'
+THROTTLE_DURATIONS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+THROTTLE_LOCAL_CACHE_MESSAGE = (
+    'THROTTLE_STORE=cache требует общего для процессов кеша, '
+    'а используется LocMemCache: задайте CACHE_LOCATION.'
+)
+THROTTLE_PRUNE_INTERVAL = 60
+THROTTLE_PRUNE_SIZE = 100000
+UNIT_CONVERSIONS = {
+    'г': ('г', 1),
+    'гр': ('г', 1),
+    'кг': ('г', 1000),
+    'мг': ('г', 0.001),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'капля': ('мл', 0.05),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+    'стакан': ('мл', 250),
+    'шт': ('шт.', 1),
+    'шт.': ('шт.', 1),
+}
+UNIT_DISPLAY_THRESHOLDS = {
+    'г': (('кг', 1000),),
+    'мл': (('л', 1000),),
+}
+UNKNOWN_INGREDIENTS_MESSAGE = 'Ингредиентов с id {} не существует.'
+UNKNOWN_TAGS_MESSAGE = 'Тегов с id {} не существует.'
+UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+UPLOAD_MAX_SIZE = IMAGE_MAX_SIZE + 1024 * 1024
+UPLOAD_TOO_LARGE_MESSAGE = 'Размер запроса превышает допустимый.'
 USERNAME_MAX_LENGTH = 150
 USERNAME_REGEX = r'^[\w.@+-]+\Z'
 USER_ALREADY_SUBSCRIBE_MESSAGE = 'Вы уже подписаны на этого пользователя.'
@@ -0,0 +1,121 @@
+"""Потоковая выгрузка каталога рецептов в формате NDJSON."""
+
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from api.renderers import ORJSONRenderer
+from recipes.models import Recipe, RecipeIngredients, RecipeTags
+from utils.constants import EXPORT_CHUNK_SIZE, INVALID_UPDATED_SINCE_MESSAGE
+
+
+def parse_updated_since(value):
+    """Проверяет корректность параметра 'updated_since'."""
+    if not value:
+        return None
+    updated_since = parse_datetime(value)
+    if updated_since is None:
+        raise serializers.ValidationError(INVALID_UPDATED_SINCE_MESSAGE)
+    if timezone.is_naive(updated_since):
+        updated_since = timezone.make_aware(updated_since)
+    return updated_since
+
+
+def get_export_queryset(updated_since=None):
+    """Возвращает рецепты для выгрузки."""
+    recipes = Recipe.objects.order_by('id')
+    if updated_since is not None:
+        recipes = recipes.filter(updated_at__gte=updated_since)
+    return recipes.values(
+        'id', 'name', 'text', 'image', 'cooking_time', 'pub_date',
+        'updated_at',
+        'author_id', 'author__username', 'author__first_name',
+        'author__last_name'
+    )
+
+
+def serialize_chunk(recipes):
+    """
+    Преобразует пачку рецептов в строки NDJSON.
+
+    Теги и ингредиенты загружаются одним запросом на всю пачку.
+    """
+    recipe_ids = [recipe['id'] for recipe in recipes]
+    tags = defaultdict(list)
+    for recipe_id, tag_id, name, slug in RecipeTags.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tags_id', 'tags__name', 'tags__slug'):
+        tags[recipe_id].append({'id': tag_id, 'name': name, 'slug': slug})
+    ingredients = defaultdict(list)
+    for (
+        recipe_id, ingredient_id, name, measurement_unit, amount
+    ) in RecipeIngredients.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(
+        'recipe_id', 'ingredients_id', 'ingredients__name',
+        'ingredients__measurement_unit', 'amount'
+    ):
+        ingredients[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        })
+    renderer = ORJSONRenderer()
+    for recipe in recipes:
+        yield renderer.render({
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'image': (
+                default_storage.url(recipe['image'])
+                if recipe['image'] else None
+            ),
+            'cooking_time': recipe['cooking_time'],
+            'pub_date': recipe['pub_date'],
+            'updated_at': recipe['updated_at'],
+            'author': {
+                'id': recipe['author_id'],
+                'username': recipe['author__username'],
+                'first_name': recipe['author__first_name'],
+                'last_name': recipe['author__last_name'],
+            },
+            'tags': tags[recipe['id']],
+            'ingredients': ingredients[recipe['id']],
+        }) + b'\n'
+
+
+def iter_recipes_ndjson(updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Построчно выгружает рецепты в формате NDJSON.
+
+    Рецепты читаются серверным курсором пачками по chunk_size,
+    поэтому потребление памяти не зависит от размера каталога.
+    """
+    chunk = []
+    for recipe in get_export_queryset(updated_since).iterator(
+        chunk_size=chunk_size
+    ):
+        chunk.append(recipe)
+        if len(chunk) == chunk_size:
+            yield from serialize_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from serialize_chunk(chunk)
+
+
+def gzip_stream(chunks):
+    """Сжимает поток данных в формате gzip."""
+    compressor = zlib.compressobj(
+        settings.COMPRESSION_GZIP_LEVEL, wbits=zlib.MAX_WBITS | 16
+    )
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
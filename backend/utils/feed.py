@@ -0,0 +1,226 @@
+"""Лента рецептов от авторов, на которых подписан пользователь."""
+
+import base64
+import binascii
+import heapq
+from datetime import datetime
+
+from django.db.models import Exists, F, OuterRef, Q
+from rest_framework import serializers
+
+from recipes.models import Follow, Recipe, TimelineEntry, User
+from utils.constants import (
+    FEED_BACKFILL_SIZE,
+    FEED_FANOUT_BATCH_SIZE,
+    FEED_FANOUT_MAX_FOLLOWERS,
+    FEED_FANOUT_PRIORITY,
+    INVALID_FEED_CURSOR_MESSAGE,
+    INVALID_FEED_LIMIT_MESSAGE,
+    MAX_PAGE_SIZE,
+    PAGE_SIZE
+)
+from utils.tasks import task
+
+
+def is_popular_author(author):
+    """
+    Проверяет, является ли автор популярным.
+
+    Рецепты популярных авторов не рассылаются по лентам подписчиков,
+    а подгружаются при чтении ленты.
+    """
+    return author.followers_count > FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_recipes(author, recipes):
+    """
+    Добавляет опубликованные рецепты автора в ленты его подписчиков.
+
+    Подписчики, в лентах которых ещё нет рецептов автора, например
+    подписавшиеся, пока автор был популярным, получают последние
+    рецепты автора целиком.
+    """
+    if is_popular_author(author) or not recipes:
+        return
+    follows = Follow.objects.filter(following_id=author.id)
+    backfill_timelines(author, follows.exclude(
+        Exists(TimelineEntry.objects.filter(
+            user_id=OuterRef('user_id'), author_id=author.id
+        ))
+    ).values_list('user_id', flat=True))
+    entries = (
+        TimelineEntry(
+            user_id=follower_id,
+            author_id=author.id,
+            recipe_id=recipe.id,
+            pub_date=recipe.pub_date
+        )
+        for follower_id in follows.values_list(
+            'user_id', flat=True
+        ).iterator(chunk_size=FEED_FANOUT_BATCH_SIZE)
+        for recipe in recipes
+    )
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=FEED_FANOUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+@task(priority=FEED_FANOUT_PRIORITY)
+def fan_out_recipe(recipe_id):
+    """Добавляет опубликованный рецепт в ленты подписчиков автора."""
+    recipe = Recipe.objects.select_related('author').filter(
+        id=recipe_id
+    ).first()
+    if recipe is not None:
+        fan_out_recipes(recipe.author, [recipe])
+
+
+@task(priority=FEED_FANOUT_PRIORITY)
+def fan_out_author_recipes(author_id, recipe_ids):
+    """Добавляет пачку рецептов автора в ленты его подписчиков."""
+    author = User.objects.filter(id=author_id).first()
+    if author is not None:
+        fan_out_recipes(author, list(Recipe.objects.filter(
+            id__in=recipe_ids, author_id=author_id
+        ).only('id', 'pub_date')))
+
+
+def backfill_timelines(author, user_ids):
+    """Добавляет в ленты пользователей последние рецепты автора."""
+    if is_popular_author(author):
+        return
+    recipes = list(Recipe.objects.filter(
+        author_id=author.id
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date'
+    )[:FEED_BACKFILL_SIZE])
+    if not recipes:
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                author_id=author.id,
+                recipe_id=recipe_id,
+                pub_date=pub_date
+            )
+            for user_id in user_ids
+            for recipe_id, pub_date in recipes
+        ),
+        batch_size=FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def subscribe_timeline(follow):
+    """
+    Обновляет счётчик подписчиков и заполняет ленту подписчика.
+
+    Вызывается сигналом post_save подписки, а для подписок,
+    созданных в обход save(), - явно.
+    """
+    User.objects.filter(id=follow.following_id).update(
+        followers_count=F('followers_count') + 1
+    )
+    follow.following.followers_count += 1
+    backfill_timelines(follow.following, (follow.user_id,))
+
+
+def unsubscribe_timeline(follow):
+    """
+    Обновляет счётчик подписчиков и удаляет автора из ленты.
+
+    Вызывается сигналом post_delete подписки, поэтому счётчик
+    остаётся верным и при каскадном удалении, и при удалении
+    из админки.
+    """
+    User.objects.filter(
+        id=follow.following_id, followers_count__gt=0
+    ).update(followers_count=F('followers_count') - 1)
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.following_id
+    ).delete()
+
+
+def encode_feed_cursor(pub_date, recipe_id):
+    """Кодирует позицию в ленте."""
+    return base64.urlsafe_b64encode(
+        f'{pub_date.isoformat()}|{recipe_id}'.encode()
+    ).decode()
+
+
+def decode_feed_cursor(cursor):
+    """Декодирует позицию в ленте."""
+    try:
+        pub_date, recipe_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split('|')
+        return datetime.fromisoformat(pub_date), int(recipe_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise serializers.ValidationError(INVALID_FEED_CURSOR_MESSAGE)
+
+
+def parse_feed_limit(limit):
+    """Проверяет корректность параметра 'limit' ленты."""
+    if limit is None:
+        return PAGE_SIZE
+    if not limit.isnumeric() or int(limit) <= 0:
+        raise serializers.ValidationError(INVALID_FEED_LIMIT_MESSAGE)
+    return min(int(limit), MAX_PAGE_SIZE)
+
+
+def keyset_filter(cursor, recipe_field):
+    """Возвращает условие для выборки записей после позиции cursor."""
+    pub_date, recipe_id = cursor
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{recipe_field}__lt': recipe_id}
+    )
+
+
+def get_feed_page(user, cursor, limit):
+    """
+    Возвращает страницу ленты пользователя и позицию следующей страницы.
+
+    Объединяет записи ленты пользователя с рецептами популярных авторов,
+    которые не рассылаются при публикации, и авторов, чьих рецептов
+    ещё нет в ленте: например, переставших быть популярными.
+    """
+    entries = TimelineEntry.objects.filter(user_id=user.id)
+    pulled_recipes = Recipe.objects.filter(
+        author__in=User.objects.filter(follows__user_id=user.id).filter(
+            Q(followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS)
+            | ~Exists(TimelineEntry.objects.filter(
+                user_id=user.id, author_id=OuterRef('id')
+            ))
+        )
+    )
+    if cursor:
+        cursor = decode_feed_cursor(cursor)
+        entries = entries.filter(keyset_filter(cursor, 'recipe_id'))
+        pulled_recipes = pulled_recipes.filter(keyset_filter(cursor, 'id'))
+    candidates = heapq.merge(
+        entries.order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[:limit + 1],
+        pulled_recipes.order_by('-pub_date', '-id').values_list(
+            'pub_date', 'id'
+        )[:limit + 1],
+        reverse=True
+    )
+    positions = []
+    for position in candidates:
+        if position not in positions:
+            positions.append(position)
+        if len(positions) > limit:
+            break
+    next_cursor = None
+    if len(positions) > limit:
+        positions = positions[:limit]
+        next_cursor = encode_feed_cursor(*positions[-1])
+    recipes = Recipe.objects.select_related('author').prefetch_related(
+        'tags', 'recipe_ingredients__ingredients'
+    ).in_bulk([recipe_id for _, recipe_id in positions])
+    return [
+        recipes[recipe_id] for _, recipe_id in positions
+        if recipe_id in recipes
+    ], next_cursor
@@ -1,16 +1,27 @@
+import hashlib
 import io
 import random
 
+from django.db import connections, router
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
 from django.shortcuts import get_object_or_404, redirect
 from rest_framework import serializers, status
 from rest_framework.response import Response
 
-from recipes.models import Recipe, RecipeIngredients
+from recipes.models import (
+    Favorite,
+    Follow,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart
+)
 from utils.constants import (
     DEFAULT_RECIPES_LIMIT,
+    INVALID_FIELDS_MESSAGE,
     SHORT_LINK_LENGTH,
     SYMBOLS_FOR_LINK
 )
+from utils.paginators import register_count_change
 
 
 def filter_queryset(self, queryset, name, value):
@@ -23,19 +34,16 @@ def filter_queryset(self, queryset, name, value):
     return queryset
 
 
-def check_recipes_limit_param(self, obj, serializer):
+def get_recipes_limit(request):
     """
     Проверяет наличие и корректность параметра 'recipes_limit'.
 
-    Если 'recipes_limit' передан в запросе, ограничивает количество рецептов
-    в ответе до значения параметра 'recipes_limit'.
+    Возвращает количество рецептов, выводимых для каждого автора.
     """
-    request = self.context.get('request')
     recipes_limit = request.query_params.get(
         'recipes_limit',
         DEFAULT_RECIPES_LIMIT
     )
-    recipes = Recipe.objects.filter(author=obj)
     if not recipes_limit.isnumeric():
         raise serializers.ValidationError(
             'recipes_limit должен быть целым числом.'
@@ -45,13 +53,99 @@ def check_recipes_limit_param(self, obj, serializer):
         raise serializers.ValidationError(
             'recipes_limit должен быть больше нуля.'
         )
-    recipes = recipes[:recipes_limit]
-    serializer = serializer(
-        recipes,
-        read_only=True,
-        many=True
+    return recipes_limit
+
+
+def split_fields(value):
+    """Возвращает множество имён полей из параметра запроса."""
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def get_requested_fields(request, fields):
+    """
+    Проверяет параметры 'fields' и 'omit'.
+
+    Возвращает поля из fields, запрошенные клиентом: 'fields' оставляет
+    только перечисленные поля, 'omit' исключает перечисленные.
+    """
+    requested = split_fields(request.query_params.get('fields'))
+    omitted = split_fields(request.query_params.get('omit'))
+    unknown = (requested | omitted) - set(fields)
+    if unknown:
+        raise serializers.ValidationError(
+            INVALID_FIELDS_MESSAGE.format(', '.join(sorted(unknown)))
+        )
+    return [
+        name for name in fields
+        if (not requested or name in requested) and name not in omitted
+    ]
+
+
+def get_recipes_context(request, recipes, fields):
+    """
+    Возвращает контекст сериализации страницы рецептов.
+
+    Избранное, список покупок и подписки пользователя загружаются
+    одним запросом на страницу и только для запрошенных полей.
+    """
+    context = {'request': request}
+    user = request.user
+    if not user.is_authenticated:
+        return context
+    recipe_ids = [recipe.id for recipe in recipes]
+    if 'is_favorited' in fields:
+        context['favorited'] = set(Favorite.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+    if 'is_in_shopping_cart' in fields:
+        context['in_shopping_cart'] = set(ShoppingCart.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+    if 'author' in fields:
+        context['subscriptions'] = set(Follow.objects.filter(
+            user=user,
+            following_id__in={recipe.author_id for recipe in recipes}
+        ).values_list('following_id', flat=True))
+    return context
+
+
+def get_recipes_previews(author_ids, recipes_limit):
+    """
+    Возвращает последние рецепты авторов одним запросом.
+
+    Результат - словарь, где ключ - id автора, значение - список
+    не более чем recipes_limit рецептов.
+    """
+    recipes = Recipe.objects.filter(
+        author_id__in=author_ids,
+        id__in=Subquery(
+            Recipe.objects.filter(
+                author_id=OuterRef('author_id')
+            ).order_by('-pub_date', '-id').values('id')[:recipes_limit]
+        )
+    ).only(
+        'id', 'author_id', 'name', 'image', 'cooking_time', 'pub_date'
+    ).order_by('-pub_date', '-id')
+    previews = {author_id: [] for author_id in author_ids}
+    for recipe in recipes:
+        previews[recipe.author_id].append(recipe)
+    return previews
+
+
+def get_recipes_counts(author_ids):
+    """
+    Возвращает количество рецептов авторов одним запросом.
+
+    Результат - словарь, где ключ - id автора, значение - число
+    его рецептов.
+    """
+    counts = dict.fromkeys(author_ids, 0)
+    counts.update(
+        Recipe.objects.filter(author_id__in=author_ids).order_by().values(
+            'author_id'
+        ).annotate(total=Count('id')).values_list('author_id', 'total')
     )
-    return serializer.data
+    return counts
 
 
 def add_object(
@@ -60,11 +154,9 @@ def add_object(
     serializer,
 ):
     """Добавляет запись в модель."""
-    user = request.user
     serializer = serializer(
         context={'request': request},
         data={
-            'user': user.id,
             'recipe': pk,
         }
     )
@@ -76,6 +168,46 @@ def add_object(
     )
 
 
+def insert_on_conflict(model, **fields):
+    """
+    Создаёт запись запросом INSERT ... ON CONFLICT DO NOTHING.
+
+    Возвращает созданный объект или None, если запись нарушает
+    ограничение уникальности.
+    """
+    instance = model(**fields)
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    meta = model._meta
+    columns = [meta.get_field(name) for name in fields]
+    sql = (
+        'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING '
+        'RETURNING {}'.format(
+            quote_name(meta.db_table),
+            ', '.join(quote_name(field.column) for field in columns),
+            ', '.join(['%s'] * len(columns)),
+            quote_name(meta.pk.column)
+        )
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            [
+                field.get_db_prep_save(
+                    getattr(instance, field.attname), connection
+                )
+                for field in columns
+            ]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    instance.pk = row[0]
+    instance._state.adding = False
+    instance._state.db = connection.alias
+    return instance
+
+
 def remove_object(
     model,
     user,
@@ -91,6 +223,7 @@ def remove_object(
             error_message,
             status.HTTP_400_BAD_REQUEST
         )
+    register_count_change(model)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -120,15 +253,31 @@ def short_link_create():
     return short_link
 
 
-def shopping_cart_file_create(ingredients):
+def short_links_create(count):
+    """Генерирует заданное количество уникальных коротких ссылок."""
+    short_links = set()
+    while len(short_links) < count:
+        candidates = {
+            ''.join(random.choices(SYMBOLS_FOR_LINK, k=SHORT_LINK_LENGTH))
+            for _ in range(count - len(short_links))
+        } - short_links
+        short_links |= candidates - set(
+            Recipe.objects.filter(
+                short_link__in=candidates
+            ).values_list('short_link', flat=True)
+        )
+    return list(short_links)
+
+
+def shopping_cart_file_create(shopping_list):
     """Создаёт файл со списком покупок."""
     text_buffer = io.StringIO()
-    for ingredient in ingredients:
+    for item in shopping_list:
         text_buffer.write(
             '{} ({}) - {}\n'.format(
-                ingredient.name,
-                ingredient.measurement_unit,
-                ingredient.total_amount
+                item['name'],
+                item['measurement_unit'],
+                item['amount']
             )
         )
     return text_buffer
@@ -150,3 +299,51 @@ def create_or_update_recipe_tags_and_ingredients(tags, ingredients, recipe):
         recipeingredients.append(recipeingredient)
     RecipeIngredients.objects.bulk_create(recipeingredients)
     recipe.ingredients.set(all_ingredients)
+
+
+def get_recipe_version(recipe_id, user, fields=()):
+    """
+    Возвращает ETag и время изменения рецепта для пользователя.
+
+    ETag учитывает версию рецепта, данные автора, наличие рецепта
+    в избранном и списке покупок пользователя, подписку на автора
+    и набор полей ответа fields. Все данные получаются одним
+    запросом. Для несуществующего рецепта возвращает None.
+    """
+    if user.is_authenticated:
+        flags = {
+            'is_favorited': Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            'is_in_shopping_cart': Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            'is_subscribed': Exists(
+                Follow.objects.filter(
+                    user=user, following=OuterRef('author')
+                )
+            ),
+        }
+    else:
+        flags = {
+            name: Value(False)
+            for name in (
+                'is_favorited', 'is_in_shopping_cart', 'is_subscribed'
+            )
+        }
+    try:
+        state = Recipe.objects.filter(pk=recipe_id).annotate(
+            **flags
+        ).values(
+            'id', 'updated_at', 'author__email', 'author__username',
+            'author__first_name', 'author__last_name', 'author__avatar',
+            *flags
+        ).first()
+    except (TypeError, ValueError):
+        return None
+    if state is None:
+        return None
+    etag = hashlib.md5(
+        repr((sorted(state.items()), tuple(fields))).encode()
+    ).hexdigest()
+    return etag, state['updated_at']
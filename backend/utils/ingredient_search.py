@@ -0,0 +1,328 @@
+"""Поиск ингредиентов с учётом опечаток и раскладки клавиатуры."""
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from recipes.models import Ingredient, RecipeIngredients
+from utils.constants import (
+    INGREDIENT_INDEX_MAX_AGE,
+    INGREDIENT_INDEX_VERSION_KEY,
+    INGREDIENT_SEARCH_CACHE_SIZE,
+    INGREDIENT_SEARCH_CANDIDATES,
+    INGREDIENT_SEARCH_LIMIT,
+    INGREDIENT_SEARCH_VOWEL_CANDIDATES,
+    INGREDIENT_SEARCH_VOWELS,
+    KEYBOARD_LAYOUT_CYRILLIC,
+    KEYBOARD_LAYOUT_LATIN
+)
+
+WORD_PATTERN = re.compile(r'\w+')
+LATIN_PATTERN = re.compile(r'[a-z]')
+LAYOUT_TABLE = str.maketrans(KEYBOARD_LAYOUT_LATIN, KEYBOARD_LAYOUT_CYRILLIC)
+VOWEL_TABLE = str.maketrans(
+    INGREDIENT_SEARCH_VOWELS, '*' * len(INGREDIENT_SEARCH_VOWELS)
+)
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет 'ё' на 'е'."""
+    return text.lower().replace('ё', 'е')
+
+
+def tokenize(text):
+    """Возвращает слова нормализованного текста."""
+    return WORD_PATTERN.findall(normalize(text))
+
+
+def get_query_variants(query):
+    """
+    Возвращает варианты поискового запроса.
+
+    Запрос, набранный в латинской раскладке, дополнительно
+    переводится в русскую: 'vjkjrj' -> 'молоко'.
+    """
+    query = normalize(query)
+    variants = [tokenize(query)]
+    if LATIN_PATTERN.search(query):
+        variants.append(tokenize(query.translate(LAYOUT_TABLE)))
+    return [tokens for tokens in variants if tokens]
+
+
+def get_max_typos(token):
+    """Возвращает допустимое число опечаток для слова запроса."""
+    if len(token) < 3:
+        return 0
+    if len(token) < 5:
+        return 1
+    return 2
+
+
+def get_trigrams(word):
+    """Возвращает триграммы слова с маркером начала."""
+    word = f'^{word}'
+    return {word[index:index + 3] for index in range(len(word) - 2)}
+
+
+def get_vowel_key(word):
+    """
+    Возвращает слово, в котором все гласные заменены одним знаком.
+
+    Слова, отличающиеся только гласными, например 'малако'
+    и 'молоко', получают одинаковый ключ, даже если у них
+    нет общих триграмм.
+    """
+    return word.translate(VOWEL_TABLE)
+
+
+def prefix_distance(token, word, limit):
+    """
+    Возвращает расстояние Левенштейна от слова запроса до начала word.
+
+    Запрос может быть недописан, поэтому сравнение идёт с лучшим
+    префиксом слова. Расчёт прекращается, как только расстояние
+    превышает limit; в этом случае возвращается limit + 1.
+    """
+    word = word[:len(token) + limit]
+    previous = list(range(len(word) + 1))
+    for row, token_char in enumerate(token, 1):
+        current = [row]
+        for column, word_char in enumerate(word, 1):
+            current.append(min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (token_char != word_char)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+
+class IngredientIndex:
+    """
+    Индекс названий ингредиентов для поиска по мере ввода.
+
+    Хранится в памяти процесса, поэтому поиск не обращается к базе
+    данных. Слова названий индексируются триграммами и ключами
+    с заменёнными гласными; кандидаты проверяются расстоянием
+    Левенштейна. Популярность ингредиента
+    в рецептах используется для ранжирования равных совпадений.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = 0
+        self.records = {}
+        self.names = {}
+        self.popularity = {}
+        self.words = []
+        self.word_ingredients = {}
+        self.trigrams = {}
+        self.vowel_keys = []
+        self.matches = {}
+
+    def build(self):
+        """Строит индекс по всем ингредиентам."""
+        version = cache.get(INGREDIENT_INDEX_VERSION_KEY, 0)
+        records = {
+            ingredient['id']: ingredient
+            for ingredient in Ingredient.objects.values(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+        popularity = dict(
+            RecipeIngredients.objects.values_list('ingredients_id').annotate(
+                Count('id')
+            ).order_by()
+        )
+        names = {}
+        word_ingredients = defaultdict(set)
+        for ingredient_id, ingredient in records.items():
+            name = normalize(ingredient['name'])
+            names[ingredient_id] = (
+                name, tokenize(ingredient['name']), get_vowel_key(name)
+            )
+            for word in names[ingredient_id][1]:
+                word_ingredients[word].add(ingredient_id)
+        words = sorted(word_ingredients)
+        trigrams = defaultdict(list)
+        for position, word in enumerate(words):
+            for trigram in get_trigrams(word):
+                trigrams[trigram].append(position)
+        self.records = records
+        self.names = names
+        self.popularity = popularity
+        self.words = words
+        self.word_ingredients = {
+            word: tuple(ingredient_ids)
+            for word, ingredient_ids in word_ingredients.items()
+        }
+        self.trigrams = dict(trigrams)
+        self.vowel_keys = sorted(
+            (get_vowel_key(word), position)
+            for position, word in enumerate(words)
+        )
+        self.matches = {}
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def refresh(self):
+        """
+        Актуализирует индекс.
+
+        Индекс перестраивается после изменения каталога ингредиентов
+        и раз в INGREDIENT_INDEX_MAX_AGE секунд для учёта популярности.
+        """
+        with self.lock:
+            if (
+                self.version is None
+                or cache.get(INGREDIENT_INDEX_VERSION_KEY, 0) != self.version
+                or time.monotonic() - self.built_at > INGREDIENT_INDEX_MAX_AGE
+            ):
+                self.build()
+
+    def match_token(self, token):
+        """
+        Возвращает слова каталога, близкие к слову запроса.
+
+        Результат — словарь слово -> число опечаток. Слова,
+        начинающиеся с запроса, находятся по отсортированному
+        словарю, остальные — по общим триграммам и по ключу
+        с заменёнными гласными.
+        """
+        matches = self.matches.get(token)
+        if matches is not None:
+            return matches
+        matches = {}
+        position = bisect_left(self.words, token)
+        while (
+            position < len(self.words)
+            and self.words[position].startswith(token)
+        ):
+            matches[self.words[position]] = 0
+            position += 1
+        limit = get_max_typos(token)
+        if limit:
+            overlap = Counter(
+                position
+                for trigram in get_trigrams(token)
+                for position in self.trigrams.get(trigram, ())
+            )
+            candidates = [
+                position for position, _ in overlap.most_common(
+                    INGREDIENT_SEARCH_CANDIDATES
+                )
+            ]
+            vowel_key = get_vowel_key(token)
+            index = bisect_left(self.vowel_keys, (vowel_key,))
+            for key, position in self.vowel_keys[
+                index:index + INGREDIENT_SEARCH_VOWEL_CANDIDATES
+            ]:
+                if not key.startswith(vowel_key):
+                    break
+                candidates.append(position)
+            for position in candidates:
+                word = self.words[position]
+                if word in matches:
+                    continue
+                distance = prefix_distance(token, word, limit)
+                if distance <= limit:
+                    matches[word] = distance
+        if len(self.matches) >= INGREDIENT_SEARCH_CACHE_SIZE:
+            self.matches.clear()
+        self.matches[token] = matches
+        return matches
+
+    def score(self, tokens):
+        """
+        Возвращает суммарное число опечаток для подходящих ингредиентов.
+
+        Ингредиент подходит, если каждому слову запроса соответствует
+        какое-либо слово его названия.
+        """
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for word, distance in self.match_token(token).items():
+                for ingredient_id in self.word_ingredients[word]:
+                    best = token_scores.get(ingredient_id, distance)
+                    token_scores[ingredient_id] = min(best, distance)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    ingredient_id: score + token_scores[ingredient_id]
+                    for ingredient_id, score in scores.items()
+                    if ingredient_id in token_scores
+                }
+            if not scores:
+                break
+        return scores or {}
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """
+        Возвращает ингредиенты, подходящие под запрос.
+
+        Сначала идут ингредиенты с меньшим числом опечаток, затем
+        названия, начинающиеся с запроса, с запроса с точностью
+        до гласных или с первого его слова, затем более популярные
+        и более короткие.
+        """
+        scores = {}
+        prefixes = set()
+        leading_words = set()
+        with self.lock:
+            for tokens in get_query_variants(query):
+                prefixes.add(' '.join(tokens))
+                leading_words.update(self.match_token(tokens[0]))
+                for ingredient_id, score in self.score(tokens).items():
+                    if score < scores.get(ingredient_id, score + 1):
+                        scores[ingredient_id] = score
+            records = self.records
+            names = self.names
+            popularity = self.popularity
+        prefixes = tuple(prefixes)
+        vowel_prefixes = tuple(get_vowel_key(prefix) for prefix in prefixes)
+
+        def rank(ingredient_id):
+            name, words, vowel_key = names[ingredient_id]
+            return (
+                scores[ingredient_id],
+                not name.startswith(prefixes),
+                not vowel_key.startswith(vowel_prefixes),
+                words[0] not in leading_words,
+                -popularity.get(ingredient_id, 0),
+                len(name),
+                name,
+            )
+
+        return [
+            records[ingredient_id]
+            for ingredient_id in heapq.nsmallest(limit, scores, key=rank)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(query, limit=INGREDIENT_SEARCH_LIMIT):
+    """Ищет ингредиенты по актуальному индексу."""
+    ingredient_index.refresh()
+    return ingredient_index.search(query, limit)
+
+
+def register_catalog_change():
+    """Сообщает индексам в памяти процессов об изменении каталога."""
+    cache.add(INGREDIENT_INDEX_VERSION_KEY, 0, None)
+    try:
+        cache.incr(INGREDIENT_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(INGREDIENT_INDEX_VERSION_KEY, 0, None)
@@ -0,0 +1,284 @@
+"""Нагрузочное тестирование API по запросам из Postman-коллекции."""
+
+import http.client
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+VARIABLE_PATTERN = re.compile(r'{{(\w+)}}')
+
+SCENARIOS = {
+    'browse': (50, (
+        'get_recipes_list // No Auth',
+        'get_recipes_list_with_two_tags_param // User',
+        'get_recipe_detail // User',
+    )),
+    'favorite': (20, (
+        'get_recipes_list // User',
+        'get_recipe_detail // User',
+        'add_to_favorite // User',
+        'get_recipes_list_with_is_favorited_param // User',
+        'remove_from_favorite // User',
+    )),
+    'shopping': (20, (
+        'get_recipe_detail // User',
+        'add_to_shopping_cart // User',
+        'get_recipes_list_with_is_in_shopping_cart_param // User',
+        'download_shopping_cart // User',
+        'remove_from_shopping_cart // User',
+    )),
+    'subscribe': (10, (
+        'get_profile // User',
+        'create_subscription // User',
+        'get_subscription_list // User',
+        'delete_first_subscription // User',
+    )),
+}
+
+
+def get_auth_header(auth):
+    """Возвращает шаблон заголовка авторизации из настроек Postman."""
+    if not auth or auth.get('type') != 'apikey':
+        return None
+    options = {item['key']: item['value'] for item in auth['apikey']}
+    return options.get('key'), options.get('value')
+
+
+def load_collection(path):
+    """
+    Возвращает запросы Postman-коллекции по их именам.
+
+    Авторизация наследуется от папок, как при запуске коллекции
+    в Postman.
+    """
+    with open(path, encoding='utf-8') as collection_file:
+        collection = json.load(collection_file)
+    requests = {}
+
+    def walk(items, auth):
+        for item in items:
+            item_auth = item.get('auth', auth)
+            if 'item' in item:
+                walk(item['item'], item_auth)
+                continue
+            request = item['request']
+            url = request['url']
+            requests[item['name']] = {
+                'method': request['method'],
+                'url': url['raw'] if isinstance(url, dict) else url,
+                'body': (request.get('body') or {}).get('raw') or None,
+                'auth': get_auth_header(request.get('auth', item_auth)),
+            }
+
+    walk(collection['item'], collection.get('auth'))
+    return requests
+
+
+def substitute(template, variables):
+    """Подставляет переменные Postman в шаблон."""
+    return VARIABLE_PATTERN.sub(
+        lambda match: str(variables.get(match.group(1), match.group(0))),
+        template
+    )
+
+
+class LoadStats:
+    """Потокобезопасная статистика ответов по запросам."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, duration, status):
+        """Сохраняет длительность и статус ответа."""
+        with self.lock:
+            self.latencies[name].append(duration)
+            self.statuses[name][status] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        """
+        Возвращает итоги по запросам и в целом.
+
+        Для каждого запроса считаются количество, пропускная
+        способность, доля ошибок и перцентили задержки в мс.
+        """
+        rows = []
+        for name, latencies in sorted(self.latencies.items()):
+            rows.append(self.summarize(
+                name, latencies, self.errors[name], elapsed,
+                dict(self.statuses[name])
+            ))
+        rows.append(self.summarize(
+            'total',
+            [value for values in self.latencies.values() for value in values],
+            sum(self.errors.values()),
+            elapsed,
+            {}
+        ))
+        return rows
+
+    @staticmethod
+    def summarize(name, latencies, errors, elapsed, statuses):
+        """Возвращает итоги по одному запросу."""
+        latencies = sorted(latencies)
+        count = len(latencies)
+        if count > 1:
+            quantiles = statistics.quantiles(
+                latencies, n=100, method='inclusive'
+            )
+            p50, p90, p95, p99 = (
+                quantiles[49], quantiles[89], quantiles[94], quantiles[98]
+            )
+        else:
+            p50 = p90 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            'name': name,
+            'count': count,
+            'rps': count / elapsed if elapsed else 0.0,
+            'error_rate': errors / count if count else 0.0,
+            'p50_ms': p50 * 1000,
+            'p90_ms': p90 * 1000,
+            'p95_ms': p95 * 1000,
+            'p99_ms': p99 * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+            'statuses': {str(key): value for key, value in statuses.items()},
+        }
+
+
+class VirtualUser(threading.Thread):
+    """
+    Виртуальный пользователь, выполняющий сценарии по очереди.
+
+    Запросы отправляются через одно постоянное соединение,
+    как это делает браузер.
+    """
+
+    def __init__(
+        self, base_url, requests, scenarios, variables, stats, deadline,
+        iterations, seed
+    ):
+        super().__init__(daemon=True)
+        self.base_url = urlsplit(base_url)
+        self.requests = requests
+        self.scenarios = scenarios
+        self.variables = variables
+        self.stats = stats
+        self.deadline = deadline
+        self.iterations = iterations
+        self.random = random.Random(seed)
+        self.connection = None
+
+    def connect(self):
+        """Открывает соединение с сервером."""
+        connection_class = (
+            http.client.HTTPSConnection
+            if self.base_url.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(self.base_url.netloc, timeout=30)
+
+    def send(self, name, variables):
+        """Отправляет запрос коллекции и записывает результат."""
+        request = self.requests[name]
+        url = urlsplit(substitute(
+            request['url'],
+            {**variables, 'baseUrl': self.base_url.path.rstrip('/')}
+        ))
+        path = url.path + (f'?{url.query}' if url.query else '')
+        headers = {'Accept': 'application/json'}
+        if request['auth']:
+            header, value = request['auth']
+            headers[header] = substitute(value, variables)
+        body = None
+        if request['body']:
+            body = substitute(request['body'], variables).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.connection is None:
+            self.connect()
+        start = time.perf_counter()
+        try:
+            self.connection.request(
+                request['method'], path, body=body, headers=headers
+            )
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as error:
+            status = type(error).__name__
+            self.connection.close()
+            self.connection = None
+        self.stats.record(name, time.perf_counter() - start, status)
+
+    def pick_variables(self):
+        """Выбирает рецепт, автора и теги для очередного сценария."""
+        variables = dict(self.variables['user'])
+        recipe_id, author_id = self.random.choice(self.variables['recipes'])
+        tags = self.random.sample(
+            self.variables['tags'], min(2, len(self.variables['tags']))
+        )
+        variables.update({
+            'firstRecipeId': recipe_id,
+            'thirdUserId': author_id,
+            'secondTagSlug': tags[0],
+            'thirdTagSlug': tags[-1],
+        })
+        return variables
+
+    def run(self):
+        names = list(self.scenarios)
+        weights = [self.scenarios[name][0] for name in names]
+        completed = 0
+        while time.monotonic() < self.deadline and (
+            not self.iterations or completed < self.iterations
+        ):
+            scenario = self.random.choices(names, weights)[0]
+            variables = self.pick_variables()
+            for step in self.scenarios[scenario][1]:
+                self.send(step, variables)
+            completed += 1
+        if self.connection is not None:
+            self.connection.close()
+
+
+def run_load_test(
+    base_url, requests, scenarios, users, recipes, tags, concurrency,
+    duration, iterations=0, seed=0
+):
+    """
+    Запускает нагрузочный тест и возвращает итоги по запросам.
+
+    Каждый из concurrency виртуальных пользователей выполняет
+    сценарии, выбранные случайно по весам, пока не истечёт
+    duration секунд или не будет выполнено iterations сценариев.
+    """
+    missing = {
+        step for _, steps in scenarios.values() for step in steps
+    } - set(requests)
+    if missing:
+        raise KeyError(', '.join(sorted(missing)))
+    stats = LoadStats()
+    deadline = time.monotonic() + duration
+    workers = [
+        VirtualUser(
+            base_url, requests, scenarios,
+            {'user': users[index % len(users)], 'recipes': recipes,
+             'tags': tags},
+            stats, deadline, iterations, seed + index
+        )
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return stats.summary(time.perf_counter() - started)
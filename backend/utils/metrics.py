@@ -0,0 +1,38 @@
+"""Счётчики метрик приложения в формате Prometheus."""
+
+import os
+import threading
+from collections import Counter
+
+counters = Counter()
+lock = threading.Lock()
+
+
+def increment(name, value=1, **labels):
+    """Увеличивает счётчик с указанными метками."""
+    key = (name, tuple(sorted(labels.items())))
+    with lock:
+        counters[key] += value
+
+
+def render_metrics():
+    """
+    Возвращает значения счётчиков в текстовом формате Prometheus.
+
+    Счётчики хранятся в памяти процесса, поэтому к меткам
+    добавляется идентификатор процесса.
+    """
+    with lock:
+        items = sorted(counters.items())
+    lines = []
+    current_name = None
+    for (name, labels), value in items:
+        if name != current_name:
+            lines.append(f'# TYPE {name} counter')
+            current_name = name
+        labels = ','.join(
+            '{}="{}"'.format(key, str(label).replace('"', '\\"'))
+            for key, label in labels + (('pid', os.getpid()),)
+        )
+        lines.append(f'{name}{{{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,185 @@
+"""Пагинаторы для больших таблиц."""
+
+import hashlib
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+
+from utils.constants import (
+    COUNT_CACHE_KEY,
+    COUNT_CACHE_TIMEOUT,
+    COUNT_ESTIMATE_THRESHOLD,
+    COUNT_LIMIT,
+    COUNT_VERSION_KEY
+)
+
+
+def estimate_count(queryset):
+    """
+    Возвращает оценку количества строк таблицы по статистике PostgreSQL.
+
+    Для других СУБД возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class '
+            'WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор без точного подсчёта строк в больших таблицах.
+
+    Для запросов без фильтров использует оценку планировщика,
+    для остальных запросов ограничивает подсчёт значением COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        """Возвращает оценку количества объектов."""
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > COUNT_ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset[:COUNT_LIMIT].count()
+
+
+def get_query_tables(queryset, sql):
+    """Возвращает таблицы моделей, упомянутые в SQL-запросе."""
+    quote_name = connections[queryset.db].ops.quote_name
+    return sorted(
+        model._meta.db_table
+        for model in apps.get_models()
+        if quote_name(model._meta.db_table) in sql
+    )
+
+
+def get_count_versions(tables):
+    """
+    Возвращает версии таблиц для ключа закешированного подсчёта.
+
+    Вытесненная из кеша версия начинается заново со значения
+    текущего времени в наносекундах, а не с нуля, поэтому ключи
+    не совпадают с ключами подсчётов, сделанных до вытеснения.
+    """
+    keys = [COUNT_VERSION_KEY.format(table) for table in tables]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def bump_count_versions(tables):
+    """Увеличивает версии таблиц, сбрасывая закешированные подсчёты."""
+    for table in tables:
+        key = COUNT_VERSION_KEY.format(table)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def register_count_change(*models):
+    """
+    Сбрасывает закешированные подсчёты строк моделей.
+
+    Версии увеличиваются после фиксации транзакции, чтобы
+    параллельный запрос не закешировал подсчёт по старым данным.
+    """
+    tables = {model._meta.db_table for model in models}
+    transaction.on_commit(lambda: bump_count_versions(tables))
+
+
+class CachedCountPaginator(EstimatedCountPaginator):
+    """
+    Пагинатор с кешированием количества объектов.
+
+    Подсчёт кешируется на COUNT_CACHE_TIMEOUT секунд по тексту
+    запроса с параметрами, поэтому одинаковые наборы фильтров
+    используют общий результат. В ключ входят версии всех таблиц
+    запроса: их изменение через register_count_change сбрасывает
+    кеш. Для больших таблиц без фильтров используется оценка
+    планировщика.
+    """
+
+    @cached_property
+    def count(self):
+        """Возвращает количество объектов."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > COUNT_ESTIMATE_THRESHOLD:
+                return estimate
+        sql, params = queryset.query.sql_with_params()
+        tables = get_query_tables(queryset, sql)
+        versions = get_count_versions(tables)
+        key = COUNT_CACHE_KEY.format(hashlib.md5('{}|{}|{}'.format(
+            sql, params, sorted(versions.items())
+        ).encode()).hexdigest())
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class HasMorePage(Page):
+    """Страница, знающая только о наличии следующей страницы."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class HasMorePaginator(Paginator):
+    """
+    Пагинатор без подсчёта объектов.
+
+    Вместе со страницей загружается одна лишняя строка:
+    по ней определяется, есть ли следующая страница.
+    """
+
+    def validate_number(self, number):
+        """Проверяет номер страницы без подсчёта объектов."""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        """Возвращает страницу с признаком наличия следующей."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return HasMorePage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
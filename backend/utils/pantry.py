@@ -0,0 +1,339 @@
+"""Поиск рецептов по имеющимся у пользователя ингредиентам."""
+
+import threading
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeIngredients, RecipeTags
+from utils.constants import (
+    PANTRY_BITMAP_RATIO,
+    PANTRY_CHANGE_KEY,
+    PANTRY_CHANGE_TIMEOUT,
+    PANTRY_INDEX_BATCH_SIZE,
+    PANTRY_INDEX_MAX_AGE,
+    PANTRY_MAX_REPLAY,
+    PANTRY_MAX_RESULTS,
+    PANTRY_VERSION_KEY
+)
+
+ID_DTYPE = np.int32
+EMPTY_POSTING = np.array([], dtype=ID_DTYPE)
+
+
+def load_pairs(queryset, fields):
+    """Загружает пары идентификаторов из базы данных в массив NumPy."""
+    values = np.fromiter(
+        (
+            value
+            for pair in queryset.values_list(*fields).iterator(
+                chunk_size=PANTRY_INDEX_BATCH_SIZE
+            )
+            for value in pair
+        ),
+        dtype=ID_DTYPE
+    )
+    return values.reshape(-1, 2)
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс: ключ -> отсортированный массив рецептов.
+
+    Хранит также обратное отображение рецепт -> ключи для обновления
+    индекса при изменении рецепта.
+    """
+
+    def __init__(self, pairs):
+        self.postings = {}
+        self.overrides = {}
+        pairs = np.unique(pairs, axis=0)
+        by_key = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+        keys, starts = np.unique(by_key[:, 1], return_index=True)
+        if len(keys):
+            self.postings = dict(
+                zip(keys.tolist(), np.split(by_key[:, 0], starts[1:]))
+            )
+        by_recipe = pairs[np.argsort(pairs[:, 0], kind='stable')]
+        self.recipe_ids, self.recipe_starts = np.unique(
+            by_recipe[:, 0], return_index=True
+        )
+        self.recipe_keys = by_recipe[:, 1]
+
+    def get(self, key):
+        """Возвращает рецепты, содержащие ключ."""
+        return self.postings.get(key, EMPTY_POSTING)
+
+    def keys_of(self, recipe_id):
+        """Возвращает ключи рецепта."""
+        if recipe_id in self.overrides:
+            return self.overrides[recipe_id]
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        if (
+            position == len(self.recipe_ids)
+            or self.recipe_ids[position] != recipe_id
+        ):
+            return ()
+        start = self.recipe_starts[position]
+        end = (
+            self.recipe_starts[position + 1]
+            if position + 1 < len(self.recipe_starts)
+            else len(self.recipe_keys)
+        )
+        return tuple(self.recipe_keys[start:end].tolist())
+
+    def update(self, recipe_id, keys):
+        """Заменяет ключи рецепта и возвращает изменившиеся ключи."""
+        old_keys = set(self.keys_of(recipe_id))
+        new_keys = set(keys)
+        for key in old_keys - new_keys:
+            posting = self.postings[key]
+            self.postings[key] = np.delete(
+                posting, np.searchsorted(posting, recipe_id)
+            )
+        for key in new_keys - old_keys:
+            posting = self.get(key)
+            self.postings[key] = np.insert(
+                posting, np.searchsorted(posting, recipe_id), recipe_id
+            )
+        self.overrides[recipe_id] = tuple(new_keys)
+        return old_keys ^ new_keys
+
+
+class PantryIndex:
+    """
+    Индекс рецептов для поиска по имеющимся ингредиентам.
+
+    Хранится в памяти процесса. Изменения рецептов передаются между
+    процессами через кеш: каждое изменение получает номер версии.
+    Для частых ингредиентов дополнительно хранятся битовые карты.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = 0
+
+    def build(self):
+        """Строит индекс по всем рецептам."""
+        self.version = get_pantry_version()
+        self.built_at = time.monotonic()
+        self.ingredients = InvertedIndex(
+            load_pairs(
+                RecipeIngredients.objects.all(),
+                ('recipe_id', 'ingredients_id')
+            )
+        )
+        self.tags = InvertedIndex(
+            load_pairs(RecipeTags.objects.all(), ('recipe_id', 'tags_id'))
+        )
+        recipes = load_pairs(Recipe.objects.all(), ('id', 'cooking_time'))
+        size = int(recipes[:, 0].max()) + 1 if len(recipes) else 1
+        self.cooking_time = np.zeros(size, dtype=np.uint16)
+        self.cooking_time[recipes[:, 0]] = recipes[:, 1]
+        self.ingredients_count = np.zeros(size, dtype=np.uint16)
+        recipe_ids = self.ingredients.recipe_ids
+        self.ingredients_count[recipe_ids] = np.diff(
+            np.append(
+                self.ingredients.recipe_starts,
+                len(self.ingredients.recipe_keys)
+            )
+        )
+        self.bitmaps = {}
+        self.update_bitmaps(self.ingredients.postings)
+
+    def update_bitmaps(self, ingredient_ids):
+        """Пересчитывает битовые карты частых ингредиентов."""
+        size = len(self.cooking_time)
+        for ingredient_id in ingredient_ids:
+            posting = self.ingredients.get(ingredient_id)
+            if len(posting) * PANTRY_BITMAP_RATIO < size:
+                self.bitmaps.pop(ingredient_id, None)
+                continue
+            dense = np.zeros(size, dtype=bool)
+            dense[posting] = True
+            self.bitmaps[ingredient_id] = np.packbits(dense)
+
+    def contains(self, ingredient_id):
+        """Возвращает маску рецептов, содержащих ингредиент."""
+        bitmap = self.bitmaps.get(ingredient_id)
+        if bitmap is not None:
+            return np.unpackbits(
+                bitmap, count=len(self.cooking_time)
+            ).view(bool)
+        return self.mask(self.ingredients, (ingredient_id,))
+
+    def grow(self, recipe_id):
+        """Увеличивает плотные массивы под новый идентификатор рецепта."""
+        size = len(self.cooking_time)
+        if recipe_id < size:
+            return
+        new_size = max(recipe_id + 1, size * 2)
+        for name in ('cooking_time', 'ingredients_count'):
+            array = getattr(self, name)
+            setattr(
+                self, name, np.concatenate(
+                    (array, np.zeros(new_size - size, dtype=array.dtype))
+                )
+            )
+        self.update_bitmaps(list(self.bitmaps))
+
+    def apply_changes(self, recipe_ids):
+        """Перечитывает из базы данных изменённые рецепты."""
+        recipe_ids = set(recipe_ids)
+        cooking_times = dict(
+            Recipe.objects.filter(id__in=recipe_ids).values_list(
+                'id', 'cooking_time'
+            )
+        )
+        ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in RecipeIngredients.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredients_id'):
+            ingredients[recipe_id].append(ingredient_id)
+        tags = {recipe_id: [] for recipe_id in recipe_ids}
+        for recipe_id, tag_id in RecipeTags.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'tags_id'):
+            tags[recipe_id].append(tag_id)
+        changed_ingredients = set()
+        for recipe_id in recipe_ids:
+            self.grow(recipe_id)
+            exists = recipe_id in cooking_times
+            changed_ingredients |= self.ingredients.update(
+                recipe_id, ingredients[recipe_id] if exists else ()
+            )
+            self.tags.update(recipe_id, tags[recipe_id] if exists else ())
+            self.cooking_time[recipe_id] = cooking_times.get(recipe_id, 0)
+            self.ingredients_count[recipe_id] = len(
+                set(ingredients[recipe_id])
+            ) if exists else 0
+        self.update_bitmaps(changed_ingredients)
+
+    def refresh(self):
+        """
+        Актуализирует индекс.
+
+        Применяет изменения, накопленные с момента последнего обновления,
+        либо перестраивает индекс целиком.
+        """
+        with self.lock:
+            current_version = get_pantry_version()
+            if (
+                self.version is None
+                or current_version < self.version
+                or current_version - self.version > PANTRY_MAX_REPLAY
+                or time.monotonic() - self.built_at > PANTRY_INDEX_MAX_AGE
+            ):
+                self.build()
+                return
+            if current_version == self.version:
+                return
+            change_keys = [
+                PANTRY_CHANGE_KEY.format(version)
+                for version in range(self.version + 1, current_version + 1)
+            ]
+            changes = cache.get_many(change_keys)
+            if len(changes) != len(change_keys):
+                self.build()
+                return
+            self.apply_changes(changes.values())
+            self.version = current_version
+
+    def mask(self, index, keys):
+        """Возвращает маску рецептов, содержащих хотя бы один из ключей."""
+        mask = np.zeros(len(self.cooking_time), dtype=bool)
+        for key in keys:
+            mask[index.get(key)] = True
+        return mask
+
+    def search(
+        self, ingredients, required=(), excluded=(), tags=(),
+        min_cooking_time=None, max_cooking_time=None
+    ):
+        """
+        Ранжирует рецепты по покрытию ингредиентами.
+
+        Возвращает массивы идентификаторов рецептов, количества найденных
+        и недостающих ингредиентов. Сначала идут рецепты, для которых
+        не хватает меньше всего ингредиентов.
+        """
+        self.refresh()
+        matched = np.zeros(len(self.cooking_time), dtype=np.uint16)
+        for ingredient_id in set(ingredients) | set(required):
+            if ingredient_id in self.bitmaps:
+                matched += self.contains(ingredient_id)
+            else:
+                matched[self.ingredients.get(ingredient_id)] += 1
+        for ingredient_id in set(required):
+            matched[~self.contains(ingredient_id)] = 0
+        for ingredient_id in set(excluded):
+            if ingredient_id in self.bitmaps:
+                matched[self.contains(ingredient_id)] = 0
+            else:
+                matched[self.ingredients.get(ingredient_id)] = 0
+        if tags:
+            matched[~self.mask(self.tags, tags)] = 0
+        if min_cooking_time is not None:
+            matched[self.cooking_time < min_cooking_time] = 0
+        if max_cooking_time is not None:
+            matched[self.cooking_time > max_cooking_time] = 0
+        candidates = np.flatnonzero(matched)
+        matched = matched[candidates].astype(np.int32)
+        missing = self.ingredients_count[candidates] - matched
+        score = missing - (
+            matched / np.maximum(matched + missing, 1) * 0.5
+        ).astype(np.float32)
+        if len(candidates) > PANTRY_MAX_RESULTS:
+            top = np.argpartition(score, PANTRY_MAX_RESULTS)[
+                :PANTRY_MAX_RESULTS
+            ]
+            candidates, matched, missing, score = (
+                candidates[top], matched[top], missing[top], score[top]
+            )
+        order = np.lexsort((-candidates, score))
+        return candidates[order], matched[order], missing[order]
+
+
+pantry_index = PantryIndex()
+
+
+def get_pantry_version():
+    """
+    Возвращает текущую версию индекса.
+
+    Если счётчик версий вытеснен из кеша, он начинается заново
+    со значения текущего времени в наносекундах: оно заведомо больше
+    прежних версий на PANTRY_MAX_REPLAY, поэтому все процессы
+    перестраивают индекс, а не пропускают изменения.
+    """
+    version = cache.get(PANTRY_VERSION_KEY)
+    if version is None:
+        cache.add(PANTRY_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(PANTRY_VERSION_KEY, 0)
+    return version
+
+
+def publish_recipe_change(recipe_id):
+    """Записывает изменение рецепта в кеш под новым номером версии."""
+    get_pantry_version()
+    try:
+        version = cache.incr(PANTRY_VERSION_KEY)
+    except ValueError:
+        get_pantry_version()
+        return
+    cache.set(
+        PANTRY_CHANGE_KEY.format(version), recipe_id, PANTRY_CHANGE_TIMEOUT
+    )
+
+
+def register_recipe_change(recipe_id):
+    """
+    Сообщает индексам в памяти процессов об изменении рецепта.
+
+    Изменение публикуется после фиксации транзакции, чтобы другой
+    процесс не перечитал рецепт до того, как он станет виден.
+    """
+    transaction.on_commit(lambda: publish_recipe_change(recipe_id))
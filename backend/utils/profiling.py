@@ -0,0 +1,220 @@
+"""Профилирование отдельных запросов по требованию."""
+
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from utils.constants import (
+    PROFILE_FILE_REGEX,
+    PROFILE_HEADER,
+    PROFILE_MAX_QUERIES,
+    PROFILE_PARAM,
+    PROFILE_STATS_LIMIT
+)
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+
+class QueryRecorder:
+    """Обёртка выполнения SQL, сохраняющая запросы и их длительность."""
+
+    def __init__(self, alias, queries):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < PROFILE_MAX_QUERIES:
+                self.queries.append({
+                    'database': self.alias,
+                    'sql': sql,
+                    'many': many,
+                    'duration_ms': round(
+                        (time.perf_counter() - start) * 1000, 3
+                    ),
+                })
+
+
+def is_staff_request(request):
+    """
+    Проверяет, что запрос выполнен сотрудником.
+
+    Учитывает сессию Админ-зоны и токен API.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+def get_profile_trigger(request):
+    """
+    Возвращает причину профилирования запроса или None.
+
+    Явный запрос профиля заголовком X-Profile или параметром
+    'profile' принимается только от сотрудников. Остальные запросы
+    профилируются выборочно с вероятностью PROFILING_SAMPLE_RATE.
+    """
+    if PROFILE_PARAM in request.GET or request.META.get(PROFILE_HEADER):
+        return 'request' if is_staff_request(request) else None
+    sample_rate = settings.PROFILING_SAMPLE_RATE
+    if sample_rate and random.random() < sample_rate:
+        return 'sample'
+    return None
+
+
+def create_profiler():
+    """Создаёт профилировщик, выбранный настройкой PROFILING_PROFILER."""
+    if settings.PROFILING_PROFILER == 'pyinstrument' and SamplingProfiler:
+        return SamplingProfiler()
+    return cProfile.Profile()
+
+
+def profile_call(function, *args):
+    """
+    Выполняет функцию под профилировщиком.
+
+    Возвращает результат функции, профилировщик, выполненные
+    SQL-запросы и длительность выполнения в миллисекундах.
+    """
+    queries = []
+    profiler = create_profiler()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(
+                QueryRecorder(connection.alias, queries)
+            ))
+        deterministic = isinstance(profiler, cProfile.Profile)
+        start = time.perf_counter()
+        if deterministic:
+            profiler.enable()
+        else:
+            profiler.start()
+        try:
+            result = function(*args)
+        finally:
+            if deterministic:
+                profiler.disable()
+            else:
+                profiler.stop()
+        duration = (time.perf_counter() - start) * 1000
+    return result, profiler, queries, duration
+
+
+def save_profile(request, response, profiler, queries, duration, trigger):
+    """
+    Сохраняет профиль запроса в каталог PROFILING_DIR.
+
+    Рядом с файлом профиля записываются сведения о запросе
+    и выполненные SQL-запросы. Возвращает имя профиля.
+    """
+    directory = settings.PROFILING_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'{timezone.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:8]}'
+    if isinstance(profiler, cProfile.Profile):
+        profile_file = f'{name}.prof'
+        profiler.dump_stats(directory / profile_file)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats(
+            'cumulative'
+        ).print_stats(PROFILE_STATS_LIMIT)
+        summary = stream.getvalue()
+    else:
+        profile_file = f'{name}.html'
+        (directory / profile_file).write_text(profiler.output_html())
+        summary = profiler.output_text()
+    user = getattr(request, 'user', None)
+    username = user.get_username() if user and user.is_authenticated else ''
+    (directory / f'{name}.json').write_text(json.dumps({
+        'name': name,
+        'created_at': timezone.now().isoformat(),
+        'trigger': trigger,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': username,
+        'status': response.status_code,
+        'duration_ms': round(duration, 3),
+        'profile_file': profile_file,
+        'query_count': len(queries),
+        'query_time_ms': round(
+            sum(query['duration_ms'] for query in queries), 3
+        ),
+        'queries': queries,
+        'summary': summary,
+    }, ensure_ascii=False, indent=2))
+    prune_profiles()
+    return name
+
+
+def get_profile_path(file_name):
+    """Возвращает путь к файлу профиля или None для чужих файлов."""
+    if not re.match(PROFILE_FILE_REGEX, file_name):
+        return None
+    path = settings.PROFILING_DIR / file_name
+    return path if path.is_file() else None
+
+
+def list_profiles():
+    """Возвращает сведения о сохранённых профилях, начиная с новых."""
+    directory = settings.PROFILING_DIR
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            profile = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        profile.pop('queries', None)
+        profile.pop('summary', None)
+        profiles.append(profile)
+    return profiles
+
+
+def prune_profiles():
+    """
+    Удаляет устаревшие профили.
+
+    Хранятся не более PROFILING_MAX_FILES последних профилей
+    не старше PROFILING_RETENTION_DAYS дней.
+    """
+    directory = settings.PROFILING_DIR
+    oldest = (
+        timezone.now() - timedelta(days=settings.PROFILING_RETENTION_DAYS)
+    ).timestamp()
+    names = sorted(
+        {path.stem for path in directory.iterdir()
+         if re.match(PROFILE_FILE_REGEX, path.name)},
+        reverse=True
+    )
+    for index, name in enumerate(names):
+        paths = list(directory.glob(f'{name}.*'))
+        if index < settings.PROFILING_MAX_FILES and all(
+            path.stat().st_mtime >= oldest for path in paths
+        ):
+            continue
+        for path in paths:
+            path.unlink(missing_ok=True)
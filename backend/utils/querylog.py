@@ -0,0 +1,214 @@
+"""Журнал медленных SQL-запросов с планами выполнения."""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils.constants import SLOW_QUERY_SQL_MAX_LENGTH
+
+logger = logging.getLogger(__name__)
+
+query_source = ContextVar('query_source', default='')
+explaining = ContextVar('explaining', default=False)
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'(\(\?\+\))(?:\s*,\s*\(\?\+\))+'), r'\1+'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """
+    Возвращает нормализованный текст запроса и его отпечаток.
+
+    Литералы и параметры заменяются знаком '?', списки значений
+    любой длины сворачиваются, поэтому запросы, отличающиеся только
+    значениями, получают одинаковый отпечаток.
+    """
+    normalized = sql
+    for pattern, replacement in FINGERPRINT_RULES:
+        normalized = pattern.sub(replacement, normalized)
+    normalized = normalized.strip()
+    return normalized, hashlib.md5(normalized.encode()).hexdigest()[:16]
+
+
+@contextmanager
+def source(label):
+    """Помечает запросы внутри блока источником label."""
+    token = query_source.set(label)
+    try:
+        yield
+    finally:
+        query_source.reset(token)
+
+
+def explain(connection, sql, params):
+    """
+    Возвращает план выполнения запроса.
+
+    В PostgreSQL запрос выполняется повторно с EXPLAIN (ANALYZE,
+    BUFFERS), поэтому план строится только для SELECT.
+    """
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) '
+    elif connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    token = explaining.set(True)
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError:
+        logger.warning('Не удалось получить план запроса', exc_info=True)
+        return None
+    finally:
+        explaining.reset(token)
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+def write_record(record):
+    """
+    Добавляет запись в журнал SLOW_QUERY_LOG.
+
+    Когда размер журнала превышает SLOW_QUERY_LOG_MAX_BYTES,
+    он переименовывается с суффиксом '.1'.
+    """
+    path = settings.SLOW_QUERY_LOG
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if (
+            path.exists()
+            and path.stat().st_size > settings.SLOW_QUERY_LOG_MAX_BYTES
+        ):
+            path.replace(path.with_name(path.name + '.1'))
+        with path.open('a') as log:
+            log.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError:
+        logger.exception('Не удалось записать журнал медленных запросов')
+
+
+class SlowQueryLogger:
+    """
+    Обёртка выполнения SQL, записывающая медленные запросы.
+
+    Запросы дольше SLOW_QUERY_THRESHOLD_MS записываются вместе
+    с источником и отпечатком. Для доли SLOW_QUERY_EXPLAIN_RATE
+    медленных SELECT-запросов сохраняется план выполнения.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        if explaining.get():
+            return execute(sql, params, many, context)
+        succeeded = False
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.log(sql, params, many, context, duration, succeeded)
+
+    def log(self, sql, params, many, context, duration, succeeded):
+        """
+        Записывает медленный запрос в журнал.
+
+        План строится только для успешно выполненных запросов:
+        после ошибки транзакция может быть прервана.
+        """
+        connection = context['connection']
+        normalized, query_fingerprint = fingerprint(sql)
+        plan = None
+        if (
+            succeeded
+            and not many
+            and normalized.upper().startswith('SELECT')
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        ):
+            plan = explain(connection, sql, params)
+        label = query_source.get()
+        logger.warning(
+            'Медленный запрос %.1f мс [%s] %s',
+            duration, label, query_fingerprint
+        )
+        write_record({
+            'time': timezone.now().isoformat(),
+            'database': connection.alias,
+            'source': label,
+            'duration_ms': round(duration, 3),
+            'fingerprint': query_fingerprint,
+            'sql': normalized[:SLOW_QUERY_SQL_MAX_LENGTH],
+            'explain': plan,
+        })
+
+
+slow_query_logger = SlowQueryLogger()
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """Подключает журнал медленных запросов к новому соединению."""
+    if slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_logger)
+
+
+def read_records(since=None):
+    """Читает записи журнала медленных запросов, начиная со старых."""
+    path = settings.SLOW_QUERY_LOG
+    for log_path in (path.with_name(path.name + '.1'), path):
+        if not log_path.exists():
+            continue
+        with log_path.open() as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or parse_datetime(record['time']) >= since:
+                    yield record
+
+
+def aggregate_records(records):
+    """
+    Группирует записи журнала по отпечаткам запросов.
+
+    Возвращает для каждого отпечатка количество, суммарную,
+    среднюю и максимальную длительность, источники, текст
+    запроса и последний сохранённый план.
+    """
+    groups = defaultdict(lambda: {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'sources': set(),
+        'sql': '', 'explain': None,
+    })
+    for record in records:
+        group = groups[record['fingerprint']]
+        group['fingerprint'] = record['fingerprint']
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        if record['source']:
+            group['sources'].add(record['source'])
+        group['sql'] = record['sql']
+        if record.get('explain'):
+            group['explain'] = record['explain']
+    for group in groups.values():
+        group['avg_ms'] = group['total_ms'] / group['count']
+    return list(groups.values())
@@ -0,0 +1,150 @@
+"""Массовый импорт рецептов."""
+
+from django.db import transaction
+
+from api.serializers import RecipeImportSerializer
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeChange,
+    RecipeIngredients,
+    RecipeTags,
+    Tag
+)
+from utils.changes import record_recipe_changes
+from utils.constants import (
+    RECIPE_IMPORT_BATCH_SIZE,
+    UNKNOWN_INGREDIENTS_MESSAGE,
+    UNKNOWN_TAGS_MESSAGE
+)
+from utils.feed import fan_out_author_recipes
+from utils.functions import short_links_create
+from utils.paginators import register_count_change
+from utils.pantry import register_recipe_change
+from utils.similarity import update_recipe_signatures
+
+
+def validate_recipes(items):
+    """
+    Проверяет пачку рецептов.
+
+    Теги и ингредиенты всех рецептов проверяются одним запросом
+    к каждой таблице. Возвращает пары (номер, данные) корректных
+    рецептов и словарь ошибок по номерам остальных.
+    """
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        serializer = RecipeImportSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    tag_ids = {tag for _, data in valid for tag in data['tags']}
+    ingredient_ids = {
+        ingredient['id']
+        for _, data in valid
+        for ingredient in data['recipe_ingredients']
+    }
+    known_tags = set(
+        Tag.objects.filter(id__in=tag_ids).values_list('id', flat=True)
+    )
+    known_ingredients = set(
+        Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).values_list('id', flat=True)
+    )
+    checked = []
+    for index, data in valid:
+        item_errors = {}
+        unknown_tags = set(data['tags']) - known_tags
+        if unknown_tags:
+            item_errors['tags'] = [
+                UNKNOWN_TAGS_MESSAGE.format(sorted(unknown_tags))
+            ]
+        unknown_ingredients = {
+            ingredient['id'] for ingredient in data['recipe_ingredients']
+        } - known_ingredients
+        if unknown_ingredients:
+            item_errors['ingredients'] = [
+                UNKNOWN_INGREDIENTS_MESSAGE.format(sorted(unknown_ingredients))
+            ]
+        if item_errors:
+            errors[index] = item_errors
+        else:
+            checked.append((index, data))
+    return checked, errors
+
+
+def create_recipes(author, recipes_data):
+    """
+    Создаёт пачку рецептов автора в одной транзакции.
+
+    Рецепты, теги и ингредиенты записываются массовыми вставками,
+    а рассылка по лентам подписчиков ставится в очередь фоновых
+    задач после фиксации транзакции.
+    """
+    with transaction.atomic():
+        recipes = [
+            Recipe(
+                author=author,
+                short_link=short_link,
+                name=data['name'],
+                text=data['text'],
+                cooking_time=data['cooking_time'],
+                image=data.get('image')
+            )
+            for data, short_link in zip(
+                recipes_data, short_links_create(len(recipes_data))
+            )
+        ]
+        Recipe.objects.bulk_create(recipes)
+        if recipes and recipes[0].pk is None:
+            recipe_ids = dict(
+                Recipe.objects.filter(
+                    short_link__in=[recipe.short_link for recipe in recipes]
+                ).values_list('short_link', 'id')
+            )
+            for recipe in recipes:
+                recipe.pk = recipe_ids[recipe.short_link]
+        RecipeTags.objects.bulk_create(
+            RecipeTags(recipe_id=recipe.id, tags_id=tag_id)
+            for recipe, data in zip(recipes, recipes_data)
+            for tag_id in data['tags']
+        )
+        RecipeIngredients.objects.bulk_create(
+            RecipeIngredients(
+                recipe_id=recipe.id,
+                ingredients_id=ingredient['id'],
+                amount=ingredient['amount']
+            )
+            for recipe, data in zip(recipes, recipes_data)
+            for ingredient in data['recipe_ingredients']
+        )
+        recipe_ids = [recipe.id for recipe in recipes]
+        record_recipe_changes(recipe_ids, RecipeChange.CREATED)
+        transaction.on_commit(
+            lambda: update_recipe_signatures.delay(recipe_ids)
+        )
+        transaction.on_commit(
+            lambda: fan_out_author_recipes.delay(author.id, recipe_ids)
+        )
+        register_count_change(Recipe, RecipeTags)
+    for recipe_id in recipe_ids:
+        register_recipe_change(recipe_id)
+    return recipe_ids
+
+
+def import_recipes(author, items, batch_size=RECIPE_IMPORT_BATCH_SIZE):
+    """
+    Импортирует рецепты от имени автора.
+
+    Возвращает идентификаторы созданных рецептов по номерам
+    в исходном списке и ошибки по номерам некорректных рецептов.
+    """
+    checked, errors = validate_recipes(items)
+    created = {}
+    for start in range(0, len(checked), batch_size):
+        batch = checked[start:start + batch_size]
+        recipe_ids = create_recipes(author, [data for _, data in batch])
+        created.update(zip((index for index, _ in batch), recipe_ids))
+    return created, errors
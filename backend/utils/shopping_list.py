@@ -0,0 +1,127 @@
+"""Сводный список покупок с приведением единиц измерения."""
+
+import numpy as np
+
+from recipes.models import Ingredient, RecipeIngredients
+from utils.constants import (
+    SHOPPING_LIST_AMOUNT_PRECISION,
+    UNIT_CONVERSIONS,
+    UNIT_DISPLAY_THRESHOLDS
+)
+
+
+def normalize_unit(unit):
+    """Приводит обозначение единицы измерения к каноническому виду."""
+    return ' '.join(unit.lower().replace('.', '. ').split()).rstrip('.')
+
+
+NORMALIZED_UNITS = {
+    normalize_unit(unit): conversion
+    for unit, conversion in UNIT_CONVERSIONS.items()
+}
+
+
+def get_unit_conversion(unit):
+    """
+    Возвращает размерность и множитель перевода в базовую единицу.
+
+    Для неизвестных единиц размерностью считается сама единица.
+    """
+    return NORMALIZED_UNITS.get(normalize_unit(unit), (unit, 1))
+
+
+def format_amount(amount, dimension):
+    """Подбирает удобную единицу измерения и округляет количество."""
+    unit, factor = dimension, 1
+    for threshold_unit, threshold in UNIT_DISPLAY_THRESHOLDS.get(
+        dimension, ()
+    ):
+        if amount >= threshold:
+            unit, factor = threshold_unit, threshold
+            break
+    value = round(amount / factor, SHOPPING_LIST_AMOUNT_PRECISION)
+    if value == int(value):
+        value = int(value)
+    return value, unit
+
+
+def is_display_unit(unit, dimension):
+    """
+    Проверяет, выбирается ли единица автоматически по количеству.
+
+    Такими являются известные единицы с множителем базовой единицы
+    размерности или единиц из UNIT_DISPLAY_THRESHOLDS, например
+    'г', 'гр' и 'кг'.
+    """
+    if normalize_unit(unit) not in NORMALIZED_UNITS:
+        return False
+    return get_unit_conversion(unit)[1] in {1, *(
+        threshold for _, threshold
+        in UNIT_DISPLAY_THRESHOLDS.get(dimension, ())
+    )}
+
+
+def aggregate_ingredients(rows):
+    """
+    Суммирует ингредиенты с приведением совместимых единиц измерения.
+
+    Принимает пары (ингредиент, количество) и возвращает список
+    позиций с названием, количеством и единицей измерения.
+    Продукты с одинаковым названием и совместимыми единицами
+    объединяются в одну позицию. Граммы, килограммы, миллилитры
+    и литры приводятся к удобной единице, например 5000 г - к 5 кг.
+    Остальные единицы, например ложки, сохраняются, если продукт
+    встречается только в них.
+    """
+    rows = np.array(rows, dtype=np.int64).reshape(-1, 2)
+    if not len(rows):
+        return []
+    ingredient_ids, inverse = np.unique(rows[:, 0], return_inverse=True)
+    totals = np.bincount(inverse, weights=rows[:, 1])
+    ingredients = {
+        ingredient_id: (name, measurement_unit)
+        for ingredient_id, name, measurement_unit
+        in Ingredient.objects.filter(
+            id__in=ingredient_ids.tolist()
+        ).values_list('id', 'name', 'measurement_unit')
+    }
+    groups = {}
+    group_indexes = np.empty(len(ingredient_ids), dtype=np.int64)
+    factors = np.empty(len(ingredient_ids))
+    for position, ingredient_id in enumerate(ingredient_ids.tolist()):
+        name, measurement_unit = ingredients[ingredient_id]
+        dimension, factor = get_unit_conversion(measurement_unit)
+        group = groups.setdefault(
+            (name.strip().lower(), dimension),
+            (len(groups), name, dimension, set())
+        )
+        group[3].add(measurement_unit)
+        group_indexes[position] = group[0]
+        factors[position] = factor
+    amounts = np.bincount(
+        group_indexes, weights=totals * factors, minlength=len(groups)
+    )
+    shopping_list = []
+    for index, name, dimension, units in sorted(
+        groups.values(), key=lambda group: group[1].lower()
+    ):
+        unit = next(iter(units))
+        if len(units) == 1 and not is_display_unit(unit, dimension):
+            amount, _ = format_amount(
+                float(amounts[index]) / get_unit_conversion(unit)[1], unit
+            )
+        else:
+            amount, unit = format_amount(float(amounts[index]), dimension)
+        shopping_list.append(
+            {'name': name, 'amount': amount, 'measurement_unit': unit}
+        )
+    return shopping_list
+
+
+def get_shopping_list(user):
+    """Возвращает сводный список покупок пользователя."""
+    return aggregate_ingredients(
+        RecipeIngredients.objects.filter(
+            recipe__shopping_carts__user=user
+        ).values_list('ingredients_id', 'amount')
+    )
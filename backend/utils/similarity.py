@@ -0,0 +1,154 @@
+"""Поиск похожих рецептов по MinHash-сигнатурам ингредиентов."""
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from recipes.models import (
+    Recipe,
+    RecipeBand,
+    RecipeIngredients,
+    RecipeSignature
+)
+from utils.constants import (
+    LSH_BANDS,
+    LSH_MAX_CANDIDATES,
+    MINHASH_NUM_PERM,
+    MINHASH_SEED
+)
+from utils.tasks import task
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+SIGNATURE_DTYPE = np.uint32
+
+_random = np.random.default_rng(MINHASH_SEED)
+HASH_A = _random.integers(
+    1, MERSENNE_PRIME, MINHASH_NUM_PERM, dtype=np.uint64
+)
+HASH_B = _random.integers(
+    0, MERSENNE_PRIME, MINHASH_NUM_PERM, dtype=np.uint64
+)
+BAND_WEIGHTS = _random.integers(
+    1, np.iinfo(np.int64).max, MINHASH_NUM_PERM // LSH_BANDS, dtype=np.uint64
+) | np.uint64(1)
+
+
+def compute_signatures(recipe_ids, ingredient_ids):
+    """
+    Вычисляет MinHash-сигнатуры для набора рецептов.
+
+    Принимает параллельные массивы пар (рецепт, ингредиент),
+    отсортированные по рецепту. Возвращает идентификаторы рецептов
+    и матрицу сигнатур формы (рецепты, перестановки).
+    """
+    recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+    values = np.asarray(ingredient_ids, dtype=np.uint64) % MERSENNE_PRIME
+    hashes = (
+        HASH_A[np.newaxis, :] * values[:, np.newaxis] + HASH_B
+    ) % MERSENNE_PRIME
+    unique_ids, starts = np.unique(recipe_ids, return_index=True)
+    signatures = np.minimum.reduceat(hashes, starts, axis=0)
+    return unique_ids, signatures.astype(SIGNATURE_DTYPE)
+
+
+def compute_bands(signatures):
+    """Вычисляет хеши полос LSH для матрицы сигнатур."""
+    bands = signatures.astype(np.uint64).reshape(
+        len(signatures), LSH_BANDS, -1
+    )
+    return (bands * BAND_WEIGHTS).sum(axis=2).view(np.int64)
+
+
+@task()
+@transaction.atomic
+def update_recipe_signatures(recipe_ids):
+    """Пересчитывает сигнатуры и полосы LSH для переданных рецептов."""
+    pairs = np.array(
+        RecipeIngredients.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('recipe_id').values_list('recipe_id', 'ingredients_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeBand.objects.filter(recipe_id__in=recipe_ids).delete()
+    if not len(pairs):
+        return
+    unique_ids, signatures = compute_signatures(pairs[:, 0], pairs[:, 1])
+    buckets = compute_bands(signatures)
+    RecipeSignature.objects.bulk_create(
+        RecipeSignature(recipe_id=recipe_id, signature=signature.tobytes())
+        for recipe_id, signature in zip(unique_ids.tolist(), signatures)
+    )
+    RecipeBand.objects.bulk_create(
+        RecipeBand(recipe_id=recipe_id, band=band, bucket=bucket)
+        for recipe_id, recipe_buckets in zip(
+            unique_ids.tolist(), buckets.tolist()
+        )
+        for band, bucket in enumerate(recipe_buckets)
+    )
+
+
+def schedule_signature_update(recipe_id):
+    """
+    Ставит в очередь пересчёт сигнатуры рецепта.
+
+    Задача создаётся после фиксации транзакции, когда ингредиенты
+    рецепта уже записаны. Ожидающая задача для того же рецепта
+    не дублируется.
+    """
+    transaction.on_commit(
+        lambda: update_recipe_signatures.apply_async(
+            ([recipe_id],), dedup_key=f'recipe_signatures:{recipe_id}'
+        )
+    )
+
+
+def load_signatures(recipe_ids):
+    """Возвращает идентификаторы рецептов и матрицу их сигнатур."""
+    rows = RecipeSignature.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'signature')
+    ids, signatures = [], []
+    for recipe_id, signature in rows:
+        ids.append(recipe_id)
+        signatures.append(np.frombuffer(signature, dtype=SIGNATURE_DTYPE))
+    if not ids:
+        return np.array([], dtype=np.int64), np.empty(
+            (0, MINHASH_NUM_PERM), dtype=SIGNATURE_DTYPE
+        )
+    return np.array(ids, dtype=np.int64), np.vstack(signatures)
+
+
+def get_similar_recipes(recipe, limit):
+    """
+    Возвращает рецепты, похожие на переданный по составу ингредиентов.
+
+    Кандидаты выбираются по совпадающим полосам LSH-индекса,
+    у каждого найденного рецепта заполняется атрибут jaccard.
+    Если сигнатура рецепта ещё не построена, её пересчёт ставится
+    в очередь, а результат пуст.
+    """
+    _, signatures = load_signatures([recipe.id])
+    if not len(signatures):
+        schedule_signature_update(recipe.id)
+        return []
+    signature = signatures[0]
+    condition = Q()
+    for band, bucket in enumerate(compute_bands(signatures)[0].tolist()):
+        condition |= Q(band=band, bucket=bucket)
+    candidate_ids = RecipeBand.objects.filter(condition).exclude(
+        recipe_id=recipe.id
+    ).values_list('recipe_id', flat=True).distinct()[:LSH_MAX_CANDIDATES]
+    ids, candidates = load_signatures(list(candidate_ids))
+    if not len(ids):
+        return []
+    estimates = (candidates == signature).mean(axis=1)
+    order = np.argsort(-estimates, kind='stable')[:limit]
+    recipes = Recipe.objects.in_bulk(ids[order].tolist())
+    similar_recipes = []
+    for index in order:
+        similar_recipe = recipes.get(int(ids[index]))
+        if similar_recipe is not None:
+            similar_recipe.jaccard = round(float(estimates[index]), 3)
+            similar_recipes.append(similar_recipe)
+    return similar_recipes
@@ -0,0 +1,115 @@
+"""Хранилище медиафайлов с именами по содержимому."""
+
+import hashlib
+import os
+import re
+import secrets
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+
+from recipes.models import Recipe, User
+from utils.constants import MEDIA_HASH_LENGTH
+
+HASHED_NAME_PATTERN = re.compile(
+    r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{%d}\.[a-z0-9]+\Z'
+    % (MEDIA_HASH_LENGTH - 2)
+)
+MEDIA_FIELDS = ((Recipe, 'image'), (User, 'avatar'))
+
+
+def get_content_hash(content):
+    """Возвращает хеш SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()[:MEDIA_HASH_LENGTH]
+
+
+def is_hashed_name(name):
+    """Проверяет, что имя файла построено по его содержимому."""
+    return bool(HASHED_NAME_PATTERN.search(name))
+
+
+def is_referenced(name):
+    """Проверяет, используется ли файл каким-либо объектом."""
+    return any(
+        model.objects.filter(**{field: name}).exists()
+        for model, field in MEDIA_FIELDS
+    )
+
+
+def delete_unreferenced(names):
+    """Удаляет файлы, на которые не ссылается ни один объект."""
+    for name in names:
+        if name and not is_referenced(name) and default_storage.exists(name):
+            default_storage.delete(name)
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """
+    Файловое хранилище, называющее файлы по хешу содержимого.
+
+    Файл сохраняется в подкаталог upload_to под именем
+    '<первые два символа хеша>/<хеш>.<расширение>'. Повторная
+    загрузка того же содержимого не записывает файл заново,
+    поэтому URL не меняется, пока не изменится содержимое,
+    и его можно кешировать как неизменяемый.
+    """
+
+    def get_hashed_name(self, name, content):
+        """Возвращает имя файла по его содержимому."""
+        directory, file_name = os.path.split(name)
+        extension = os.path.splitext(file_name)[1].lower()
+        content_hash = get_content_hash(content)
+        return os.path.join(
+            directory, content_hash[:2], content_hash + extension
+        ).replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Возвращает имя для сохранения файла.
+
+        Занятое имя по содержимому означает то же содержимое,
+        поэтому суффикс к нему не добавляется.
+        """
+        if is_hashed_name(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл, если такого содержимого ещё нет."""
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def _save(self, name, content):
+        """
+        Записывает файл во временный и публикует его жёсткой ссылкой.
+
+        Ссылка создаётся атомарно и только если файла ещё нет, поэтому
+        читатели не видят недописанный файл. Если одновременный запрос
+        уже сохранил то же содержимое, временный файл просто удаляется.
+        """
+        temp_name = super()._save(
+            os.path.join(
+                os.path.dirname(name), f'.{secrets.token_hex(8)}.tmp'
+            ),
+            content
+        )
+        try:
+            os.link(self.path(temp_name), self.path(name))
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(self.path(temp_name))
+        return name.replace('\\', '/')
@@ -0,0 +1,331 @@
+"""Фоновые задачи в очереди на базе данных и периодический планировщик."""
+
+import json
+import logging
+import traceback
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from tasks.models import ScheduledJob, Task
+from utils.constants import (
+    CRON_FIELD_RANGES,
+    INVALID_CRON_MESSAGE,
+    TASK_LOCK_TIMEOUT,
+    TASK_MAX_ATTEMPTS,
+    TASK_RETENTION_DAYS,
+    TASK_RETRY_DELAY,
+    TASK_SUPERSEDED_MESSAGE
+)
+from utils.querylog import source
+
+logger = logging.getLogger(__name__)
+
+
+class TaskFunction:
+    """
+    Функция, которую можно поставить в очередь фоновых задач.
+
+    Прямой вызов выполняет функцию синхронно.
+    """
+
+    def __init__(self, function, priority, max_attempts, retry_delay):
+        self.function = function
+        self.name = f'{function.__module__}.{function.__name__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.__doc__ = function.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Ставит задачу в очередь."""
+        return self.apply_async(args, kwargs)
+
+    def apply_async(
+        self, args=(), kwargs=None, priority=None, dedup_key=None,
+        countdown=0
+    ):
+        """
+        Ставит задачу в очередь с дополнительными параметрами.
+
+        Если в очереди уже ожидает задача с тем же ключом дедупликации,
+        новая задача не создаётся. В режиме TASKS_EAGER задача
+        выполняется сразу в текущем процессе.
+        """
+        args, kwargs = json.loads(json.dumps([list(args), kwargs or {}]))
+        if settings.TASKS_EAGER:
+            return self.function(*args, **kwargs)
+        Task.objects.bulk_create(
+            [
+                Task(
+                    name=self.name,
+                    args=args,
+                    kwargs=kwargs,
+                    priority=(
+                        self.priority if priority is None else priority
+                    ),
+                    max_attempts=self.max_attempts,
+                    dedup_key=dedup_key,
+                    run_at=timezone.now() + timedelta(seconds=countdown)
+                )
+            ],
+            ignore_conflicts=True
+        )
+
+
+def task(
+    priority=0, max_attempts=TASK_MAX_ATTEMPTS, retry_delay=TASK_RETRY_DELAY
+):
+    """Декоратор, регистрирующий функцию как фоновую задачу."""
+    def decorator(function):
+        return TaskFunction(function, priority, max_attempts, retry_delay)
+    return decorator
+
+
+def claim_task(worker):
+    """
+    Берёт в работу следующую задачу из очереди.
+
+    Задачи выбираются по убыванию приоритета. В PostgreSQL строки,
+    заблокированные другими обработчиками, пропускаются.
+    """
+    now = timezone.now()
+    queryset = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'id')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        task = queryset.first()
+        if task is None:
+            return None
+        claimed = Task.objects.filter(
+            id=task.id, status=Task.PENDING
+        ).update(
+            status=Task.RUNNING,
+            locked_at=now,
+            locked_by=worker,
+            attempts=F('attempts') + 1
+        )
+    if not claimed:
+        return None
+    task.status = Task.RUNNING
+    task.attempts += 1
+    return task
+
+
+def run_task(task):
+    """
+    Выполняет задачу и сохраняет результат.
+
+    При ошибке задача возвращается в очередь с экспоненциальной
+    задержкой, пока не исчерпано число попыток.
+    """
+    retry_delay = TASK_RETRY_DELAY
+    try:
+        task_function = import_string(task.name)
+        retry_delay = getattr(task_function, 'retry_delay', retry_delay)
+        with source(f'task {task.name}'):
+            getattr(task_function, 'function', task_function)(
+                *task.args, **task.kwargs
+            )
+    except Exception:
+        logger.exception('Задача %s (%s) завершилась ошибкой', task.id, task)
+        error = traceback.format_exc()
+        tasks = Task.objects.filter(id=task.id)
+        if task.attempts < task.max_attempts:
+            try:
+                with transaction.atomic():
+                    tasks.update(
+                        status=Task.PENDING,
+                        run_at=timezone.now() + timedelta(
+                            seconds=retry_delay * 2 ** (task.attempts - 1)
+                        ),
+                        locked_at=None,
+                        locked_by='',
+                        last_error=error
+                    )
+                return
+            except IntegrityError:
+                pass
+        tasks.update(
+            status=Task.FAILED,
+            finished_at=timezone.now(),
+            last_error=error
+        )
+        return
+    Task.objects.filter(id=task.id).update(
+        status=Task.DONE,
+        finished_at=timezone.now()
+    )
+
+
+def requeue_stale_tasks():
+    """
+    Возвращает в очередь задачи обработчиков, переставших отвечать.
+
+    Задачи возвращаются по одной: если в очереди уже ожидает задача
+    с тем же ключом дедупликации, зависшая задача помечается
+    ошибкой, а не нарушает ограничение уникальности.
+    """
+    stale_ids = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=TASK_LOCK_TIMEOUT)
+    ).values_list('id', flat=True)
+    requeued = 0
+    for task_id in list(stale_ids):
+        tasks = Task.objects.filter(id=task_id, status=Task.RUNNING)
+        try:
+            with transaction.atomic():
+                requeued += tasks.update(
+                    status=Task.PENDING, locked_at=None, locked_by=''
+                )
+        except IntegrityError:
+            tasks.update(
+                status=Task.FAILED,
+                finished_at=timezone.now(),
+                last_error=TASK_SUPERSEDED_MESSAGE
+            )
+    return requeued
+
+
+class CronSchedule:
+    """
+    Расписание в формате cron.
+
+    Поля: минуты, часы, дни месяца, месяцы и дни недели. Поддерживаются
+    значения, списки, диапазоны и шаг: '*/15 2-5 * * 1,3'.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELD_RANGES):
+            raise ValueError(INVALID_CRON_MESSAGE.format(expression))
+        try:
+            (
+                self.minutes, self.hours, self.days, self.months, weekdays
+            ) = (
+                self.parse_field(field, low, high)
+                for field, (low, high) in zip(fields, CRON_FIELD_RANGES)
+            )
+        except ValueError:
+            raise ValueError(INVALID_CRON_MESSAGE.format(expression))
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def parse_field(field, low, high):
+        """Возвращает множество значений поля расписания."""
+        values = set()
+        for part in field.split(','):
+            value, has_step, step = part.partition('/')
+            step = int(step) if has_step else 1
+            if value == '*':
+                start, end = low, high
+            elif '-' in value:
+                start, end = map(int, value.split('-'))
+            else:
+                start = int(value)
+                end = high if has_step else start
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(field)
+            values.update(range(start, end + 1, step))
+        return values
+
+    def day_matches(self, moment):
+        """Проверяет совпадение дня месяца и дня недели."""
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        """Возвращает ближайший момент запуска после указанного."""
+        current = timezone.localtime(moment).replace(
+            tzinfo=None, second=0, microsecond=0
+        ) + timedelta(minutes=1)
+        last_year = current.year + 5
+        while current.year <= last_year:
+            if current.month not in self.months:
+                current = datetime(
+                    current.year + current.month // 12,
+                    current.month % 12 + 1,
+                    1
+                )
+            elif not self.day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(
+                    days=1
+                )
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return timezone.make_aware(current)
+        raise ValueError(INVALID_CRON_MESSAGE.format(self.expression))
+
+
+def sync_schedule():
+    """Приводит периодические задачи к настройке TASKS_SCHEDULE."""
+    now = timezone.now()
+    schedule = settings.TASKS_SCHEDULE
+    ScheduledJob.objects.exclude(name__in=schedule).delete()
+    for name, (cron, task_name) in schedule.items():
+        job = ScheduledJob.objects.filter(name=name).first()
+        if job and job.cron == cron and job.task == task_name:
+            continue
+        ScheduledJob.objects.update_or_create(
+            name=name,
+            defaults={
+                'cron': cron,
+                'task': task_name,
+                'next_run_at': CronSchedule(cron).next_after(now),
+            }
+        )
+
+
+def run_scheduler():
+    """
+    Ставит в очередь периодические задачи, время которых наступило.
+
+    Запуск пропущенных из-за простоя обработчиков задач
+    выполняется один раз.
+    """
+    now = timezone.now()
+    queryset = ScheduledJob.objects.filter(next_run_at__lte=now)
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        for job in queryset:
+            import_string(job.task).apply_async(
+                dedup_key=f'scheduled:{job.name}'
+            )
+            job.last_run_at = now
+            job.next_run_at = CronSchedule(job.cron).next_after(now)
+            job.save(update_fields=('last_run_at', 'next_run_at'))
+
+
+@task()
+def purge_finished_tasks():
+    """Удаляет завершённые задачи старше TASK_RETENTION_DAYS дней."""
+    Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED),
+        finished_at__lt=timezone.now() - timedelta(days=TASK_RETENTION_DAYS)
+    ).delete()
+
+
+@task()
+def clear_expired_sessions():
+    """Удаляет истёкшие сессии."""
+    Session.objects.filter(expire_date__lt=timezone.now()).delete()
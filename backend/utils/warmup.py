@@ -0,0 +1,90 @@
+"""Прогрев приложения перед приёмом запросов."""
+
+import inspect
+import logging
+import threading
+
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+from PIL import Image
+from rest_framework import serializers
+
+from api import serializers as api_serializers
+from utils.ingredient_search import ingredient_index
+from utils.pantry import pantry_index
+
+logger = logging.getLogger(__name__)
+
+state = {'ready': False}
+state_lock = threading.Lock()
+
+
+def warm_up_urls():
+    """Заполняет кеши маршрутизатора URL."""
+    reverse_dict = get_resolver().reverse_dict
+    logger.debug('Маршрутов URL: %s', len(reverse_dict))
+
+
+def warm_up_serializers():
+    """Строит поля всех сериализаторов API и заполняет кеши моделей."""
+    for _, serializer_class in inspect.getmembers(
+        api_serializers, inspect.isclass
+    ):
+        if (
+            not issubclass(serializer_class, serializers.BaseSerializer)
+            or serializer_class.__module__ != api_serializers.__name__
+        ):
+            continue
+        if issubclass(
+            serializer_class, serializers.ModelSerializer
+        ) and not hasattr(serializer_class.Meta, 'model'):
+            continue
+        serializer_class().fields
+
+
+def warm_up_catalog():
+    """Загружает индексы каталога рецептов в память."""
+    try:
+        pantry_index.refresh()
+        ingredient_index.refresh()
+    except DatabaseError:
+        logger.exception('Не удалось загрузить индекс ингредиентов')
+
+
+def warm_up():
+    """
+    Прогревает приложение.
+
+    Вызывается в главном процессе сервера до запуска обработчиков:
+    подготовленные структуры наследуются обработчиками при fork.
+    Соединения с базой данных после прогрева закрываются,
+    чтобы они не использовались несколькими процессами.
+    """
+    Image.init()
+    warm_up_urls()
+    warm_up_serializers()
+    get_template('rest_framework/api.html')
+    warm_up_catalog()
+    connections.close_all()
+    state['ready'] = True
+
+
+def is_ready():
+    """Проверяет, завершён ли прогрев приложения."""
+    return state['ready']
+
+
+def ensure_warmed_up():
+    """
+    Прогревает приложение при первом обращении.
+
+    Под gunicorn прогрев выполняется хуками сервера до приёма
+    запросов. Под другими серверами, например runserver, его
+    выполняет первая проверка готовности.
+    """
+    if is_ready():
+        return
+    with state_lock:
+        if not is_ready():
+            warm_up()